@@ -8,20 +8,49 @@ Codebase available at: https://github.com/MHindermann/bartocsuggest
 """
 
 from __future__ import annotations
-from typing import List, Optional, Dict, Union, Tuple
-from time import sleep
+from typing import List, Optional, Dict, Union, Tuple, Iterable, Iterator, Set, TYPE_CHECKING
 from os import path
 from datetime import datetime
-from annif_client import AnnifClient
+from threading import RLock
+from time import monotonic
+from itertools import islice
+from bisect import bisect_right
+from json import dump
+from zlib import crc32
 
 from .utility import _Utility
+from .cache import _ResponseCache
+from .transport import _Transport, _TransportError, _RetryBudget, FAST_API
+from .scorers import Scorer, LevenshteinScorer, NormalizedLevenshteinScorer, JaroWinklerScorer, TokenScorer, SCORERS
 from .jskos import _Concept, _ConceptBundle, _ConceptMapping, _ConceptScheme, _Concordance, _LanguageMap
 
-import Levenshtein
-import requests
 import urllib.parse
-
-FAST_API = "https://bartoc-fast.ub.unibas.ch/bartocfast/api"
+import re
+
+# heavy dependencies (requests, Levenshtein, annif_client, openpyxl) are imported where they are first needed:
+if TYPE_CHECKING:
+    import requests
+    from .index import _LabelIndex
+    from .pipeline import _QueryPipeline
+
+FAST_DISABLED = ["Research-Vocabularies-Australia", "Loterre"]
+FAST_RESOURCES = {"Agrovoc": ["aims.fao.org"],
+                  "Bartoc-Skosmos": ["bartoc-skosmos.unibas.ch"],
+                  "Finto": ["finto.fi", "www.yso.fi"],
+                  "Getty": ["vocab.getty.edu"],
+                  "Legilux": ["data.legilux.public.lu"],
+                  "Loterre": ["data.loterre.fr"],
+                  "Research-Vocabularies-Australia": ["vocabs.ands.org.au"],
+                  "UiO": ["data.ub.uio.no"],
+                  "UNESCO": ["vocabularies.unesco.org"],
+                  "ZBW": ["zbw.eu"]}
+AGGREGATED_SOURCES = ["bartoc-skosmos.unibas.ch/*",
+                      "data.ub.uio.no/*",
+                      "vocab.getty.edu/*",
+                      "isl.ics.forth.gr/*/*",
+                      "linkeddata.ge.imati.cnr.it/*/*",
+                      "www.yso.fi/*/*",
+                      "vocabs.ands.org.au/*/*/*/*/*"]
 
 
 class _Result:
@@ -71,6 +100,7 @@ class _Query:
     :param duplicates: toggle keeping duplicates between resources, defaults to True
     :param disabled: the disabled resources, defaults to None
     :param response: the query response, defaults to None
+    :param budget: the retry budget of the session, defaults to None
     """
 
     def __init__(self,
@@ -79,7 +109,8 @@ class _Query:
                  maxsearchtime: int = 5,
                  duplicates: bool = True,
                  disabled: List[str] = None,
-                 response: Union[Dict, requests.models.Response] = None) -> None:
+                 response: Union[Dict, requests.models.Response] = None,
+                 budget: _RetryBudget = None) -> None:
         self.concept = concept
         if searchword is None:
             self.searchword = concept.get_pref_label()
@@ -88,24 +119,29 @@ class _Query:
         self.maxsearchtime = maxsearchtime
         self.duplicates = duplicates
         if disabled is None:
-            self.disabled = ["Research-Vocabularies-Australia", "Loterre"]
+            self.disabled = list(FAST_DISABLED)
         else:
             self.disabled = disabled
         self.response = response
+        self.budget = budget
 
     def send(self) -> None:
         """ Send query as HTTP request to BARTOC FAST API.
 
-        The response is saved to the response attribute.
+        The parsed response is saved to the response attribute. Responses are cached process-wide, and concurrent
+        queries with the same payload share a single request.
         """
 
         payload = self.get_payload()
-        try:
-            self.response = requests.get(url=FAST_API, params=payload)
-        except requests.exceptions.ConnectionError:
-            print(f"requests.exceptions.ConnectionError! Trying again in 5 seconds...")
-            sleep(5)
-            self.send()
+        self.response = _ResponseCache.get_default().get_or_fetch(payload, self.fetch)
+
+    def fetch(self, payload: Dict) -> Dict:
+        """ Fetch the parsed response for a payload from BARTOC FAST API.
+
+        :param payload: the payload of the query
+        """
+
+        return _Transport.get_default().fetch(payload, budget=self.budget)
 
     def dict2result(self, dictionary: dict) -> _Result:
         """ Transform a raw result into a result object.
@@ -121,9 +157,11 @@ class _Query:
 
         return result
 
-    def update_sources(self, session: Session) -> None:
+    def update_sources(self, session: Session) -> Dict[str, int]:
         """ Update the score vectors of a session's sources based on the query response.
 
+        Return the best score per source name for this query.
+
         :param session: the active session
         """
 
@@ -132,60 +170,108 @@ class _Query:
         results = response.get("results")
 
         if results is None:
-            return None
+            return dict()
 
-        for dictionary in results:
-            # transform raw result into object:
-            result = self.dict2result(dictionary)
-            # get source, add if new:
-            name = self.result2name(result)
-            source = session._get_source(name)
-            if source is None:
-                source = _Source(name)
-                session._add_source(source)
-            # update source's score vector:
-            source.levenshtein_vector.update_score(self.concept, result)
-
-    def result2name(self, result: _Result) -> str:
-        """ Return the source name based on the result.
-
-         :param result: a result
-         """
-        parsed_uri = urllib.parse.urlparse(result.uri)
-
-        # define (categories of) aggregated sources and split them accordingly:
-        if parsed_uri.netloc in ["bartoc-skosmos.unibas.ch", "data.ub.uio.no", "vocab.getty.edu"]:
-            return self.uri2name(parsed_uri, n=1)
-        elif parsed_uri.netloc in ["isl.ics.forth.gr", "linkeddata.ge.imati.cnr.it", "www.yso.fi"]:
-            return self.uri2name(parsed_uri, n=2)
-        elif parsed_uri.netloc in ["vocabs.ands.org.au"]:
-            return self.uri2name(parsed_uri, n=5)
-        else:
-            return parsed_uri.netloc
+        kept = self.score_results(self.concept.get_pref_label(), results, session._scorer)
 
-    def uri2name(self, parsed_uri: urllib.parse.ParseResult, n: int = 1) -> str:
-        """ Return the source name based on the parsed URI.
+        return self.apply_scores(session, kept)
 
-        The source name is a substring of the URI.
+    @classmethod
+    def score_results(cls, word: str, results: List[Dict], scorer: Scorer) -> Dict[str, Tuple[float, Dict]]:
+        """ Return the best distance and raw result per source name for a word.
+
+        The raw results are scored directly: duplicate results are skipped, and each distinct label and each distinct
+        set of labels is scored once. This method does not depend on the session, i.e., it can run in another
+        process (see :class:`bartocsuggest.pipeline._QueryPipeline`).
 
-        :param parsed_uri: the path
-        :param n: the number of identifying components on the path
+        :param word: the search word
+        :param results: the raw results of the query response
+        :param scorer: the scorer of the session
         """
 
-        path = parsed_uri.path
-        components = path.split("/")
-        name = parsed_uri.netloc
+        # collect the distinct labels and label sets:
+        labels = dict()
+        label_sets = dict()
+        candidates = []
+        seen = set()
+        for dictionary in results:
+            label_key = (dictionary.get("prefLabel"),
+                         dictionary.get("altLabel"),
+                         dictionary.get("hiddenLabel"),
+                         dictionary.get("definition"))  # i.e., relevant attributes
+            key = (dictionary.get("uri"), label_key)
+            if key in seen:
+                continue
+            seen.add(key)
+            if label_key not in label_sets:
+                positions = set()
+                for label_string in label_key:
+                    if label_string is None:
+                        continue
+                    # check if label_string has more than one language:
+                    for foundword in label_string.split(";"):
+                        positions.add(labels.setdefault(foundword.lower(), len(labels)))
+                label_sets.update({label_key: positions})
+            candidates.append((dictionary, label_key))
+
+        # score the word against all labels in one batch (memoized distances are reused):
+        distances = scorer.score_labels(word.lower(), list(labels))
+
+        # the score of a result is the minimum distance over all labels and languages:
+        values = dict()
+        for label_key, positions in label_sets.items():
+            label_distances = [distances.get(position) for position in positions if position in distances]
+            if len(label_distances) > 0:
+                values.update({label_key: min(label_distances)})
+
+        # keep the first best result per source:
+        kept = dict()
+        for dictionary, label_key in candidates:
+            value = values.get(label_key)
+            if value is None:
+                continue
+            name = _SourceResolver.get_default().resolve(dictionary.get("uri"))
+            if value < kept.get(name, (value + 1,))[0]:
+                kept.update({name: (value, dictionary)})
+
+        return kept
 
-        i = 1
-        while True:
-            if i > n:
-                break
-            else:
-                identifier = components[i]
-                name = name + f"/{identifier}"
-                i += 1
+    def apply_scores(self, session: Session, kept: Dict[str, Tuple[float, Dict]]) -> Dict[str, int]:
+        """ Update the score vectors of a session's sources with the best result per source.
 
-        return name
+        Return the best score per source name for this query. Result and score objects are only made for the best
+        result per source (i.e., the only one that can update the source's score vector).
+
+        :param session: the active session
+        :param kept: the best distance and raw result per source name (see :meth:`_Query.score_results`)
+        """
+
+        best = dict()
+
+        with session._lock:
+            # pruned sources only count words once:
+            first = True
+            if session._processed is not None:
+                word = self.concept.get_pref_label()
+                first = word not in session._processed
+                session._processed.add(word)
+            for name, (value, dictionary) in kept.items():
+                # get source, add if new:
+                source = session._get_source(name)
+                if source is None:
+                    source = _Source(name)
+                    session._add_source(source)
+                best.update({name: value})
+                if source._counters is not None:
+                    if first is True:
+                        source.count(value)
+                    continue
+                # update source's score vector:
+                source.levenshtein_vector.add_score(_Score(value=value,
+                                                           comparandum=self.concept,
+                                                           comparans=self.dict2result(dictionary)))
+
+        return best
 
     def get_payload(self) -> Dict:
         """ Return the payload (i.e., parameters passed in the URL) of the query. """
@@ -212,11 +298,11 @@ class _Query:
         if self.response is None:
             self.send()
             if verbose is True:
-                print(self.response.text)
-            return self.response.json()
+                _Utility.print_json(self.response)
+            return self.response
 
-        # response is cached:
-        elif self.response is requests.models.Response:
+        # response is an unparsed HTTP response:
+        elif not isinstance(self.response, dict):
             return self.response.json()
 
         # response is preloaded:
@@ -230,14 +316,13 @@ class _Query:
          :param json_object: the preloaded response
          """
 
-        # extract query parameters from json object:
-        context = json_object.get("@context")
-        url = context.get("results").get("@id")
-        parsed_url = urllib.parse.urlparse(url)
-        parsed_query = (urllib.parse.parse_qs(parsed_url.query))
-
         # make query object from instantiated parameters and json object:
         try:
+            # extract query parameters from json object:
+            context = json_object.get("@context")
+            url = context.get("results").get("@id")
+            parsed_url = urllib.parse.urlparse(url)
+            parsed_query = (urllib.parse.parse_qs(parsed_url.query))
             searchword = parsed_query.get("searchword")[0]
             maxsearchtime = parsed_query.get("maxsearchtime")[0]
             duplicates = parsed_query.get("duplicates")[0]
@@ -253,12 +338,410 @@ class _Query:
                            duplicates=duplicates,
                            disabled=disabled,
                            response=json_object)
-        except IndexError:
+        except (AttributeError, IndexError, TypeError):  # i.e., the response is malformed
             return None
 
         return query
 
 
+class _SourceResolver:
+    """ Resolves result URIs to source names.
+
+    The source name is the URI's host, except for hosts that aggregate several vocabularies: a rule consists of the
+    host followed by one "/*" per identifying path component. For example, the rule "www.yso.fi/*/*" resolves
+    http://www.yso.fi/onto/yso/p1234 to www.yso.fi/onto/yso. A rule's host may start with a wildcard label (e.g.,
+    "*.example.org/*"). Rules are compiled into a host index and a single pattern; resolved hosts are memoized.
+
+    :param rules: the rules for aggregated sources, defaults to AGGREGATED_SOURCES
+    :param memo_size: the maximum number of memoized hosts, defaults to 10000
+    """
+
+    _default = None
+
+    def __init__(self, rules: List[str] = None, memo_size: int = 10000) -> None:
+        if rules is None:
+            rules = AGGREGATED_SOURCES
+        self.rules = list(rules)
+        self.memo_size = memo_size
+        self._hosts = dict()
+        wildcards = []
+        for rule in self.rules:
+            host, _, components = rule.partition("/")
+            depth = len([component for component in components.split("/") if component == "*"])
+            if host.startswith("*."):
+                wildcards.append((host[2:], depth))
+            else:
+                self._hosts.update({host: depth})
+        self._pattern = None
+        if len(wildcards) > 0:
+            alternatives = "|".join(f"(?P<rule{position}>.*\\.{re.escape(host)})"
+                                    for position, (host, _) in enumerate(wildcards))
+            self._pattern = re.compile(f"^(?:{alternatives})$")
+            self._wildcard_depths = [depth for _, depth in wildcards]
+        self._memo = dict()
+
+    @classmethod
+    def get_default(cls) -> _SourceResolver:
+        """ Return the process-wide resolver (created from AGGREGATED_SOURCES on first use). """
+
+        if cls._default is None:
+            cls._default = _SourceResolver()
+
+        return cls._default
+
+    @classmethod
+    def set_default(cls, resolver: Optional[_SourceResolver]) -> None:
+        """ Set the process-wide resolver.
+
+        :param resolver: the resolver, None resets to a new resolver on next use
+        """
+
+        cls._default = resolver
+
+    def get_depth(self, host: str) -> int:
+        """ Return the number of identifying path components for a host.
+
+        :param host: the host
+        """
+
+        depth = self._memo.get(host)
+        if depth is not None:
+            return depth
+
+        depth = self._hosts.get(host, 0)
+        if host not in self._hosts and self._pattern is not None:
+            match = self._pattern.match(host)
+            if match is not None:
+                depth = self._wildcard_depths[int(match.lastgroup[4:])]
+
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[host] = depth
+
+        return depth
+
+    def resolve(self, uri: str) -> str:
+        """ Return the source name of a URI.
+
+        :param uri: the URI
+        """
+
+        # fall back on full parsing for URIs with query, fragment or without authority:
+        if "?" in uri or "#" in uri or "://" not in uri:
+            parsed_uri = urllib.parse.urlparse(uri)
+            host = parsed_uri.netloc
+            path = parsed_uri.path
+        else:
+            host, _, path = uri.partition("://")[2].partition("/")
+            path = "/" + path
+
+        depth = self.get_depth(host)
+        if depth == 0:
+            return host
+
+        components = path.split("/", depth + 1)[1:depth + 1]
+
+        return "/".join([host] + components)
+
+
+class _ResourceMonitor:
+    """ Adaptive selection of the BARTOC FAST resources that are disabled for a query.
+
+    During the warm-up, every resource except the statically disabled ones is queried. Afterwards, resources whose
+    sources have not produced a result within the sensitivity are disabled for the remaining queries. Every
+    reprobe-th query is sent with all resources enabled again so that a disabled resource can be reinstated.
+
+    BARTOC FAST does not tell which resource returned a result, so results are mapped to resources by the host of
+    their source. If a result within the sensitivity comes from a host that is not mapped to any resource, the
+    resource that returned it is unknown, and no resource is disabled.
+
+    :param sensitivity: the maximum Levenshtein distance for a result to count as productive
+    :param warmup: the number of queries sent before resources are disabled, defaults to 20
+    :param reprobe: send every reprobe-th query with all resources enabled, defaults to 50
+    :param resources: the resource names and the hosts of their sources, defaults to FAST_RESOURCES
+    :param disabled: the statically disabled resources, defaults to FAST_DISABLED
+    """
+
+    def __init__(self,
+                 sensitivity: int,
+                 warmup: int = 20,
+                 reprobe: int = 50,
+                 resources: Dict[str, List[str]] = None,
+                 disabled: List[str] = None) -> None:
+        self.sensitivity = sensitivity
+        self.warmup = warmup
+        self.reprobe = reprobe
+        if resources is None:
+            resources = FAST_RESOURCES
+        if disabled is None:
+            disabled = FAST_DISABLED
+        self.disabled = list(disabled)
+        self._hosts = dict()
+        for resource, hosts in resources.items():
+            if resource in self.disabled:
+                continue
+            for host in hosts:
+                self._hosts.update({host: resource})
+        self._productive = set()
+        self._counter = 0
+        self._lock = RLock()
+
+    def get_disabled(self) -> List[str]:
+        """ Return the disabled resources for the next query. """
+
+        with self._lock:
+            self._counter += 1
+            if self._counter <= self.warmup or self._counter % self.reprobe == 0:
+                return list(self.disabled)
+            unproductive = set(self._hosts.values()) - self._productive
+
+        return self.disabled + sorted(unproductive)
+
+    def observe(self, best: Dict[str, int]) -> None:
+        """ Record which resources produced results within the sensitivity.
+
+        :param best: the best score per source name as returned by :meth:`_Query.update_sources`
+        """
+
+        for name, value in best.items():
+            if value > self.sensitivity:
+                continue
+            resource = self._hosts.get(name.split("/")[0])
+            with self._lock:
+                if resource is None:  # i.e., any resource may have returned the result
+                    self._productive.update(self._hosts.values())
+                else:
+                    self._productive.add(resource)
+
+
+class _SourcePruner:
+    """ Pruning of the score vectors of sources that cannot enter the top vocabularies.
+
+    The final score of a source is bounded given its current matches within the sensitivity and the number of words
+    that remain to be fetched. A source is pruned if even its best possible score is worse than the worst possible
+    score of the top-k-th source. If the score vectors still need more than the memory budget, the sources with the
+    worst possible scores outside the current top-k are pruned as well.
+
+    A pruned source drops its score vector and keeps only counters (its coverage and score sum within the
+    sensitivity), so its ranking for this sensitivity stays exact while its concordance is no longer available.
+
+    :param sensitivity: the used sensitivity
+    :param score_type: the used score type
+    :param top_k: the number of top vocabularies whose score vectors are kept, defaults to 20
+    :param memory_budget: the approximate maximum size of all score vectors in bytes, defaults to None (i.e.,
+        only sources that cannot enter the top-k are pruned)
+    """
+
+    score_bytes = 800  # i.e., the approximate size of a score with its result
+
+    def __init__(self,
+                 sensitivity: int,
+                 score_type: ScoreType,
+                 top_k: int = 20,
+                 memory_budget: int = None) -> None:
+        self.sensitivity = sensitivity
+        self.score_type = score_type
+        self.top_k = top_k
+        self.memory_budget = memory_budget
+        self.pruned = 0
+
+    def get_bounds(self, coverage: int, score_sum: float, remaining: Optional[int]) -> Tuple[float, float]:
+        """ Return the lower and upper bound of a source's final score.
+
+        :param coverage: the source's current coverage within the sensitivity
+        :param score_sum: the source's current score sum within the sensitivity
+        :param remaining: the number of words that remain to be fetched (None if unknown)
+        """
+
+        if remaining is None:
+            remaining = float("inf")
+
+        if self.score_type is Sum:
+            return score_sum, score_sum + remaining * self.sensitivity
+        elif self.score_type is Average:
+            if coverage == 0:
+                return 0, self.sensitivity
+            elif remaining == float("inf"):
+                return 0, max(score_sum / coverage, self.sensitivity)
+            return score_sum / (coverage + remaining), max(score_sum / coverage,
+                                                           (score_sum + remaining * self.sensitivity) /
+                                                           (coverage + remaining))
+
+        # recall and coverage only depend on the coverage (the number of words is the same for all sources):
+        return coverage, coverage + remaining
+
+    def prune(self, session: Session, remaining: Optional[int], verbose: bool = False) -> int:
+        """ Prune the sources of a session and return the number of newly pruned sources.
+
+        :param session: the active session
+        :param remaining: the number of words that remain to be fetched (None if unknown)
+        :param verbose: toggle status updates along the way, defaults to False
+        """
+
+        high_to_low = self.score_type is Recall
+
+        with session._lock:
+            if session._processed is None:
+                session._processed = set()
+                for source in session._sources:
+                    session._processed.update(source.levenshtein_vector._index.keys())
+
+            bounds = dict()
+            qualified = []
+            for source in session._sources:
+                if source._counters is not None:
+                    continue
+                coverage, score_sum = source.get_counters(self.sensitivity)
+                bounds.update({source: self.get_bounds(coverage, score_sum, remaining)})
+                if coverage > 0:
+                    qualified.append(source)
+
+            # the k-th best guaranteed score among the sources that already qualify:
+            candidates = list(bounds)
+            if len(qualified) >= self.top_k:
+                if high_to_low is True:
+                    threshold = sorted((bounds[source][0] for source in qualified), reverse=True)[self.top_k - 1]
+                    candidates = [source for source in candidates if bounds[source][1] < threshold]
+                else:
+                    threshold = sorted(bounds[source][1] for source in qualified)[self.top_k - 1]
+                    candidates = [source for source in candidates if bounds[source][0] > threshold]
+            else:
+                candidates = []
+            pruned = set(candidates)
+
+            # prune further sources with the worst possible scores outside the top-k to meet the memory budget:
+            if self.memory_budget is not None:
+                size = sum(len(source.levenshtein_vector._vector) for source in bounds if source not in pruned)
+                size *= self.score_bytes
+                if size > self.memory_budget:
+                    if high_to_low is True:
+                        ranked = sorted(bounds, key=lambda source: bounds[source][0], reverse=True)
+                    else:
+                        ranked = sorted(bounds, key=lambda source: bounds[source][1])
+                    for source in reversed(ranked[self.top_k:]):
+                        if size <= self.memory_budget:
+                            break
+                        if source not in pruned:
+                            size -= len(source.levenshtein_vector._vector) * self.score_bytes
+                            pruned.add(source)
+
+            for source in pruned:
+                source.prune(self.sensitivity)
+
+        self.pruned += len(pruned)
+        if verbose is True and len(pruned) > 0:
+            print(f"{len(pruned)} sources pruned.")
+
+        return len(pruned)
+
+
+class _SourceSampler:
+    """ Early stopping of a suggestion once the order of the top vocabularies is statistically stable.
+
+    The words are fetched in random order. After every step, each source's recall over the sampled words gets a
+    Wilson score interval (see https://en.wikipedia.org/wiki/Binomial_proportion_confidence_interval); the intervals
+    hold simultaneously at the given confidence (Bonferroni correction over all sources and one unseen source). The
+    order of the top-k sources is stable if the interval of each of them lies strictly above the interval of the next
+    source, including any source without matches so far. Tied sources are never stable, i.e., all words are fetched.
+
+    :param sensitivity: the used sensitivity
+    :param confidence: the confidence level of the top-k order, defaults to 0.95
+    :param top_k: the number of top vocabularies whose order must be stable, defaults to 5
+    :param step: the number of words fetched between two checks, defaults to 50
+    """
+
+    def __init__(self,
+                 sensitivity: int,
+                 confidence: float = 0.95,
+                 top_k: int = 5,
+                 step: int = 50) -> None:
+        if not 0 < confidence < 1:
+            raise ValueError(f"Confidence {confidence} must be between 0 and 1!")
+
+        self.sensitivity = sensitivity
+        self.confidence = confidence
+        self.top_k = top_k
+        self.step = step
+        self.sampled = 0
+        self.achieved = None  # i.e., the confidence of the top-k order when sampling stopped
+
+    def shuffle(self, concepts: List[_Concept]) -> List[_Concept]:
+        """ Return the concepts in random order.
+
+        :param concepts: the concepts
+        """
+
+        from random import sample
+
+        return sample(concepts, len(concepts))
+
+    @classmethod
+    def get_interval(cls, coverage: int, sampled: int, z: float) -> Tuple[float, float]:
+        """ Return the Wilson score interval of a recall.
+
+        :param coverage: the number of sampled words matched by the source
+        :param sampled: the number of sampled words
+        :param z: the standard normal quantile of the confidence level
+        """
+
+        if sampled == 0:
+            return 0.0, 1.0
+
+        recall = coverage / sampled
+        denominator = 1 + z * z / sampled
+        center = (recall + z * z / (2 * sampled)) / denominator
+        margin = z * (recall * (1 - recall) / sampled + z * z / (4 * sampled * sampled)) ** 0.5 / denominator
+
+        return max(0.0, center - margin), min(1.0, center + margin)
+
+    def is_stable(self, coverages: List[int], sampled: int, confidence: float) -> bool:
+        """ Return whether the order of the top-k sources is stable at a confidence level.
+
+        :param coverages: the sources' coverages within the sensitivity
+        :param sampled: the number of sampled words
+        :param confidence: the confidence level
+        """
+
+        from statistics import NormalDist
+
+        ranked = sorted((coverage for coverage in coverages if coverage > 0), reverse=True)
+        if len(ranked) == 0:
+            return False
+        top_k = min(self.top_k, len(ranked))
+        ranked.append(0)  # i.e., an unseen source
+
+        z = NormalDist().inv_cdf(1 - (1 - confidence) / (2 * len(ranked)))
+        intervals = [self.get_interval(coverage, sampled, z) for coverage in ranked[:top_k + 1]]
+
+        return all(intervals[position][0] > intervals[position + 1][1] for position in range(top_k))
+
+    def stop(self, session: Session, sampled: int) -> bool:
+        """ Return whether sampling can stop, i.e., whether the top-k order is stable at the confidence level.
+
+        :param session: the active session
+        :param sampled: the number of sampled words
+        """
+
+        with session._lock:
+            coverages = [source.get_counters(self.sensitivity)[0] for source in session._sources]
+        self.sampled = sampled
+
+        if self.is_stable(coverages, sampled, self.confidence) is False:
+            return False
+
+        # the highest confidence at which the order is still stable:
+        low, high = self.confidence, 1.0
+        for _ in range(30):
+            middle = (low + high) / 2
+            if self.is_stable(coverages, sampled, middle) is True:
+                low = middle
+            else:
+                high = middle
+        self.achieved = round(low, 4)
+
+        return True
+
+
 class ScoreType:
     """ A score type.
 
@@ -325,28 +808,77 @@ class Sum(ScoreType):
         return "score_sum"
 
 
+SCORE_TYPES = {"Recall": Recall, "Average": Average, "Coverage": Coverage, "Sum": Sum}
+
+
 class Session:
     """ Vocabulary suggestion session using the BARTOC FAST API.
 
-    :param words: the input words (list of strings, or path to XLSX file, or JSKOS concept scheme)
+    Words given as any other iterable (e.g., a generator) are streamed: they are processed in chunks, and only the
+    best match per word and source is kept. Streamed words can be consumed only once.
+
+    :param words: the input words (list of strings, or path to XLSX, CSV, TSV, TXT, JSON or NDJSON file, or JSKOS
+        concept scheme, or any iterable of strings)
     :param preload_folder: the path to the preload folder, defaults to None
     :param language: the language of the words given as RFC 3066 language tag, defaults to "und" (for undefined)
+    :param chunk_size: the number of words fetched and scored at a time, defaults to 1000
+    :param scorer: the scorer comparing words and results, defaults to None (i.e.,
+        :class:`bartocsuggest.LevenshteinScorer`)
     """
 
     def __init__(self,
-                 words: Union[List[str], str, _ConceptScheme],
+                 words: Union[List[str], str, _ConceptScheme, Iterable[str]],
                  preload_folder: str = None,
-                 language: str = "und") -> None:
+                 language: str = "und",
+                 chunk_size: int = 1000,
+                 scorer: Scorer = None) -> None:
+        self._init_defaults(language, chunk_size)
         self._scheme = self._set_input(words, language)
+        self._setup(preload_folder, scorer)
+
+    def _init_defaults(self, language: str = "und", chunk_size: int = 1000) -> None:
+        """ Set the session's input attributes to their defaults (before the input is set).
+
+        :param language: the language of the words given as RFC 3066 language tag, defaults to "und"
+        :param chunk_size: the number of words fetched and scored at a time, defaults to 1000
+        """
+
+        self._language = language
+        self._chunk_size = chunk_size
+        self._stream = None
+        self._streamed = 0
+        self._stream_size = None  # i.e., the number of streamed words, if known in advance
+
+    def _setup(self, preload_folder: str = None, scorer: Scorer = None) -> None:
+        """ Set up the session's state.
+
+        :param preload_folder: the path to the preload folder, defaults to None
+        :param scorer: the scorer comparing words and results, defaults to None (i.e., Levenshtein distance)
+        """
+
         self._preload_folder = preload_folder
+        self._scorer = scorer or LevenshteinScorer()
         self._sources = []
-
-    def _set_input(self, words: Union[list, str, _ConceptScheme], language) -> _ConceptScheme:
+        self._source_index = dict()
+        self._processed = None  # i.e., the words counted by pruned sources
+        self._shard = None
+        self._lock = RLock()
+        self._sensitivity = 1
+        self._score_type = Recall
+        self._retry_budget = _RetryBudget()
+        self._failed = []  # i.e., the concepts that could not be fetched
+        self._failed_error = None
+        self._deadline = None  # i.e., the time (see time.monotonic) by which the fetching must end
+
+    def _set_input(self, words: Union[list, str, _ConceptScheme, Iterable[str]], language) -> _ConceptScheme:
         """ Set words as JSKOS concept scheme.
 
-        If the words are not yet a JSKOS concept scheme, they are transformed into one.
+        If the words are not yet a JSKOS concept scheme, they are transformed into one. Words given as any other
+        iterable are streamed, i.e., the concept scheme stays empty and the words are turned into concepts when
+        fetched.
 
-        :param words: the input words (list of strings, or path to XLSX file, or JSKOS concept scheme)
+        :param words: the input words (list of strings, or path to a supported file, or JSKOS concept scheme, or any
+            iterable of strings)
         :param language: the language of the words given as RFC 3066 language tag, defaults to "und"
         """
 
@@ -354,19 +886,121 @@ class Session:
             scheme = _Utility.words2scheme(words=words, language=language)
         elif type(words) is _ConceptScheme:
             scheme = words
+        elif type(words) is str:
+            scheme = _Utility.load_file(words, language)
         else:
-            scheme = _Utility.load_file(words)
+            self._stream = iter(words)
+            print(f"Streaming words from {words} in chunks of {self._chunk_size}.")
+            return _Utility.words2scheme(words=[], language=language)
 
         print(f"{words} loaded successfully, {len(scheme.concepts)} words detected.")
         return scheme
 
+    def _iter_concepts(self) -> Iterator[_Concept]:
+        """ Yield the input concepts.
+
+        Streamed words are consumed and turned into concepts on the fly.
+        """
+
+        yield from self._scheme.concepts
+
+        if self._stream is not None:
+            stream = self._stream
+            self._stream = None
+            # the notation is the position in the whole stream, i.e., the same in every shard:
+            for position, word in enumerate(stream, start=len(self._scheme.concepts) + 1):
+                if self._in_shard(word) is False:
+                    continue
+                self._streamed += 1
+                yield _Utility.word2concept(word=word,
+                                            scheme_uri=self._scheme.uri,
+                                            language=self._language,
+                                            notation=str(position))
+
+    def _set_shard(self, shard: int, shards: int) -> None:
+        """ Restrict the session to the words of a shard.
+
+        Words are assigned to shards by a stable hash, i.e., the same word is always in the same shard.
+
+        :param shard: the shard (from 0 to shards - 1)
+        :param shards: the number of shards
+        """
+
+        if not 0 <= shard < shards:
+            raise ValueError(f"Shard {shard} must be between 0 and {shards - 1}!")
+
+        with self._lock:
+            self._shard = (shard, shards)
+            self._scheme.concepts = [concept for concept in self._scheme.concepts
+                                     if self._in_shard(concept.get_pref_label()) is True]
+
+    def _in_shard(self, word: str) -> bool:
+        """ Return whether a word belongs to the session's shard (always True without shard).
+
+        :param word: the word
+        """
+
+        if self._shard is None:
+            return True
+
+        return crc32(word.encode("utf-8")) % self._shard[1] == self._shard[0]
+
+    def _merge(self, other: Session) -> None:
+        """ Merge the scored state of another session (e.g., of another shard) into this session.
+
+        The sessions MUST have disjoint words and the same scorer.
+
+        :param other: the other session
+        """
+
+        if str(self._scorer) != str(other._scorer):
+            raise ValueError(f"Cannot merge sessions with scorers {self._scorer} and {other._scorer}!")
+
+        with self._lock:
+            for other_source in other._sources:
+                source = self._get_source(other_source.uri)
+                if source is None:
+                    self._add_source(other_source)
+                else:
+                    source.merge(other_source)
+
+            # pruned sources only count words once:
+            if any(source._counters is not None for source in self._sources):
+                processed = set(concept.get_pref_label() for concept in self._scheme.concepts)
+                processed.update(concept.get_pref_label() for concept in other._scheme.concepts)
+                self._processed = processed | (self._processed or set()) | (other._processed or set())
+
+            self._scheme.concepts.extend(other._scheme.concepts)
+            self._streamed += other._streamed
+
+    def _get_total(self, maximum: int = None) -> Optional[int]:
+        """ Return the number of words to be fetched (None if words are streamed and their number is unknown).
+
+        :param maximum: the maximum number of words fetched, defaults to None (i.e., no maximum)
+        """
+
+        total = len(self._scheme.concepts)
+        if self._stream is not None:
+            if self._stream_size is None:
+                return None
+            total += self._stream_size
+
+        return total if maximum is None else min(total, maximum)
+
+    def _get_word_count(self) -> int:
+        """ Return the number of input words (streamed words are counted once consumed). """
+
+        return len(self._scheme.concepts) + self._streamed
+
     def _add_source(self, source: _Source) -> None:
         """ Add a source to the session.
 
          :param source: the source to be added
          """
 
-        self._sources.append(source)
+        with self._lock:
+            self._sources.append(source)
+            self._source_index.update({source.uri: source})
 
     def _get_source(self, uri: str) -> Optional[_Source]:
         """ Return source by URI.
@@ -374,17 +1008,26 @@ class Session:
          :param uri: the URI
          """
 
-        for source in self._sources:
-            if uri == source.uri:
-                return source
-
-        return None
-
-    def _fetch_and_update(self, remote: bool = True, maximum: int = 100000, verbose: bool = False) -> None:
+        return self._source_index.get(uri)
+
+    def _fetch_and_update(self,
+                          remote: bool = True,
+                          maximum: int = 100000,
+                          monitor: _ResourceMonitor = None,
+                          workers: int = 1,
+                          processes: int = 0,
+                          pruner: _SourcePruner = None,
+                          sampler: _SourceSampler = None,
+                          verbose: bool = False) -> None:
         """ Fetch query responses and update sources.
 
         :param remote: toggle fetching responses from BARTOC FAST or preload folder, defaults to True
         :param maximum: the maximum number of responses fetched, defualts to 10000
+        :param monitor: adaptively disable unproductive resources (remote only), defaults to None
+        :param workers: the number of concurrent queries (remote only), defaults to 1
+        :param processes: the number of processes scoring responses (remote only), defaults to 0
+        :param pruner: prune the sources after each chunk (remote only), defaults to None
+        :param sampler: fetch the words in random order and stop early (remote only), defaults to None
         :param verbose: toggle status updates along the way, defaults to False
         """
 
@@ -398,59 +1041,244 @@ class Session:
             while True:
                 if counter > maximum:  # debug
                     break
+                self._check_deadline()
                 try:
                     filename = f"query_{counter}"
                     json_object = _Utility.load_json(self._preload_folder, filename)
                     query = _Query.make_query_from_json(json_object)
-                    query.update_sources(self)
-                    counter += 1
                 except FileNotFoundError:
                     break
+                except ValueError:  # i.e., the file is not valid JSON
+                    query = None
+                counter += 1
+                if query is None:
+                    print(f"ERROR: Preloaded response {filename} is malformed and skipped!")
+                elif self._in_shard(query.searchword) is True:
+                    query.update_sources(self)
 
-        # fetch from remote:
+        # fetch from remote chunk by chunk:
         else:
-            for concept in self._scheme.concepts:
-                if counter > maximum:  # debug
-                    break
-                if verbose is True:
-                    searchword = concept.get_pref_label()
-                    print(f"Fetching '{searchword}'...", end=" ")
-                query = _Query(concept=concept)
-                query.update_sources(self)
-                counter += 1
-                if verbose is True:
-                    print("done.")
+            failed = len(self._failed)
+            pipeline = None
+            if workers > 1 or processes > 0:
+                from .pipeline import _QueryPipeline
+
+                pipeline = _QueryPipeline(self, workers=workers, processes=processes)
+
+            total = self._get_total(maximum + 1)
+            concepts = islice(self._iter_concepts(), maximum + 1)
+            chunk_size = self._chunk_size
+            if sampler is not None:
+                chunk_size = min(chunk_size, sampler.step)
+                # streamed words are sampled in the order they arrive:
+                if total is not None:
+                    concepts = iter(sampler.shuffle(list(concepts)))
+            try:
+                while True:
+                    chunk = list(islice(concepts, chunk_size))
+                    if len(chunk) == 0:
+                        break
+                    self._fetch_chunk(chunk, monitor, pipeline, verbose)
+                    counter += len(chunk)
+                    if verbose is True:
+                        print(f"{counter} words processed.")
+                    if pruner is not None:
+                        pruner.prune(self, None if total is None else total - counter, verbose)
+                    if sampler is not None and sampler.stop(self, counter) is True:
+                        if verbose is True:
+                            print(f"Top vocabularies stable after {counter} words (confidence {sampler.achieved}).")
+                        break
+            finally:
+                if pipeline is not None:
+                    pipeline.shutdown()
+            self._report_failed(failed)
 
         if verbose is True:
             print("Responses collected.")
 
-    def _update_rankings(self, sensitivity: int, verbose: bool = False):
+    def _fetch_chunk(self,
+                     chunk: List[_Concept],
+                     monitor: _ResourceMonitor = None,
+                     pipeline: _QueryPipeline = None,
+                     verbose: bool = False) -> Set[str]:
+        """ Query BARTOC FAST for a chunk of concepts and update sources.
+
+        Return the URIs of the updated sources.
+
+        :param chunk: the concepts
+        :param monitor: adaptively disable unproductive resources, defaults to None
+        :param pipeline: the pipeline for concurrent queries, defaults to None
+        :param verbose: toggle status updates along the way, defaults to False
+        """
+
+        # fetch in parallel:
+        if pipeline is not None:
+            return pipeline.run(chunk, monitor, verbose)
+
+        updated = set()
+
+        for concept in chunk:
+            if verbose is True:
+                searchword = concept.get_pref_label()
+                print(f"Fetching '{searchword}'...", end=" ")
+            updated.update(self._fetch_concept(concept, monitor).keys())
+            if verbose is True:
+                print("done.")
+
+        return updated
+
+    def _fetch_concept(self, concept: _Concept, monitor: _ResourceMonitor = None) -> Dict[str, int]:
+        """ Query BARTOC FAST for a concept and update sources.
+
+        Return the best score per source URI for this concept. Concepts that cannot be fetched from BARTOC FAST (see
+        :class:`bartocsuggest.transport._Transport`) are kept for :meth:`bartocsuggest.Session.retry_failed`.
+
+        :param concept: the concept
+        :param monitor: adaptively disable unproductive resources, defaults to None
+        """
+
+        self._check_deadline()
+        try:
+            if monitor is None:
+                query = _Query(concept=concept, budget=self._retry_budget)
+                return query.update_sources(self)
+            else:
+                query = _Query(concept=concept, disabled=monitor.get_disabled(), budget=self._retry_budget)
+                best = query.update_sources(self)
+                monitor.observe(best)
+                return best
+        except _TransportError as error:
+            self._add_failed(concept, error)
+            return dict()
+
+    def _check_deadline(self) -> None:
+        """ Raise TimeoutError if the deadline of the running suggestion has passed. """
+
+        if self._deadline is not None and monotonic() > self._deadline:
+            raise TimeoutError("The deadline of the suggestion has passed!")
+
+    def _add_failed(self, concept: _Concept, error: _TransportError) -> None:
+        """ Keep a concept that could not be fetched for :meth:`bartocsuggest.Session.retry_failed`.
+
+        :param concept: the concept
+        :param error: the error
+        """
+
+        with self._lock:
+            self._failed.append(concept)
+            self._failed_error = str(error)
+
+    def _report_failed(self, failed: int) -> None:
+        """ Print an error if words could not be fetched.
+
+        :param failed: the number of words that could not be fetched before
+        """
+
+        if len(self._failed) > failed:
+            print(f"ERROR: {len(self._failed) - failed} words could not be fetched: {self._failed_error} Retry them"
+                  f" with Session.retry_failed!")
+
+    def _fetch_from_index(self,
+                          index: _LabelIndex,
+                          sensitivity: int,
+                          pruner: _SourcePruner = None,
+                          verbose: bool = False) -> None:
+        """ Update sources with the matches found in an offline label index instead of BARTOC FAST.
+
+        :param index: the label index
+        :param sensitivity: the used sensitivity
+        :param pruner: prune the sources after each chunk, defaults to None
+        :param verbose: toggle status updates along the way, defaults to False
+        """
+
+        if verbose is True:
+            print(f"Searching offline index...")
+
+        counter = 0
+        total = self._get_total()
+        concepts = self._iter_concepts()
+        while True:
+            self._check_deadline()
+            chunk = list(islice(concepts, self._chunk_size))
+            if len(chunk) == 0:
+                break
+            words = [concept.get_pref_label() for concept in chunk]
+            # the BK-tree is searched for Levenshtein distances, all other scorers score the labels in batches:
+            if type(self._scorer) is LevenshteinScorer:
+                matches = [index.search(word, sensitivity) for word in words]
+            else:
+                matches = index.search_batch(words, self._scorer, sensitivity)
+            for concept, results in zip(chunk, matches):
+                _Query(concept=concept, response={"results": results}).update_sources(self)
+            counter += len(chunk)
+            if pruner is not None:
+                pruner.prune(self, None if total is None else total - counter, verbose)
+
+        if verbose is True:
+            print(f"{counter} words searched.")
+
+    def _update_rankings(self, sensitivity: int, verbose: bool = False, word_count: int = None):
         """ Update the sources' rankings.
 
         :param sensitivity: the used sensitivity
         :param verbose: toggle status updates along the way, defaults to False
+        :param word_count: the number of words the recall is based on, defaults to None (i.e., all input words)
         """
 
         if verbose is True:
             print("Updating source rankings...")
 
-        for source in self._sources:
-            source.update_ranking(self, sensitivity, verbose)
+        with self._lock:
+            for source in self._sources:
+                if word_count is None:
+                    source.update_ranking(self, sensitivity, verbose)
+                else:
+                    source.rank(word_count, sensitivity)
 
         if verbose is True:
             print("Source rankings updated.")
 
-    def _make_suggestion(self, sensitivity: int, score_type: ScoreType, verbose: bool = False) -> Suggestion:
+    def _make_suggestion(self,
+                         sensitivity: int,
+                         score_type: ScoreType,
+                         verbose: bool = False,
+                         sampler: _SourceSampler = None) -> Suggestion:
         """ Return sources from best to worst base on score type.
 
         :param sensitivity: the used sensitivity
         :param score_type: the used score type
         :param verbose: toggle status updates along the way, defaults to False
+        :param sampler: the sampler of a sampled suggestion, defaults to None
         """
 
         if verbose is True:
             print("Calculating suggestions...", end=" ")
 
+        with self._lock:
+            sources = list(self._sources)
+        contenders = self._sort_sources(sources, score_type)
+
+        suggestion = Suggestion(self._scheme, contenders, sensitivity, score_type)
+        suggestion._candidates = sources
+        suggestion._word_count = self._get_word_count()
+        if sampler is not None:
+            suggestion._word_count = suggestion._sample_size = sampler.sampled
+            suggestion._confidence = sampler.achieved
+
+        if verbose is True:
+            print("calculated.")
+            suggestion.print()
+
+        return suggestion
+
+    @classmethod
+    def _sort_sources(cls, sources: List[_Source], score_type: ScoreType) -> List[_Source]:
+        """ Return the ranked sources from best to worst based on score type (sources without score are excluded).
+
+        :param sources: the ranked sources
+        :param score_type: the used score type
+        """
+
         # determine sorting direction:
         high_to_low = False
         if score_type is Recall:
@@ -459,20 +1287,14 @@ class Session:
         # sort sources by score type:
         contenders = []
         disqualified = []
-        for source in self._sources:
+        for source in sources:
             if getattr(source.ranking, score_type.__str__()) is None:
                 disqualified.append(source)
             else:
                 contenders.append(source)
         contenders.sort(key=lambda x: getattr(x.ranking, score_type.__str__()), reverse=high_to_low)
 
-        suggestion = Suggestion(self._scheme, contenders, sensitivity, score_type)
-
-        if verbose is True:
-            print("calculated.")
-            suggestion.print()
-
-        return suggestion
+        return contenders
 
     def preload(self,
                 max: int = 100000,
@@ -497,7 +1319,7 @@ class Session:
 
         counter = 0
 
-        for concept in self._scheme.concepts:
+        for concept in self._iter_concepts():
 
             if counter > max:  # debug
                 break
@@ -508,7 +1330,12 @@ class Session:
             if verbose is True:
                 searchword = concept.get_pref_label()
                 print(f"Preloading word number {counter + 1} '{searchword}'...", end=" ")
-            _Utility.save_json(_Query(concept=concept).get_response(), self._preload_folder, f"query_{counter}")
+            try:
+                response = _Query(concept=concept, budget=self._retry_budget).get_response()
+            except _TransportError as error:
+                print(f"ERROR: {error} Resume with Session.preload(min={counter})!")
+                return None
+            _Utility.save_json(response, self._preload_folder, f"query_{counter}")
             counter += 1
             if verbose is True:
                 print(f"done.")
@@ -520,20 +1347,397 @@ class Session:
                 remote: bool = True,
                 sensitivity: int = 1,
                 score_type: ScoreType = Recall,
+                adaptive: bool = False,
+                warmup: int = 20,
+                reprobe: int = 50,
+                workers: int = 1,
+                processes: int = 0,
+                offline_index: Union[str, _LabelIndex] = None,
+                top_k: int = None,
+                memory_budget: int = None,
+                shard: int = None,
+                shards: int = None,
+                mode: str = "full",
+                confidence: float = 0.95,
+                sample_top_k: int = 5,
+                deadline: float = None,
                 verbose: bool = False) -> Suggestion:
         """ Suggest vocabularies based on :attr:`self.words`.
 
+        In adaptive mode, BARTOC FAST resources that have not produced any result within the sensitivity after the
+        first warmup words are disabled for the remaining queries; every reprobe-th query is sent to all resources.
+        The resource names and the hosts of their sources are set in ``bartocsuggest.FAST_RESOURCES``.
+
+        With an offline index (see :mod:`bartocsuggest.index`), words are matched against the labels of previously
+        fetched responses instead of querying BARTOC FAST.
+
+        With top_k or memory_budget, the score vectors of sources that cannot enter the top-k vocabularies are
+        pruned along the way (see :class:`_SourcePruner`); if needed to meet the memory budget, further sources
+        outside the current top-k are pruned. Pruned sources keep their exact ranking for this sensitivity, but
+        their concordances are no longer available and they are excluded from suggestions with another sensitivity.
+
+        In shard mode, only the words of one of several shards are fetched (e.g., on several machines). Save the
+        state of each shard with :meth:`bartocsuggest.Session.save_state` and merge the saved states with
+        :meth:`bartocsuggest.Session.merge_states` into the exact suggestion over all words.
+
+        In sample mode, the words are queried in random order until the order of the top sample_top_k vocabularies
+        is stable at the given confidence (see :class:`_SourceSampler`). The recall of each vocabulary is
+        then estimated from the sampled words; the suggestion reports the number of sampled words and the achieved
+        confidence. Sampling requires the score type :class:`bartocsuggest.Recall`, the only score type whose value
+        over the sampled words estimates its value over all words; streamed words are sampled in the order they
+        arrive.
+
+        Failed requests to BARTOC FAST are retried with backoff within the retry budget of the session (see
+        :class:`bartocsuggest.transport._Transport`). Words that still cannot be fetched (e.g., during an outage) are
+        skipped and reported; query them again with :meth:`bartocsuggest.Session.retry_failed`.
+
         :param remote: toggle between remote BARTOC FAST querying and preload folder, defaults to True
-        :param sensitivity: set the maximum allowed Levenshtein distance between word and result, defaults to 1
+        :param sensitivity: set the maximum allowed distance between word and result (in the units of the session's
+            scorer, i.e., the Levenshtein distance by default), defaults to 1
         :param score_type: set the score type on which the suggestion is based, defaults to :class:`bartocsuggest.Recall`
+        :param adaptive: toggle adaptively disabling unproductive resources (remote only), defaults to False
+        :param warmup: the number of words queried before resources are disabled, defaults to 20
+        :param reprobe: send every reprobe-th query to all resources, defaults to 50
+        :param workers: the number of concurrent queries (remote only), defaults to 1
+        :param processes: the number of processes scoring the responses while they are fetched (remote only),
+            defaults to 0 (i.e., the querying threads score the responses)
+        :param offline_index: the label index or the path to a saved label index, defaults to None
+        :param top_k: the number of top vocabularies whose score vectors are kept, defaults to None (i.e., all, or
+            20 if a memory budget is set)
+        :param memory_budget: the approximate maximum size of all score vectors in bytes, defaults to None
+        :param shard: the shard of the words fetched by this session (from 0 to shards - 1), defaults to None
+        :param shards: the number of shards, defaults to None
+        :param mode: "full" (query all words) or "sample" (stop once the top sample_top_k order is stable, remote
+            only), defaults to "full"
+        :param confidence: the confidence level of the top-k order in sample mode, defaults to 0.95
+        :param sample_top_k: the number of top vocabularies whose order must be stable in sample mode (unlike top_k,
+            it does not prune sources), defaults to 5
+        :param deadline: the time (see time.monotonic) after which no further words are fetched and TimeoutError is
+            raised, defaults to None (i.e., no deadline)
         :param verbose: toggle running comment printed to console, defaults to False
         """
-        self._fetch_and_update(remote=remote, verbose=verbose)
-        self._update_rankings(sensitivity=sensitivity, verbose=verbose)
-        suggestion = self._make_suggestion(sensitivity=sensitivity, score_type=score_type, verbose=verbose)
+
+        if mode not in ["full", "sample"]:
+            raise ValueError(f"Mode {mode} must be 'full' or 'sample'!")
+        if mode == "sample" and score_type is not Recall:
+            raise ValueError(f"Sampling requires the score type Recall, not {score_type.__name__}!")
+        if shard is not None:
+            self._set_shard(shard, shards)
+
+        sampler = None
+        if mode == "sample":
+            if remote is False or offline_index is not None:
+                print("Sampling is only supported when querying BARTOC FAST, all words are used.")
+            else:
+                sampler = _SourceSampler(sensitivity=sensitivity, confidence=confidence, top_k=sample_top_k)
+
+        monitor = None
+        if adaptive is True:
+            monitor = _ResourceMonitor(sensitivity=sensitivity, warmup=warmup, reprobe=reprobe)
+
+        pruner = None
+        if top_k is not None or memory_budget is not None:
+            pruner = _SourcePruner(sensitivity=sensitivity,
+                                   score_type=score_type,
+                                   top_k=top_k or 20,
+                                   memory_budget=memory_budget)
+
+        self._deadline = deadline
+        try:
+            if offline_index is not None:
+                from .index import _LabelIndex
+
+                self._fetch_from_index(_LabelIndex.get_index(offline_index), sensitivity, pruner=pruner,
+                                       verbose=verbose)
+            else:
+                self._fetch_and_update(remote=remote,
+                                       monitor=monitor,
+                                       workers=workers,
+                                       processes=processes,
+                                       pruner=pruner,
+                                       sampler=sampler,
+                                       verbose=verbose)
+        finally:
+            self._deadline = None
+
+        word_count = None
+        if sampler is not None:
+            word_count = sampler.sampled
+            if sampler.achieved is None:  # i.e., all words were queried
+                sampler.achieved = 1.0
+        self._update_rankings(sensitivity=sensitivity, verbose=verbose, word_count=word_count)
+        suggestion = self._make_suggestion(sensitivity=sensitivity,
+                                           score_type=score_type,
+                                           verbose=verbose,
+                                           sampler=sampler)
+        self._sensitivity = sensitivity
+        self._score_type = score_type
 
         return suggestion
 
+    def add_words(self,
+                  words: List[str],
+                  sensitivity: int = None,
+                  score_type: ScoreType = None,
+                  workers: int = 1,
+                  verbose: bool = False) -> Suggestion:
+        """ Add words to the session and return the updated suggestion.
+
+        Only the new words are queried; only the rankings of sources with new matches are recalculated.
+        Words already in the session are skipped.
+
+        :param words: the words to be added
+        :param sensitivity: set the maximum allowed Levenshtein distance between word and result, defaults to None
+            (i.e., the sensitivity of the last suggestion)
+        :param score_type: set the score type on which the suggestion is based, defaults to None (i.e., the score
+            type of the last suggestion)
+        :param workers: the number of concurrent queries, defaults to 1
+        :param verbose: toggle running comment printed to console, defaults to False
+        """
+
+        existing = set(concept.get_pref_label() for concept in self._scheme.concepts)
+        concepts = []
+        for word in dict.fromkeys(words):
+            if word in existing:
+                continue
+            notation = str(self._get_word_count() + len(concepts) + 1)
+            concepts.append(_Utility.word2concept(word=word,
+                                                  scheme_uri=self._scheme.uri,
+                                                  language=self._language,
+                                                  notation=notation))
+
+        pipeline = None
+        if workers > 1:
+            from .pipeline import _QueryPipeline
+
+            pipeline = _QueryPipeline(self, workers=workers)
+        failed = len(self._failed)
+        try:
+            updated = self._fetch_chunk(concepts, pipeline=pipeline, verbose=verbose)
+        finally:
+            if pipeline is not None:
+                pipeline.shutdown()
+        self._report_failed(failed)
+
+        with self._lock:
+            self._scheme.concepts.extend(concepts)
+
+        if verbose is True:
+            print(f"{len(concepts)} words added.")
+
+        return self._update_suggestion(updated, sensitivity, score_type, verbose)
+
+    def retry_failed(self,
+                     sensitivity: int = None,
+                     score_type: ScoreType = None,
+                     workers: int = 1,
+                     verbose: bool = False) -> Suggestion:
+        """ Query the words that could not be fetched from BARTOC FAST again and return the updated suggestion.
+
+        Words that fail again are kept for the next retry. The retry budget of the session is renewed.
+
+        :param sensitivity: set the maximum allowed Levenshtein distance between word and result, defaults to None
+            (i.e., the sensitivity of the last suggestion)
+        :param score_type: set the score type on which the suggestion is based, defaults to None (i.e., the score
+            type of the last suggestion)
+        :param workers: the number of concurrent queries, defaults to 1
+        :param verbose: toggle running comment printed to console, defaults to False
+        """
+
+        with self._lock:
+            concepts, self._failed = self._failed, []
+        self._retry_budget = _RetryBudget(self._retry_budget.retries)
+
+        pipeline = None
+        if workers > 1:
+            from .pipeline import _QueryPipeline
+
+            pipeline = _QueryPipeline(self, workers=workers)
+        try:
+            updated = self._fetch_chunk(concepts, pipeline=pipeline, verbose=verbose)
+        finally:
+            if pipeline is not None:
+                pipeline.shutdown()
+
+        self._report_failed(0)
+        if verbose is True:
+            print(f"{len(concepts) - len(self._failed)} words fetched.")
+
+        return self._update_suggestion(updated, sensitivity, score_type, verbose)
+
+    def remove_words(self,
+                     words: List[str],
+                     sensitivity: int = None,
+                     score_type: ScoreType = None,
+                     verbose: bool = False) -> Suggestion:
+        """ Remove words from the session and return the updated suggestion.
+
+        The matches of the removed words are retracted from the sources; only the rankings of sources that lost
+        matches are recalculated. Streamed words cannot be removed, and neither can the matches counted by pruned
+        sources (see the top_k parameter of :meth:`bartocsuggest.Session.suggest`).
+
+        :param words: the words to be removed
+        :param sensitivity: set the maximum allowed Levenshtein distance between word and result, defaults to None
+            (i.e., the sensitivity of the last suggestion)
+        :param score_type: set the score type on which the suggestion is based, defaults to None (i.e., the score
+            type of the last suggestion)
+        :param verbose: toggle running comment printed to console, defaults to False
+        """
+
+        words = set(words)
+        updated = set()
+
+        with self._lock:
+            # streamed words are skipped, i.e., only the words of the concept scheme are retracted:
+            concepts = [concept for concept in self._scheme.concepts if concept.get_pref_label() not in words]
+            words = words & set(concept.get_pref_label() for concept in self._scheme.concepts)
+            removed = len(self._scheme.concepts) - len(concepts)
+            self._scheme.concepts = concepts
+            for source in self._sources:
+                for word in words:
+                    if source.levenshtein_vector.remove_score(word) is not None:
+                        updated.add(source.uri)
+            # pruned sources have no score vector but keep their counters:
+            self._sources = [source for source in self._sources
+                             if source.levenshtein_vector.get_vector() is not None or source._counters is not None]
+            self._source_index = {source.uri: source for source in self._sources}
+
+        if verbose is True:
+            print(f"{removed} words removed.")
+
+        return self._update_suggestion(updated, sensitivity, score_type, verbose)
+
+    def rerank(self,
+               sensitivity: int = None,
+               score_type: ScoreType = None,
+               verbose: bool = False) -> Suggestion:
+        """ Return the suggestion based on the responses collected so far without querying BARTOC FAST.
+
+        Use this method to change the sensitivity or score type of a suggestion, or to get the suggestion of a
+        session loaded with :meth:`bartocsuggest.Session.load_state`.
+
+        :param sensitivity: set the maximum allowed Levenshtein distance between word and result, defaults to None
+            (i.e., the sensitivity of the last suggestion)
+        :param score_type: set the score type on which the suggestion is based, defaults to None (i.e., the score
+            type of the last suggestion)
+        :param verbose: toggle running comment printed to console, defaults to False
+        """
+
+        return self._update_suggestion(set(), sensitivity, score_type, verbose)
+
+    def save_state(self, filename: str) -> None:
+        """ Save the scored state of the session for a warm restart.
+
+        The words, the sources and their best scores per word, and the sensitivity and score type of the last
+        suggestion are saved in a compact binary format, see :mod:`bartocsuggest.state`. Unlike preloaded
+        responses, the state does not need to be parsed and scored again when loaded.
+
+        :param filename: the name of the file including its complete path
+        """
+
+        from .state import _SessionState
+
+        _SessionState.save(self, filename)
+
+    def export_matrix(self,
+                      filename: str,
+                      format: str = None,
+                      sensitivity: float = None,
+                      batch_size: int = 65536) -> Optional[int]:
+        """ Export the best distance per word and source as Parquet or Arrow file and return the number of rows.
+
+        Each row holds the word, the source, the best distance, the matched label and the URI of the matched
+        result, see :mod:`bartocsuggest.matrix`. The rows are written in batches directly from the session's state.
+        Requires the optional pyarrow module (``pip install bartocsuggest[arrow]``).
+
+        :param filename: the name of the file including its complete path
+        :param format: "parquet" or "arrow", defaults to None (i.e., by the file extension, else "parquet")
+        :param sensitivity: only export distances within the sensitivity, defaults to None (i.e., all distances)
+        :param batch_size: the number of rows per record batch, defaults to 65536
+        """
+
+        from .matrix import _DistanceMatrix
+
+        return _DistanceMatrix.write(self, filename, format=format, sensitivity=sensitivity, batch_size=batch_size)
+
+    @classmethod
+    def merge_states(cls, filenames: List[str], preload_folder: str = None) -> Session:
+        """ Return a session merged from the states of several shards.
+
+        Each shard's state is saved with :meth:`bartocsuggest.Session.save_state` after
+        ``session.suggest(shard=i, shards=n)``. The merged rankings and concordances are exactly those of a single
+        session over all words. Use :meth:`bartocsuggest.Session.rerank` to get the merged suggestion.
+
+        :param filenames: the names of the state files including their complete paths
+        :param preload_folder: the path to the preload folder, defaults to None
+        """
+
+        session = cls.load_state(filenames[0], preload_folder=preload_folder)
+        for filename in filenames[1:]:
+            session._merge(cls.load_state(filename))
+
+        def get_position(concept: _Concept) -> int:
+            return int(concept.notation[0]) if concept.notation and concept.notation[0].isdigit() else 0
+
+        # restore the original order of the words and of the scores:
+        session._scheme.concepts.sort(key=get_position)
+        for source in session._sources:
+            vector = source.levenshtein_vector.get_vector()
+            if vector is not None:
+                vector = sorted(vector, key=lambda score: get_position(score.comparandum))
+                source.levenshtein_vector = _LevenshteinVector(vector)
+        session._shard = None
+
+        return session
+
+    @classmethod
+    def load_state(cls, filename: str, preload_folder: str = None) -> Session:
+        """ Return a session loaded from a state saved with :meth:`bartocsuggest.Session.save_state`.
+
+        Use :meth:`bartocsuggest.Session.rerank` to get its suggestion.
+
+        :param filename: the name of the file including its complete path
+        :param preload_folder: the path to the preload folder, defaults to None
+        """
+
+        from .state import _SessionState
+
+        return _SessionState.load(filename, session_class=cls, preload_folder=preload_folder)
+
+    def _update_suggestion(self,
+                           updated: Set[str],
+                           sensitivity: int = None,
+                           score_type: ScoreType = None,
+                           verbose: bool = False) -> Suggestion:
+        """ Update the rankings incrementally and return the suggestion.
+
+        Sources that were updated (or not yet ranked) are ranked anew; for all other sources, only the recall is
+        recalculated given the new number of words.
+
+        :param updated: the URIs of the updated sources
+        :param sensitivity: the used sensitivity, defaults to None (i.e., the sensitivity of the last suggestion)
+        :param score_type: the used score type, defaults to None (i.e., the score type of the last suggestion)
+        :param verbose: toggle status updates along the way, defaults to False
+        """
+
+        if sensitivity is None:
+            sensitivity = self._sensitivity
+        if score_type is None:
+            score_type = self._score_type
+
+        word_count = self._get_word_count()
+        with self._lock:
+            for source in self._sources:
+                if source.ranking is None or source.uri in updated or sensitivity != self._sensitivity:
+                    source.rank(word_count, sensitivity)
+                else:
+                    source.ranking.recall = _Analysis.make_recall(word_count, source.ranking.score_coverage)
+
+        self._sensitivity = sensitivity
+        self._score_type = score_type
+
+        return self._make_suggestion(sensitivity=sensitivity, score_type=score_type, verbose=verbose)
+
 
 class AnnifSession(Session):
     """ Wrapper for the Annif REST API based on the Annif-client module.
@@ -546,6 +1750,8 @@ class AnnifSession(Session):
     :param project_id: the project identifier
     :param limit: the maximum number of results to return, defaults to None
     :param threshold: the minimum score threshold, defaults to None
+    :param scorer: the scorer comparing words and results, defaults to None (i.e.,
+        :class:`bartocsuggest.LevenshteinScorer`)
     """
 
     def __init__(self,
@@ -553,10 +1759,11 @@ class AnnifSession(Session):
                  project_id: str,
                  limit: int = None,
                  threshold: int = None,
-                 preload_folder: str = None) -> None:
+                 preload_folder: str = None,
+                 scorer: Scorer = None) -> None:
+        self._init_defaults()
         self._scheme = self._set_input(text, project_id=project_id, limit=limit, threshold=threshold)
-        self._preload_folder = preload_folder
-        self._sources = []
+        self._setup(preload_folder, scorer)
 
     def _set_input(self, text: str, **kwargs) -> _ConceptScheme:
         """ Use words suggested by Annif on the basis of text to set JSKOS Concept Scheme.
@@ -565,7 +1772,7 @@ class AnnifSession(Session):
         :param **kwargs: required or optional Annif parameters
         """
 
-        annif = AnnifClient()
+        annif = _Utility.get_annif_client()
         annif_suggestion = annif.suggest(project_id=kwargs.get("project_id"),
                                          text=text,
                                          limit=kwargs.get("limit"),
@@ -576,6 +1783,130 @@ class AnnifSession(Session):
         return scheme
 
 
+class AnnifBatchSession(AnnifSession):
+    """ Wrapper for batch indexing of many texts with the Annif REST API.
+
+    The texts are indexed concurrently by Annif with a shared client. The suggested subjects are deduplicated over
+    all texts before BARTOC FAST is queried, i.e., each subject is queried only once.
+    Use :meth:`bartocsuggest.AnnifBatchSession.suggest` for the suggestion over all texts (i.e., the corpus) and
+    :meth:`bartocsuggest.AnnifBatchSession.suggest_documents` for the suggestions per text.
+
+    :param texts: the input texts (list of texts, or dictionary of texts by identifier)
+    :param project_id: the project identifier
+    :param limit: the maximum number of results to return per text, defaults to None
+    :param threshold: the minimum score threshold, defaults to None
+    :param workers: the number of texts indexed at the same time, defaults to 4
+    :param scorer: the scorer comparing words and results, defaults to None (i.e.,
+        :class:`bartocsuggest.LevenshteinScorer`)
+    """
+
+    def __init__(self,
+                 texts: Union[List[str], Dict[str, str]],
+                 project_id: str,
+                 limit: int = None,
+                 threshold: int = None,
+                 workers: int = 4,
+                 preload_folder: str = None,
+                 scorer: Scorer = None) -> None:
+        self._init_defaults()
+        self._documents = dict()
+        self._scheme = self._set_input(texts,
+                                       project_id=project_id,
+                                       limit=limit,
+                                       threshold=threshold,
+                                       workers=workers)
+        self._setup(preload_folder, scorer)
+
+    def _set_input(self, texts: Union[List[str], Dict[str, str]], **kwargs) -> _ConceptScheme:
+        """ Use the deduplicated words suggested by Annif on the basis of the texts to set JSKOS Concept Scheme.
+
+        The words suggested per text are saved to :attr:`self._documents`.
+
+        :param texts: input texts
+        :param **kwargs: required or optional Annif parameters
+        """
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        if type(texts) is not dict:
+            texts = {str(position): text for position, text in enumerate(texts)}
+
+        annif = _Utility.get_annif_client()
+
+        def index(text: str) -> List[dict]:
+            return annif.suggest(project_id=kwargs.get("project_id"),
+                                 text=text,
+                                 limit=kwargs.get("limit"),
+                                 threshold=kwargs.get("threshold"))
+
+        with ThreadPoolExecutor(max_workers=kwargs.get("workers")) as executor:
+            annif_suggestions = list(executor.map(index, texts.values()))
+
+        # deduplicate the suggested words over all texts:
+        unique = dict()
+        for identifier, annif_suggestion in zip(texts.keys(), annif_suggestions):
+            labels = []
+            for result in annif_suggestion:
+                label = result.get("label")
+                if label not in unique:
+                    unique.update({label: result})
+                labels.append(label)
+            self._documents.update({identifier: labels})
+
+        scheme = _Utility.annif2jskos(list(unique.values()), kwargs.get("project_id"))
+        print(f"{len(texts)} texts indexed, {len(unique)} unique words detected.")
+
+        return scheme
+
+    def suggest_documents(self,
+                          remote: bool = True,
+                          sensitivity: int = 1,
+                          score_type: ScoreType = Recall,
+                          workers: int = 1,
+                          verbose: bool = False) -> Tuple[Suggestion, Dict[str, Suggestion]]:
+        """ Suggest vocabularies for the corpus and for each text.
+
+        BARTOC FAST is queried once per unique word; the suggestion per text is derived from the same responses.
+        Return the corpus suggestion and the suggestions by text identifier (texts given as list are identified by
+        their position).
+
+        :param remote: toggle between remote BARTOC FAST querying and preload folder, defaults to True
+        :param sensitivity: set the maximum allowed Levenshtein distance between word and result, defaults to 1
+        :param score_type: set the score type on which the suggestion is based, defaults to :class:`bartocsuggest.Recall`
+        :param workers: the number of concurrent queries (remote only), defaults to 1
+        :param verbose: toggle running comment printed to console, defaults to False
+        """
+
+        corpus = self.suggest(remote=remote,
+                              sensitivity=sensitivity,
+                              score_type=score_type,
+                              workers=workers,
+                              verbose=verbose)
+
+        concepts = {concept.get_pref_label(): concept for concept in self._scheme.concepts}
+        documents = dict()
+        for identifier, labels in self._documents.items():
+            labels = set(labels)
+            scheme = _ConceptScheme(uri=f"{self._scheme.uri}#{identifier}", pref_label=self._scheme.pref_label)
+            scheme.concepts = [concepts.get(label) for label in labels]
+            sources = []
+            for source in corpus._sources:
+                vector = [score for score in source.levenshtein_vector.get_vector() or []
+                          if score.comparandum.get_pref_label() in labels]
+                if len(vector) == 0:
+                    continue
+                document_source = _Source(source.uri)
+                document_source.levenshtein_vector = _LevenshteinVector(vector)
+                document_source.rank(len(scheme.concepts), sensitivity)
+                sources.append(document_source)
+            documents.update({identifier: Suggestion(scheme,
+                                                     self._sort_sources(sources, score_type),
+                                                     sensitivity,
+                                                     score_type)})
+
+        return corpus, documents
+
+
 class _Score:
     """ A score.
 
@@ -618,52 +1949,108 @@ class _Vector:
 
 
 class _LevenshteinVector(_Vector):
-    """ A vector of Levenshtein distance scores. """
+    """ A vector of Levenshtein distance scores.
 
-    def make_score(self, concept: _Concept, result: _Result) -> Optional[_Score]:
-        """ Make the Levenshtein score for a result.
+    Only the best (i.e., lowest) score per search word is kept. The vector also keeps a histogram of these best
+    scores, so the coverage and score sum within any sensitivity are known without going through the scores.
 
-        The Levenshtein score is the minimum Levenshtein distance over all labels and languages.
+    :param vector: the vector, defaults to None
+    """
 
-        :param concept: the concept from which the distance is measured
-        :param result: contains matches to which the distance is measured
+    def __init__(self,
+                 vector: List[_Score] = None) -> None:
+        super().__init__(vector)
+        self._index = dict()
+        for position, score in enumerate(self._vector):
+            self._index.update({score.comparandum.get_pref_label(): position})
+        self._histogram = dict()
+        self._cumulative = None  # i.e., the sorted distances and their cumulative counts and sums
+        for position in self._index.values():
+            self._count(self._vector[position].value, 1)
+
+    def _count(self, value: float, increment: int) -> None:
+        """ Add to the count of a distance in the histogram.
+
+        :param value: the distance
+        :param increment: the number added to the count (1 or -1)
         """
 
-        scores = []
-        labels = ["pref_label", "alt_label", "hidden_label", "definition"]  # i.e., relevant attributes
+        count = self._histogram.get(value, 0) + increment
+        if count == 0:
+            self._histogram.pop(value)
+        else:
+            self._histogram.update({value: count})
+        self._cumulative = None
 
-        for label in labels:
-            label_string = result.__getattribute__(label)
-            if label_string is None:
-                continue
-            distances = []
-            # check if label_string has more than one language:
-            for foundword in label_string.split(";"):
-                distance = Levenshtein.distance(concept.get_pref_label().lower(), foundword.lower())
-                distances.append((distance, foundword))
-            # add the best foundword and distance tuple per label over all languages:
-            scores.append(min(distances))
-
-        # catch malformed (= empty labels) results:
-        try:
-            min(scores)
-        except ValueError:
+    def get_histogram(self) -> Dict[float, int]:
+        """ Return the number of search words per best distance (from best to worst). """
+
+        return {value: self._histogram[value] for value in sorted(self._histogram)}
+
+    def get_counters(self, sensitivity: float) -> Tuple[int, float]:
+        """ Return the coverage and score sum within the sensitivity.
+
+        :param sensitivity: the used sensitivity
+        """
+
+        cumulative = self._cumulative
+        if cumulative is None:
+            values = sorted(self._histogram)
+            coverages, sums = [], []
+            coverage, score_sum = 0, 0
+            for value in values:
+                coverage += self._histogram[value]
+                score_sum += value * self._histogram[value]
+                coverages.append(coverage)
+                sums.append(score_sum)
+            cumulative = self._cumulative = (values, coverages, sums)
+
+        position = bisect_right(cumulative[0], sensitivity)
+        if position == 0:
+            return 0, 0
+
+        return cumulative[1][position - 1], cumulative[2][position - 1]
+
+    def remove_score(self, searchword: str) -> Optional[_Score]:
+        """ Remove and return the score for a search word (if any).
+
+        :param searchword: the search word
+        """
+
+        position = self._index.pop(searchword, None)
+        if position is None:
             return None
 
-        return _Score(value=min(scores)[0], comparandum=concept, comparans=result)
+        # move the last score into the gap:
+        score = self._vector[position]
+        self._count(score.value, -1)
+        last = self._vector.pop()
+        if position < len(self._vector):
+            self._vector[position] = last
+            self._index.update({last.comparandum.get_pref_label(): position})
+
+        return score
 
-    def update_score(self, concept: _Concept, result: _Result) -> None:
-        """ Update the Levenshtein vector with the Levenshtein score for the concept and result.
+    def add_score(self, score: _Score) -> _Score:
+        """ Add a score to the vector and return it.
 
-        :param concept: the concept from which the distance is measured
-        :param result: contains matches to which the distance is measured
+        The score is kept only if it is the best for its search word so far.
+
+        :param score: the score
         """
 
-        score = self.make_score(concept, result)
-        if score is None:
-            pass
-        else:
+        searchword = score.comparandum.get_pref_label()
+        position = self._index.get(searchword)
+        if position is None:
+            self._index.update({searchword: len(self._vector)})
             self._vector.append(score)
+            self._count(score.value, 1)
+        elif score.value < self._vector[position].value:
+            self._count(self._vector[position].value, -1)
+            self._vector[position] = score
+            self._count(score.value, 1)
+
+        return score
 
 
 class _Ranking:
@@ -740,21 +2127,20 @@ class _Analysis:
         :param sensitivity: the used sensitivity
         """
 
-        # collect all unique searchwords in vector:
         initial_vector = vector.get_vector()
         if initial_vector is None:
             return None
-        else:
-            searchwords = set(score.comparandum.get_pref_label() for score in initial_vector)
 
         # choose best (=lowest) score for each seachword:
-        best_vector = []
-        for word in searchwords:
-            scores = [score for score in initial_vector if score.comparandum.get_pref_label() == word]
-            best_score = sorted(scores, key=lambda x: x.value)[0]
-            # check sensitivity:
-            if best_score.value <= sensitivity:
-                best_vector.append(best_score)
+        best_scores = dict()
+        for score in initial_vector:
+            word = score.comparandum.get_pref_label()
+            best_score = best_scores.get(word)
+            if best_score is None or score.value < best_score.value:
+                best_scores.update({word: score})
+
+        # check sensitivity:
+        best_vector = [score for score in best_scores.values() if score.value <= sensitivity]
 
         return _LevenshteinVector(best_vector)
 
@@ -790,6 +2176,10 @@ class _Source:
         if levenshtein_vector is None:
             self.levenshtein_vector = _LevenshteinVector()
         self.ranking = ranking
+        self._best_vector = None
+        self._best_sensitivity = None
+        self._counters = None  # i.e., the coverage and score sum of a pruned source
+        self._pruned_sensitivity = None
 
     def update_ranking(self, session: Session, sensitivity: int, verbose: bool = False) -> None:
         """ Update the sources ranking. """
@@ -797,17 +2187,119 @@ class _Source:
         if verbose is True:
             print(f"Updating {self.uri}...", end=" ")
 
-        best_vector = _Analysis.make_best_vector(self.levenshtein_vector, sensitivity)
-
-        self.ranking = _Ranking()
-        self.ranking.score_sum = _Analysis.make_score_sum(best_vector)
-        self.ranking.score_average = _Analysis.make_score_average(best_vector)
-        self.ranking.score_coverage = _Analysis.make_score_coverage(best_vector)
-        self.ranking.recall = _Analysis.make_recall(len(session._scheme.concepts), self.ranking.score_coverage)
+        self.rank(session._get_word_count(), sensitivity)
 
         if verbose is True:
             print("updated.")
 
+    def rank(self, word_count: int, sensitivity: int) -> None:
+        """ Set the source's ranking.
+
+        :param word_count: the number of input words
+        :param sensitivity: the used sensitivity
+        """
+
+        self.ranking = self.get_ranking(word_count, sensitivity)
+        self._best_vector = None
+
+    def get_ranking(self, word_count: int, sensitivity: int) -> _Ranking:
+        """ Return the source's ranking given the sensitivity without setting it.
+
+        The ranking is read from the histogram of the best scores (or from the counters of a pruned source, if the
+        sensitivity is the same), i.e., the best vector is not made.
+
+        :param word_count: the number of input words
+        :param sensitivity: the used sensitivity
+        """
+
+        ranking = _Ranking()
+        if self._counters is not None and sensitivity != self._pruned_sensitivity:
+            return ranking
+
+        coverage, score_sum = self.get_counters(sensitivity)
+        if coverage > 0:
+            ranking.score_sum = score_sum
+            ranking.score_average = round(score_sum / coverage, 2)
+            ranking.score_coverage = coverage
+            ranking.recall = _Analysis.make_recall(word_count, coverage)
+
+        return ranking
+
+    def get_best_vector(self, sensitivity: int) -> Optional[_LevenshteinVector]:
+        """ Return the best vector given the sensitivity.
+
+        The best vector is made on first use after ranking and reused for the same sensitivity.
+
+        :param sensitivity: the used sensitivity
+        """
+
+        if self._counters is not None:
+            return None
+        best_vector = self._best_vector
+        if best_vector is not None and self._best_sensitivity == sensitivity:
+            return best_vector
+
+        best_vector = _Analysis.make_best_vector(self.levenshtein_vector, sensitivity)
+        self._best_vector, self._best_sensitivity = best_vector, sensitivity
+
+        return best_vector
+
+    def get_counters(self, sensitivity: int) -> Tuple[int, float]:
+        """ Return the coverage and score sum within the sensitivity.
+
+        :param sensitivity: the used sensitivity
+        """
+
+        if self._counters is not None:
+            return self._counters[0], self._counters[1]
+
+        return self.levenshtein_vector.get_counters(sensitivity)
+
+    def prune(self, sensitivity: int) -> None:
+        """ Replace the score vector by counters (i.e., the coverage and score sum within the sensitivity).
+
+        :param sensitivity: the used sensitivity
+        """
+
+        self._counters = list(self.get_counters(sensitivity))
+        self._pruned_sensitivity = sensitivity
+        self.levenshtein_vector = _LevenshteinVector()
+        self._best_vector = None
+
+    def merge(self, other: _Source) -> None:
+        """ Merge the scores of the same source from a session with other words.
+
+        If either source is pruned, the merged source is pruned as well, i.e., the counters are added up.
+
+        :param other: the other source
+        """
+
+        if self._counters is None and other._counters is None:
+            for score in other.levenshtein_vector._vector:
+                self.levenshtein_vector.add_score(score)
+        else:
+            if self._counters is not None and other._counters is not None and \
+                    self._pruned_sensitivity != other._pruned_sensitivity:
+                raise ValueError(f"Cannot merge {self.uri} pruned with different sensitivities!")
+            if self._counters is None:
+                self.prune(other._pruned_sensitivity)
+            coverage, score_sum = other.get_counters(self._pruned_sensitivity)
+            self._counters[0] += coverage
+            self._counters[1] += score_sum
+
+        self.ranking = None
+        self._best_vector = None
+
+    def count(self, value: float) -> None:
+        """ Count the best score of a new word for a pruned source.
+
+        :param value: the score's value
+        """
+
+        if value <= self._pruned_sensitivity:
+            self._counters[0] += 1
+            self._counters[1] += value
+
 
 class Suggestion:
     """ A suggestion of vocabularies.
@@ -827,6 +2319,11 @@ class Suggestion:
         self._sources = _vocabularies
         self._sensitivity = _sensitivity
         self._score_type = _score_type
+        self._source_index = {source.uri: source for source in _vocabularies}
+        self._sample_size = None  # i.e., the number of sampled words of a sampled suggestion
+        self._confidence = None
+        self._candidates = _vocabularies  # i.e., all sources, including those without matches
+        self._word_count = len(_scheme.concepts)
 
     def get(self, scores: bool = False, max: int = None) -> Union[List[str], List[Tuple[str, int]]]:
         """ Return the suggested vocabularies sorted from best to worst.
@@ -852,7 +2349,10 @@ class Suggestion:
     def print(self):
         """ Print the suggestion to the console. """
 
-        print(f"{len(self._sources)} vocabularies given sensitivity {self._sensitivity}."
+        sample = ""
+        if self._sample_size is not None:
+            sample = f" (sampled {self._sample_size} words, confidence {self._confidence})"
+        print(f"{len(self._sources)} vocabularies given sensitivity {self._sensitivity}{sample}."
               f" From best to worst (vocabularies with no matches are excluded):")
         for source in self._sources:
             print(f"{source.uri}, {self._score_type.__str__()}: {getattr(source.ranking, self._score_type.__str__())}")
@@ -867,6 +2367,58 @@ class Suggestion:
 
         return self._sensitivity
 
+    def sensitivity_curve(self,
+                          sensitivities: List[float] = None,
+                          score_types: List[ScoreType] = None,
+                          max: int = None) -> Dict[float, Dict[str, List[Tuple[str, float]]]]:
+        """ Return the suggested vocabularies and their scores for several sensitivities and score types at once.
+
+        The rankings are read from the histograms of the sources' best scores, i.e., no score is recalculated. The
+        result maps each sensitivity to a dictionary that maps the name of each score type to the vocabularies and
+        their scores from best to worst (as returned by :meth:`bartocsuggest.Suggestion.get`). Pruned vocabularies
+        are only included for the sensitivity they were pruned with.
+
+        :param sensitivities: the sensitivities, defaults to None (i.e., every distance of a best score)
+        :param score_types: the score types, defaults to None (i.e., Recall, Average, Coverage and Sum)
+        :param max: limit the number of vocabularies per ranking to max, defaults to None
+        """
+
+        if sensitivities is None:
+            values = set()
+            for source in self._candidates:
+                if source._counters is None:
+                    values.update(source.levenshtein_vector._histogram)
+                else:
+                    values.add(source._pruned_sensitivity)
+            sensitivities = sorted(values)
+        if score_types is None:
+            score_types = [Recall, Average, Coverage, Sum]
+
+        curve = dict()
+        for sensitivity in sensitivities:
+            rankings = [(source.uri, source.get_ranking(self._word_count, sensitivity)) for source in self._candidates]
+            curve.update({sensitivity: dict()})
+            for score_type in score_types:
+                scores = [[uri, getattr(ranking, score_type.__str__())] for uri, ranking in rankings
+                          if getattr(ranking, score_type.__str__()) is not None]
+                scores.sort(key=lambda x: x[1], reverse=score_type is Recall)
+                curve[sensitivity].update({score_type.__str__(): scores[:max]})
+
+        return curve
+
+    def get_sample_size(self) -> Optional[int]:
+        """ Return the number of words a sampled suggestion is based on (None if all words were used). """
+
+        return self._sample_size
+
+    def get_confidence(self) -> Optional[float]:
+        """ Return the achieved confidence of the top vocabularies' order of a sampled suggestion.
+
+        The confidence is 1.0 if all words were sampled, and None if the suggestion was not sampled.
+        """
+
+        return self._confidence
+
     def _get_concordance(self, vocabulary_uri: str = None) -> Optional[_Concordance]:
         """ Return the concordance between the input words and the vocabulary.
 
@@ -881,15 +2433,16 @@ class Suggestion:
         if vocabulary_uri is None:
             vocabulary = self._sources[0]
         else:
-            for source in self._sources:
-                if source.uri == vocabulary_uri:
-                    vocabulary = source
+            vocabulary = self._source_index.get(vocabulary_uri)
         if vocabulary is None:
             print("The selected vocabulary does not exist!")
             return None
 
-        # make the best vector (on which the ranking of self._vocabularies is based):
-        best_vector = _Analysis.make_best_vector(vocabulary.levenshtein_vector, self._sensitivity)
+        # get the best vector (on which the ranking of self._vocabularies is based):
+        best_vector = vocabulary.get_best_vector(self._sensitivity)
+        if best_vector is None:
+            print(f"The concordance of {vocabulary.uri} is not available (its scores were pruned)!")
+            return None
 
         # make concordance:
         source_scheme = self._scheme
@@ -928,16 +2481,24 @@ class Suggestion:
         concordance = self._get_concordance(vocabulary_uri)
         _Utility.print_json(concordance.get_dict())
 
-    def save_concordance(self, folder: str, filename: str = None, vocabulary_uri: str = None) -> None:
+    def save_concordance(self,
+                         folder: str,
+                         filename: str = None,
+                         vocabulary_uri: str = None,
+                         references: bool = False) -> None:
         """ Save the concordance as JSKOS in the JSON format.
 
+        With references, the concept schemes are written once and each mapping refers to them by URI, which makes
+        the files of large concordances much smaller and faster to write.
+
         :param folder: the path to the save folder
         :param filename: the name of the file, defaults to None
         :param vocabulary_uri: the URI of the vocabulary, defaults to None
+        :param references: toggle referring to the concept schemes by URI in the mappings, defaults to False
         """
 
         concordance = self._get_concordance(vocabulary_uri)
-        _Utility.save_json(dictionary=concordance.get_dict(), filename=filename, folder=folder)
+        _Utility.save_json(dictionary=concordance.get_dict(references=references), filename=filename, folder=folder)
 
     def save_mappings(self, folder: str, filename: str = None, vocabulary_uri: str = None) -> None:
         """ Save the mappings as JSKOS in the NDJSON format.
@@ -955,7 +2516,136 @@ class Suggestion:
         if filename is None:
             filename = str(datetime.now()).split(".")[0].replace(":", "-")
 
-        full_filename = folder + f"{filename}.ndjson"
+        self._write_mappings(concordance, folder + f"{filename}.ndjson")
+
+    @classmethod
+    def _write_mappings(cls, concordance: _Concordance, full_filename: str) -> None:
+        """ Write the mappings of a concordance as JSKOS in the NDJSON format.
+
+        :param concordance: the concordance
+        :param full_filename: the name of the file including its complete path
+        """
+
         with open(full_filename, "w") as file:
             for mapping in concordance.mappings:
                 print(f"{mapping.get_dict()}".replace("'", '"').replace(" ", ""), file=file)
+
+    def export_concordances(self,
+                            folder: str,
+                            top: int = 20,
+                            vocabulary_uris: List[str] = None,
+                            mappings: bool = False,
+                            workers: int = 4,
+                            references: bool = False) -> List[str]:
+        """ Save the concordances of several vocabularies as JSKOS in the JSON format.
+
+        The concordances are made from the best vectors of the ranking and built and saved in parallel; each
+        concordance is written to disk as soon as it is ready. The file of a vocabulary is named
+        concordance_<vocabulary> (and mappings_<vocabulary> for the mappings), where "/" in the vocabulary URI is
+        replaced by "_". Return the names of the saved concordance files.
+
+        :param folder: the path to the save folder
+        :param top: the number of top vocabularies, defaults to 20
+        :param vocabulary_uris: the URIs of the vocabularies (instead of the top vocabularies), defaults to None
+        :param mappings: toggle also saving the mappings in the NDJSON format, defaults to False
+        :param workers: the number of concordances built at the same time, defaults to 4
+        :param references: toggle referring to the concept schemes by URI in the mappings, defaults to False
+        """
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        if vocabulary_uris is None:
+            vocabulary_uris = self.get(max=top)
+
+        def export(vocabulary_uri: str) -> Optional[str]:
+            concordance = self._get_concordance(vocabulary_uri)
+            if concordance is None:
+                return None
+            label = vocabulary_uri.replace("/", "_")
+            full_filename = folder + f"concordance_{label}.json"
+            with open(full_filename, "w") as file:
+                dump(concordance.get_dict(references=references), file)
+            if mappings is True:
+                self._write_mappings(concordance, folder + f"mappings_{label}.ndjson")
+            return full_filename
+
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            filenames = [filename for filename in executor.map(export, vocabulary_uris) if filename is not None]
+
+        return filenames
+
+
+def iter_words(filename: str, language: str = "und") -> Optional[Iterator[str]]:
+    """ Return an iterator over the words of a file, e.g., to stream a large file into a session.
+
+    The file types are those supported by :class:`bartocsuggest.Session`. The file is read lazily except for JSON
+    files, which are parsed as a whole.
+
+    :param filename: the name of the file including its complete path
+    :param language: the language of the words given as RFC 3066 language tag, defaults to "und"
+    """
+
+    return _Utility.iter_file(filename, language)
+
+
+def set_transport(url: Union[str, List[str]] = FAST_API,
+                  timeout: float = 60,
+                  pool_size: int = 16,
+                  retries: int = 5,
+                  backoff: float = 1,
+                  max_backoff: float = 60,
+                  threshold: int = 5,
+                  cooldown: float = 30,
+                  weights: List[float] = None,
+                  selection: str = "weighted",
+                  health_interval: float = None,
+                  verbose: bool = False) -> None:
+    """ Set how all sessions of the process query BARTOC FAST.
+
+    Failed requests are retried with jittered exponential backoff. After threshold consecutive failures, the circuit
+    of an endpoint opens and requests to it fail fast until the cooldown ends. With several endpoints, a failed
+    request fails over to another endpoint at once.
+
+    :param url: the URL or the list of URLs of the BARTOC FAST endpoints, defaults to FAST_API
+    :param timeout: the timeout of a single HTTP request in seconds, defaults to 60
+    :param pool_size: the maximum number of pooled connections, defaults to 16
+    :param retries: the maximum number of retries of a single request, defaults to 5
+    :param backoff: the base of the exponential backoff between retries in seconds, defaults to 1
+    :param max_backoff: the maximum backoff between retries in seconds, defaults to 60
+    :param threshold: the number of consecutive failures that open the circuit of an endpoint, defaults to 5
+    :param cooldown: the time in seconds until an open circuit is probed again, defaults to 30
+    :param weights: the weights of the endpoints, defaults to None (i.e., equal weights)
+    :param selection: "weighted" or "latency", defaults to "weighted"
+    :param health_interval: the time in seconds between health checks of all endpoints, defaults to None (i.e.,
+        no periodic health checks)
+    :param verbose: toggle printing each retry to console, defaults to False
+    """
+
+    _Transport.set_default(_Transport(url=url,
+                                      timeout=timeout,
+                                      pool_size=pool_size,
+                                      retries=retries,
+                                      backoff=backoff,
+                                      max_backoff=max_backoff,
+                                      threshold=threshold,
+                                      cooldown=cooldown,
+                                      weights=weights,
+                                      selection=selection,
+                                      health_interval=health_interval,
+                                      verbose=verbose))
+
+
+def check_health() -> Dict[str, bool]:
+    """ Probe every BARTOC FAST endpoint with a short query and return whether each endpoint is healthy. """
+
+    return _Transport.get_default().check_health()
+
+
+def get_stats() -> Dict[str, Union[Dict, List[Dict]]]:
+    """ Return the statistics of the response cache, the distance memo and the BARTOC FAST endpoints. """
+
+    from .cache import _DistanceMemo
+
+    return {"cache": _ResponseCache.get_default().get_stats(),
+            "distances": _DistanceMemo.get_default().get_stats(),
+            "endpoints": _Transport.get_default().get_stats()}
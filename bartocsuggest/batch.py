@@ -0,0 +1,214 @@
+""" batch.py
+
+Batch processing of many word-list files in one process.
+
+Run with ``bartocsuggest-batch "lists/*.xlsx" --output results/`` or ``python -m bartocsuggest.batch ...``. All lists
+share the process-wide connection pool and response cache, so words that occur in several lists are fetched once. """
+
+from __future__ import annotations
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from argparse import ArgumentParser
+from glob import glob
+from os import path, makedirs
+from time import time
+
+from . import Session, SCORE_TYPES, SCORERS, get_stats
+from .cache import _ResponseCache
+from .transport import _Transport, _StubTransport, SELECTIONS
+from .utility import _Utility
+
+
+class _BatchRun:
+    """ A batch run over many word-list files.
+
+    For each file, the suggestion is saved as JSON and the mappings and concordances of the top vocabularies are
+    saved with :meth:`bartocsuggest.Suggestion.export_concordances` in a subfolder of the output folder named after
+    the file's path relative to the common folder of all files (including its extension, e.g., "sub/a.txt"). A
+    summary of the run is saved as summary.json.
+
+    :param inputs: directories, files or glob patterns of the word lists
+    :param output_folder: the path to the output folder
+    :param language: the language of the words given as RFC 3066 language tag, defaults to "und"
+    :param sensitivity: the maximum allowed Levenshtein distance between word and result, defaults to 1
+    :param score_type: the name of the score type, defaults to "Recall"
+    :param scorer: the name of the scorer, defaults to "levenshtein"
+    :param top: the number of top vocabularies for which mappings and concordances are saved, defaults to 1
+    :param list_workers: the number of lists processed at the same time, defaults to 4
+    :param query_workers: the number of concurrent BARTOC FAST queries per list, defaults to 4
+    """
+
+    def __init__(self,
+                 inputs: List[str],
+                 output_folder: str,
+                 language: str = "und",
+                 sensitivity: int = 1,
+                 score_type: str = "Recall",
+                 scorer: str = "levenshtein",
+                 top: int = 1,
+                 list_workers: int = 4,
+                 query_workers: int = 4) -> None:
+        self.filenames = self.find_files(inputs)
+        self.output_names = self.get_output_names(self.filenames)
+        self.output_folder = output_folder
+        self.language = language
+        self.sensitivity = sensitivity
+        self.score_type = SCORE_TYPES[score_type]
+        self.scorer = SCORERS[scorer]
+        self.top = top
+        self.list_workers = list_workers
+        self.query_workers = query_workers
+
+    @classmethod
+    def find_files(cls, inputs: List[str]) -> List[str]:
+        """ Return the sorted supported files given directories, files or glob patterns.
+
+        :param inputs: directories, files or glob patterns
+        """
+
+        filenames = set()
+        for pattern in inputs:
+            if path.isdir(pattern):
+                pattern = path.join(pattern, "*")
+            for filename in glob(pattern, recursive=True):
+                if path.isfile(filename) and path.splitext(filename)[1].lower() in _Utility.file_types:
+                    filenames.add(path.normpath(filename))
+
+        return sorted(filenames)
+
+    @classmethod
+    def get_output_names(cls, filenames: List[str]) -> Dict[str, str]:
+        """ Return the unique name of the output subfolder per file.
+
+        The name is the file's path relative to the common folder of all files, including its extension (e.g.,
+        "a.txt" and "sub/a.txt" for "in/a.txt" and "in/sub/a.txt"). Names that only differ in case are suffixed
+        (e.g., "A.txt-2"), since they would collide on case-insensitive file systems.
+
+        :param filenames: the word list files
+        """
+
+        if len(filenames) == 0:
+            return dict()
+
+        root = path.commonpath([path.dirname(path.abspath(filename)) for filename in filenames])
+        names = dict()
+        taken = set()
+        for filename in filenames:
+            name = path.relpath(path.abspath(filename), root)
+            unique = name
+            suffix = 1
+            while unique.lower() in taken:
+                suffix += 1
+                unique = f"{name}-{suffix}"
+            taken.add(unique.lower())
+            names.update({filename: unique})
+
+        return names
+
+    def process(self, filename: str) -> Dict:
+        """ Process a single word list and return its summary.
+
+        :param filename: the word list file
+        """
+
+        start = time()
+        folder = path.join(self.output_folder, self.output_names[filename], "")
+        summary = {"file": filename, "output": folder}
+
+        try:
+            makedirs(folder, exist_ok=True)
+            session = Session(filename, language=self.language, scorer=self.scorer())
+            suggestion = session.suggest(sensitivity=self.sensitivity,
+                                         score_type=self.score_type,
+                                         workers=self.query_workers)
+            vocabularies = suggestion.get(scores=True)
+            _Utility.save_json({"file": filename,
+                                "words": len(session._scheme.concepts),
+                                "sensitivity": self.sensitivity,
+                                "score_type": self.score_type.__str__(),
+                                "scorer": self.scorer.name,
+                                "suggestion": vocabularies},
+                               folder, "suggestion")
+            suggestion.export_concordances(folder, top=self.top, mappings=True)
+            summary.update({"status": "ok",
+                            "words": len(session._scheme.concepts),
+                            "vocabularies": len(vocabularies),
+                            "unfetched": len(session._failed),
+                            "top": vocabularies[:self.top]})
+        except Exception as exception:
+            summary.update({"status": "error", "error": f"{type(exception).__name__}: {exception}"})
+
+        summary.update({"seconds": round(time() - start, 2)})
+        print(f"{filename}: {summary.get('status')} ({summary.get('seconds')} seconds).")
+
+        return summary
+
+    def run(self) -> Dict:
+        """ Process all word lists in parallel and save the run summary. """
+
+        start = time()
+        makedirs(self.output_folder, exist_ok=True)
+        print(f"Processing {len(self.filenames)} word lists...")
+
+        with ThreadPoolExecutor(max_workers=self.list_workers) as executor:
+            lists = list(executor.map(self.process, self.filenames))
+
+        summary = {"lists": lists,
+                   "succeeded": len([entry for entry in lists if entry.get("status") == "ok"]),
+                   "failed": len([entry for entry in lists if entry.get("status") != "ok"]),
+                   "seconds": round(time() - start, 2),
+                   **get_stats()}
+        _Utility.save_json(summary, path.join(self.output_folder, ""), "summary")
+        print(f"{summary.get('succeeded')} word lists processed, {summary.get('failed')} failed"
+              f" ({summary.get('seconds')} seconds).")
+
+        return summary
+
+
+def main(arguments: List[str] = None) -> None:
+    """ Run a batch from the command line.
+
+    :param arguments: the command line arguments, defaults to None (i.e., sys.argv)
+    """
+
+    parser = ArgumentParser(prog="bartocsuggest-batch", description="Suggest vocabularies for many word lists.")
+    parser.add_argument("inputs", nargs="+", help="directories, files or glob patterns of word lists")
+    parser.add_argument("--output", required=True, help="output folder")
+    parser.add_argument("--language", default="und", help="RFC 3066 language tag of the words")
+    parser.add_argument("--sensitivity", type=float, default=1.0, help="maximum distance in the units of the scorer")
+    parser.add_argument("--score-type", default="Recall", choices=sorted(SCORE_TYPES))
+    parser.add_argument("--scorer", default="levenshtein", choices=sorted(SCORERS))
+    parser.add_argument("--top", type=int, default=1, help="save mappings and concordances of the top vocabularies")
+    parser.add_argument("--list-workers", type=int, default=4, help="number of lists processed at the same time")
+    parser.add_argument("--query-workers", type=int, default=4, help="concurrent BARTOC FAST queries per list")
+    parser.add_argument("--cache-size", type=int, default=256, help="response cache size in MB")
+    parser.add_argument("--endpoint", action="append", metavar="URL[=WEIGHT]",
+                        help="a BARTOC FAST endpoint or mirror (repeat for several endpoints)")
+    parser.add_argument("--selection", default="weighted", choices=SELECTIONS, help="endpoint selection")
+    parser.add_argument("--stub", action="store_true", help="answer queries locally without BARTOC FAST")
+    options = parser.parse_args(arguments)
+
+    _ResponseCache.get_default().max_bytes = options.cache_size * 1024 * 1024
+    if options.stub is True:
+        _Transport.set_default(_StubTransport())
+    elif options.endpoint is not None:
+        _Transport.set_default(_Transport.from_specs(options.endpoint, selection=options.selection))
+
+    sensitivity = options.sensitivity
+    if sensitivity.is_integer() is True:
+        sensitivity = int(sensitivity)
+
+    batch = _BatchRun(inputs=options.inputs,
+                      output_folder=options.output,
+                      language=options.language,
+                      sensitivity=sensitivity,
+                      score_type=options.score_type,
+                      scorer=options.scorer,
+                      top=options.top,
+                      list_workers=options.list_workers,
+                      query_workers=options.query_workers)
+    batch.run()
+
+
+if __name__ == "__main__":
+    main()
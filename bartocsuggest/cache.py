@@ -0,0 +1,244 @@
+""" cache.py
+
+In-memory caching of BARTOC FAST responses and of word-label distances. """
+
+from __future__ import annotations
+from typing import Dict, Callable, List, Optional, Tuple, Union
+from collections import OrderedDict
+from threading import Lock
+from json import dumps
+
+
+class _ResponseCache:
+    """ A memory-bounded LRU cache of parsed BARTOC FAST responses keyed by query payload.
+
+    Concurrent requests for the same payload are coalesced: only the first caller fetches the response while the
+    other callers wait for its result (single-flight).
+
+    :param max_bytes: the approximate maximum size of all cached responses in bytes, defaults to 64 MB
+    """
+
+    _default = None
+    _default_lock = Lock()
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._inflight = dict()
+        self._size = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @classmethod
+    def get_default(cls) -> _ResponseCache:
+        """ Return the process-wide response cache. """
+
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = _ResponseCache()
+
+        return cls._default
+
+    @classmethod
+    def make_key(cls, payload: Dict) -> str:
+        """ Return the cache key of a payload.
+
+        :param payload: the query payload
+        """
+
+        return dumps(payload, sort_keys=True)
+
+    def get(self, payload: Dict) -> Optional[Dict]:
+        """ Return the cached response for the payload (if any).
+
+        :param payload: the query payload
+        """
+
+        key = self.make_key(payload)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[0]
+
+    def put(self, payload: Dict, response: Dict, size: int = None) -> None:
+        """ Add a response to the cache and evict the least recently used responses if necessary.
+
+        :param payload: the query payload
+        :param response: the parsed response
+        :param size: the size of the response in bytes, defaults to None (i.e., estimated)
+        """
+
+        if size is None:
+            size = len(dumps(response))
+        if size > self.max_bytes:
+            return None
+
+        key = self.make_key(payload)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries.update({key: (response, size)})
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def get_or_fetch(self, payload: Dict, fetch: Callable[[Dict], Dict]) -> Dict:
+        """ Return the cached response for the payload or fetch it.
+
+        If the same payload is already being fetched, wait for that fetch instead of sending a duplicate request.
+
+        :param payload: the query payload
+        :param fetch: returns the parsed response for the payload
+        """
+
+        key = self.make_key(payload)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                from concurrent.futures import Future
+
+                future = Future()
+                self._inflight.update({key: future})
+                self.misses += 1
+                leader = True
+
+        if leader is False:
+            return future.result()
+
+        try:
+            response = fetch(payload)
+            self.put(payload, response)
+            future.set_result(response)
+        except BaseException as exception:
+            future.set_exception(exception)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        return response
+
+    def clear(self) -> None:
+        """ Remove all cached responses. """
+
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """ Return the cache statistics. """
+
+        with self._lock:
+            return {"entries": len(self._entries),
+                    "bytes": self._size,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "coalesced": self.coalesced}
+
+
+class _DistanceMemo:
+    """ A bounded LRU memo of the distances between lowercased words and labels, shared by all sessions.
+
+    The distances are grouped by scorer, cutoff and word, i.e., one lookup returns all memoized distances of a word;
+    the least recently used words are evicted first. Distances above the cutoff are memoized as None.
+
+    :param max_entries: the maximum number of memoized distances, defaults to 1000000 (0 disables the memo)
+    """
+
+    _default = None
+    _default_lock = Lock()
+
+    def __init__(self, max_entries: int = 1000000) -> None:
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def get_default(cls) -> _DistanceMemo:
+        """ Return the process-wide distance memo. """
+
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = _DistanceMemo()
+
+        return cls._default
+
+    def get_distances(self,
+                      key: Tuple,
+                      labels: List[str],
+                      score: Callable[[List[str]], List[Optional[float]]]) -> List[Optional[float]]:
+        """ Return the distances between a word and labels; only the distances not memoized yet are scored.
+
+        :param key: the scorer's name, the cutoff and the word
+        :param labels: the labels
+        :param score: returns the distances to a list of labels (None if above the cutoff)
+        """
+
+        if self.max_entries == 0:
+            return score(labels)
+
+        with self._lock:
+            known = self._entries.get(key)
+            if known is not None:
+                self._entries.move_to_end(key)
+
+        if known is None:
+            known = dict()
+            missing = labels
+        else:
+            missing = [label for label in labels if label not in known]
+        computed = dict(zip(missing, score(missing))) if len(missing) > 0 else dict()
+
+        with self._lock:
+            self.hits += len(labels) - len(missing)
+            self.misses += len(missing)
+            if len(computed) > 0:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = dict()
+                    self._entries.update({key: entry})
+                size = len(entry)
+                entry.update(computed)
+                self._size += len(entry) - size
+                while self._size > self.max_entries and len(self._entries) > 0:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+
+        return [computed[label] if label in computed else known[label] for label in labels]
+
+    def clear(self) -> None:
+        """ Remove all memoized distances. """
+
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get_stats(self) -> Dict[str, Union[int, float]]:
+        """ Return the memo statistics. """
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"words": len(self._entries),
+                    "entries": self._size,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "hit_rate": round(self.hits / lookups, 4) if lookups > 0 else None}
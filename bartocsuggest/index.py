@@ -0,0 +1,367 @@
+""" index.py
+
+Offline approximate-match index of the labels in BARTOC FAST responses.
+
+Build an index from preload folders with ``bartocsuggest-index my/preload/folder --output my/index.json`` (or
+``python -m bartocsuggest.index ...``) and use it with ``Session.suggest(offline_index="my/index.json")``. """
+
+from __future__ import annotations
+from typing import Dict, List, Optional, Union, TYPE_CHECKING
+from argparse import ArgumentParser
+from glob import glob
+from os import path
+from json import dump, load
+
+if TYPE_CHECKING:
+    from .scorers import Scorer
+
+LABELS = ["prefLabel", "altLabel", "hiddenLabel", "definition"]  # i.e., relevant attributes of a raw result
+
+
+class _LabelIndex:
+    """ A persistent index of the labels of BARTOC FAST results for approximate matching.
+
+    Labels are split by language (";") and lowercased exactly as for scoring, and stored in a BK-tree under the
+    Levenshtein distance. Each label points to the raw results carrying it, so a search returns results that can be
+    scored as if they came from BARTOC FAST.
+
+    :param results: the raw results, defaults to None
+    """
+
+    version = 1
+    max_cells = 2 ** 22  # i.e., the maximum number of word-label distances scored in one batch
+
+    def __init__(self, results: List[Dict] = None) -> None:
+        self.results = []
+        self._keys = dict()
+        self.labels = []
+        self.postings = []
+        self.children = []
+        self._positions = dict()
+        self._lengths = None  # i.e., the labels by length (made on first use)
+        self._tokens = None  # i.e., the labels by token (made on first use)
+        for result in results or []:
+            self.add_result(result)
+
+    def add_result(self, result: Dict) -> None:
+        """ Add a raw result (duplicates are ignored).
+
+        :param result: the raw result
+        """
+
+        key = self.make_key(result)
+        if result.get("uri") is None or key in self._keys:
+            return None
+
+        position = len(self.results)
+        self.results.append({key: result.get(key) for key in ["uri"] + LABELS if result.get(key) is not None})
+        self._keys.update({key: position})
+
+        for key in LABELS:
+            label_string = result.get(key)
+            if label_string is None:
+                continue
+            for foundword in set(label_string.lower().split(";")):
+                self.add_label(foundword, position)
+
+    @classmethod
+    def make_key(cls, result: Dict) -> tuple:
+        """ Return the key identifying a raw result by its URI and labels.
+
+        :param result: the raw result
+        """
+
+        return tuple(result.get(key) for key in ["uri"] + LABELS)
+
+    def add_label(self, label: str, result: int) -> None:
+        """ Add a lowercased label of a result to the BK-tree.
+
+        :param label: the lowercased label
+        :param result: the position of the result
+        """
+
+        node = self._positions.get(label)
+        if node is not None:
+            if result not in self.postings[node]:
+                self.postings[node].append(result)
+            return None
+
+        from Levenshtein import distance
+
+        node = len(self.labels)
+        self._lengths = None
+        self._tokens = None
+        self.labels.append(label)
+        self.postings.append([result])
+        self.children.append(dict())
+        self._positions.update({label: node})
+
+        # insert into BK-tree:
+        if node == 0:
+            return None
+        current = 0
+        while True:
+            edge = distance(label, self.labels[current])
+            child = self.children[current].get(edge)
+            if child is None:
+                self.children[current].update({edge: node})
+                return None
+            current = child
+
+    def add_response(self, response: Dict) -> None:
+        """ Add all results of a BARTOC FAST response.
+
+        :param response: the parsed response
+        """
+
+        for result in response.get("results") or []:
+            self.add_result(result)
+
+    def add_preload_folder(self, folder: str) -> int:
+        """ Add all preloaded responses of a folder and return their number.
+
+        :param folder: the path to the preload folder
+        """
+
+        filenames = glob(path.join(folder, "query_*.json"))
+        for filename in filenames:
+            with open(filename) as file:
+                self.add_response(load(file))
+
+        return len(filenames)
+
+    def add_cache(self, cache=None) -> int:
+        """ Add all responses of a response cache and return their number.
+
+        :param cache: the response cache, defaults to None (i.e., the process-wide cache)
+        """
+
+        from .cache import _ResponseCache
+
+        if cache is None:
+            cache = _ResponseCache.get_default()
+        with cache._lock:
+            responses = [response for response, _ in cache._entries.values()]
+        for response in responses:
+            self.add_response(response)
+
+        return len(responses)
+
+    def search(self, word: str, max_distance: int) -> List[Dict]:
+        """ Return the raw results with a label within the maximum Levenshtein distance of the word.
+
+        :param word: the word
+        :param max_distance: the maximum Levenshtein distance
+        """
+
+        if len(self.labels) == 0:
+            return []
+
+        from Levenshtein import distance
+
+        word = word.lower()
+        found = set()
+        stack = [0]
+        while len(stack) > 0:
+            node = stack.pop()
+            node_distance = distance(word, self.labels[node])
+            if node_distance <= max_distance:
+                found.update(self.postings[node])
+            for edge, child in self.children[node].items():
+                if node_distance - max_distance <= edge <= node_distance + max_distance:
+                    stack.append(child)
+
+        return [self.results[position] for position in sorted(found)]
+
+    @classmethod
+    def get_candidate_key(cls, word: str, scorer: Scorer, max_distance: float) -> Optional[tuple]:
+        """ Return the key of the candidate labels of a lowercased word, or None if all labels are candidates.
+
+        Labels are filtered by length for the (normalized) Levenshtein distance, which is at least the difference
+        in length, and by shared tokens for the Jaccard distance below 1 (see :meth:`_LabelIndex.get_candidates`).
+        Words with the same key have the same candidates.
+
+        :param word: the lowercased word
+        :param scorer: the scorer
+        :param max_distance: the maximum distance
+        """
+
+        from .scorers import LevenshteinScorer, NormalizedLevenshteinScorer, TokenScorer
+
+        if isinstance(scorer, LevenshteinScorer):
+            return "length", len(word), max_distance, False
+        elif isinstance(scorer, NormalizedLevenshteinScorer):
+            return "length", len(word), max_distance, True
+        elif isinstance(scorer, TokenScorer) and max_distance < 1:
+            return "tokens", scorer.tokenize(word) or frozenset([""])  # i.e., labels without tokens are kept apart
+
+        return None
+
+    def get_candidates(self, key: tuple) -> List[int]:
+        """ Return the labels that can be within the maximum distance of the words with a candidate key.
+
+        No label within the maximum distance is left out.
+
+        :param key: the candidate key (see :meth:`_LabelIndex.get_candidate_key`)
+        """
+
+        if key[0] == "length":
+            if self._lengths is None:
+                self._lengths = dict()
+                for node, label in enumerate(self.labels):
+                    self._lengths.setdefault(len(label), []).append(node)
+            _, length, max_distance, normalized = key
+            # (with a small tolerance for the rounding of normalized distances):
+            return [node for label_length, nodes in sorted(self._lengths.items())
+                    if abs(length - label_length) <= max_distance * (max(length, label_length) if normalized else 1)
+                    + 1e-9 for node in nodes]
+
+        from .scorers import TokenScorer
+
+        if self._tokens is None:
+            self._tokens = dict()
+            for node, label in enumerate(self.labels):
+                for token in TokenScorer.tokenize(label) or [""]:
+                    self._tokens.setdefault(token, []).append(node)
+        candidates = set()
+        for token in key[1]:
+            candidates.update(self._tokens.get(token, []))
+
+        return sorted(candidates)
+
+    def search_batch(self, words: List[str], scorer: Scorer, max_distance: float) -> List[List[Dict]]:
+        """ Return, per word, the raw results with a label within the maximum distance of a scorer.
+
+        Labels are scored in batches (see :meth:`bartocsuggest.Scorer.score_batch`) instead of searching the BK-tree,
+        which only holds for the Levenshtein distance. Words are grouped by their candidate labels, and each group is
+        only compared with its candidates (see :meth:`_LabelIndex.get_candidate_key`), in slices so that a batch holds
+        at most max_cells distances.
+
+        :param words: the words
+        :param scorer: the scorer
+        :param max_distance: the maximum distance
+        """
+
+        words = [word.lower() for word in words]
+        groups = dict()
+        for position, word in enumerate(words):
+            groups.setdefault(self.get_candidate_key(word, scorer, max_distance), []).append(position)
+
+        batch = [dict() for _ in words]
+        for key, positions in groups.items():
+            if key is None:
+                candidates, labels = None, self.labels
+            else:
+                candidates = self.get_candidates(key)
+                labels = [self.labels[node] for node in candidates]
+            step = max(1, self.max_cells // len(positions))
+            for start in range(0, len(labels), step):
+                distances = scorer.score_batch([words[position] for position in positions],
+                                               labels[start:start + step],
+                                               max_distance)
+                for position, word_distances in zip(positions, distances):
+                    if candidates is None:
+                        batch[position].update({start + column: value for column, value in word_distances.items()})
+                    else:
+                        batch[position].update({candidates[start + column]: value
+                                                for column, value in word_distances.items()})
+
+        matches = []
+        for distances in batch:
+            found = set()
+            for node in distances:
+                found.update(self.postings[node])
+            matches.append([self.results[position] for position in sorted(found)])
+
+        return matches
+
+    def get_sources(self) -> Dict[str, int]:
+        """ Return the number of indexed results per source name. """
+
+        from . import _SourceResolver
+
+        resolver = _SourceResolver.get_default()
+        sources = dict()
+        for result in self.results:
+            name = resolver.resolve(result.get("uri"))
+            sources.update({name: sources.get(name, 0) + 1})
+
+        return sources
+
+    def save(self, filename: str) -> None:
+        """ Save the index as JSON file.
+
+        :param filename: the name of the file including its complete path
+        """
+
+        with open(filename, "w") as file:
+            dump({"version": self.version,
+                  "results": self.results,
+                  "labels": self.labels,
+                  "postings": self.postings,
+                  "children": [list(children.items()) for children in self.children]}, file)
+
+    @classmethod
+    def load(cls, filename: str) -> _LabelIndex:
+        """ Load an index from a JSON file.
+
+        :param filename: the name of the file including its complete path
+        """
+
+        with open(filename) as file:
+            dictionary = load(file)
+
+        if dictionary.get("version") != cls.version:
+            raise ValueError(f"Unsupported label index version {dictionary.get('version')}!")
+
+        index = _LabelIndex()
+        index.results = dictionary.get("results")
+        index._keys = {cls.make_key(result): position for position, result in enumerate(index.results)}
+        index.labels = dictionary.get("labels")
+        index.postings = dictionary.get("postings")
+        index.children = [dict(children) for children in dictionary.get("children")]
+        index._positions = {label: node for node, label in enumerate(index.labels)}
+
+        return index
+
+    @classmethod
+    def get_index(cls, index: Union[str, _LabelIndex]) -> _LabelIndex:
+        """ Return the index given an index or the path to a saved index.
+
+        :param index: the index or the path to the saved index
+        """
+
+        if type(index) is str:
+            return cls.load(index)
+
+        return index
+
+
+def main(arguments: List[str] = None) -> None:
+    """ Build a label index from the command line.
+
+    :param arguments: the command line arguments, defaults to None (i.e., sys.argv)
+    """
+
+    parser = ArgumentParser(prog="bartocsuggest-index",
+                            description="Build an offline label index from preloaded BARTOC FAST responses.")
+    parser.add_argument("folders", nargs="+", help="preload folders")
+    parser.add_argument("--output", required=True, help="the index file (JSON)")
+    parser.add_argument("--update", action="store_true", help="add to the existing index file")
+    options = parser.parse_args(arguments)
+
+    index = _LabelIndex()
+    if options.update is True and path.exists(options.output):
+        index = _LabelIndex.load(options.output)
+
+    for folder in options.folders:
+        count = index.add_preload_folder(folder)
+        print(f"{folder}: {count} responses added.")
+
+    index.save(options.output)
+    print(f"{len(index.results)} results with {len(index.labels)} labels from {len(index.get_sources())} sources"
+          f" saved to {options.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -58,7 +58,7 @@ class _Resource:
         for attribute in attributes:
 
             # define output for different objects (it shouldn't be cluttered):
-            if attribute is "from_scheme":
+            if attribute == "from_scheme" and "concepts" not in ignore:
                 ignore.append("concepts")
 
             # skip if attribute is ignored:
@@ -242,6 +242,29 @@ class _ConceptMapping(_Item):
                          url=url,
                          pref_label=pref_label)
 
+    def get_dict(self, ignore: list = None, references: bool = False) -> dict:
+        """ Get concept mapping as dictionary.
+
+        With references, the concept schemes are referred to by their URI only (e.g., if they are given once by the
+        concordance), see https://gbv.github.io/jskos/jskos.html#concept-mappings.
+
+        :param ignore: resource attributes that are ignored, defaults to None
+        :param references: toggle referring to the concept schemes by URI, defaults to False
+        """
+
+        if references is False:
+            return super().get_dict(ignore)
+
+        if ignore is None:
+            ignore = ["context", "url", "in_scheme", "concepts"]
+        dictionary = super().get_dict(ignore + ["from_scheme", "to_scheme"])
+        for attribute in ["from_scheme", "to_scheme"]:
+            scheme = self.__dict__.get(attribute)
+            if scheme is not None:
+                dictionary.update({self.get_string(attribute): {"uri": scheme.uri}})
+
+        return dictionary
+
 
 class _Concordance(_Item):
     """ https://gbv.github.io/jskos/jskos.html#concordances """
@@ -264,3 +287,25 @@ class _Concordance(_Item):
                          context=context,
                          url=url,
                          pref_label=pref_label)
+
+    def get_dict(self, ignore: list = None, references: bool = False) -> dict:
+        """ Get concordance as dictionary.
+
+        With references, the concept schemes are given once by the concordance and each mapping refers to them by
+        URI. The output is smaller and faster to make for concordances with many mappings.
+
+        :param ignore: resource attributes that are ignored, defaults to None
+        :param references: toggle referring to the concept schemes by URI in the mappings, defaults to False
+        """
+
+        if references is False:
+            return super().get_dict(ignore)
+
+        if ignore is None:
+            ignore = ["context", "url", "in_scheme", "concepts"]
+        dictionary = super().get_dict(ignore + ["mappings"])
+        if self.mappings is not None:
+            dictionary.update({"mappings": [mapping.get_dict(list(ignore), references=True)
+                                            for mapping in self.mappings]})
+
+        return dictionary
@@ -0,0 +1,135 @@
+""" matrix.py
+
+Columnar export of the scored word × source distance matrix of a session.
+
+Export a session with ``session.export_matrix("my/matrix.parquet")`` and load it, e.g., with
+``pyarrow.parquet.read_table("my/matrix.parquet")``. The optional pyarrow module is required
+(``pip install bartocsuggest[arrow]``). """
+
+from __future__ import annotations
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import Session, _Score
+    from .scorers import Scorer
+
+FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow"}
+
+
+class _DistanceMatrix:
+    """ The best distance per word and source in a columnar format (Apache Arrow or Parquet).
+
+    Each row holds a word, a source, the best distance between them, the matched label and the URI of the matched
+    result. Rows are written in record batches directly from the score vectors of the session, i.e., the matrix is
+    never held in memory as a whole. Pruned sources have no score vectors and are left out.
+    """
+
+    @classmethod
+    def get_schema(cls, scorer: Scorer):
+        """ Return the Arrow schema of the matrix.
+
+        :param scorer: the session's scorer
+        """
+
+        import pyarrow
+
+        return pyarrow.schema([("word", pyarrow.string()),
+                               ("source", pyarrow.string()),
+                               ("distance", pyarrow.int64() if scorer.integral is True else pyarrow.float64()),
+                               ("label", pyarrow.string()),
+                               ("uri", pyarrow.string())])
+
+    @classmethod
+    def get_label(cls, scorer: Scorer, word: str, score: _Score) -> Optional[str]:
+        """ Return the label of a score's result with the best distance to the word.
+
+        :param scorer: the session's scorer
+        :param word: the lowercased word
+        :param score: the score
+        """
+
+        result = score.comparans
+        best = None
+        for label_string in [result.pref_label, result.alt_label, result.hidden_label, result.definition]:
+            if label_string is None:
+                continue
+            for foundword in label_string.split(";"):
+                distance = scorer.distance(word, foundword.lower())
+                if best is None or distance < best[0]:
+                    best = (distance, foundword)
+
+        return None if best is None else best[1]
+
+    @classmethod
+    def write(cls,
+              session: Session,
+              filename: str,
+              format: str = None,
+              sensitivity: float = None,
+              batch_size: int = 65536) -> Optional[int]:
+        """ Write the distance matrix of a session and return the number of rows.
+
+        :param session: the session
+        :param filename: the name of the file including its complete path
+        :param format: "parquet" or "arrow" (i.e., the Arrow IPC file format), defaults to None (i.e., by extension)
+        :param sensitivity: only write distances within the sensitivity, defaults to None (i.e., all distances)
+        :param batch_size: the number of rows per record batch, defaults to 65536
+        """
+
+        try:
+            import pyarrow
+        except ImportError:
+            print("ERROR: The pyarrow module is required to export the matrix! Install bartocsuggest[arrow].")
+            return None
+
+        if format is None:
+            from os import path
+
+            format = FORMATS.get(path.splitext(filename)[1].lower(), "parquet")
+        if format not in ["parquet", "arrow"]:
+            raise ValueError(f"Format {format} must be 'parquet' or 'arrow'!")
+
+        scorer = session._scorer
+        schema = cls.get_schema(scorer)
+        if format == "parquet":
+            import pyarrow.parquet
+
+            writer = pyarrow.parquet.ParquetWriter(filename, schema)
+        else:
+            import pyarrow.ipc
+
+            writer = pyarrow.ipc.new_file(filename, schema)
+
+        columns = [[] for _ in schema.names]
+        rows = 0
+
+        def flush() -> None:
+            writer.write_batch(pyarrow.record_batch([pyarrow.array(column, type=field.type)
+                                                     for column, field in zip(columns, schema)], schema=schema))
+            for column in columns:
+                column.clear()
+
+        try:
+            with session._lock:
+                sources = list(session._sources)
+            for source in sources:
+                with session._lock:
+                    scores = list(source.levenshtein_vector._vector)
+                for score in scores:
+                    if sensitivity is not None and score.value > sensitivity:
+                        continue
+                    word = score.comparandum.get_pref_label()
+                    columns[0].append(word)
+                    columns[1].append(source.uri)
+                    columns[2].append(score.value)
+                    columns[3].append(cls.get_label(scorer, word.lower(), score))
+                    columns[4].append(score.comparans.uri)
+                    rows += 1
+                    if len(columns[0]) >= batch_size:
+                        flush()
+            if len(columns[0]) > 0 or rows == 0:
+                flush()
+        finally:
+            writer.close()
+
+        return rows
@@ -0,0 +1,168 @@
+""" pipeline.py
+
+Pipelined querying of BARTOC FAST: fetching, scoring and merging of responses overlap.
+
+Use the pipeline with ``session.suggest(workers=8, processes=4)``: eight threads fetch the responses, four processes
+score them, and the session merges the scores in input order. """
+
+from __future__ import annotations
+from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from . import _Query, _SourceResolver
+from .transport import _TransportError
+
+if TYPE_CHECKING:
+    from . import Session, _ResourceMonitor
+    from .jskos import _Concept
+
+
+class _QueryPipeline:
+    """ Fetches, scores and merges the queries of a session in overlapping stages.
+
+    The responses are fetched (and parsed) by a pool of threads. They are scored by the same threads or, with
+    processes, by a pool of processes, so that scoring uses all cores while the threads wait for the network. The
+    scores are merged into the session's sources by the calling thread in input order, i.e., the result is the same
+    as querying the words one by one. At most queue_size words are in flight across all stages: new queries are only
+    sent once the oldest has been merged (backpressure), which keeps the memory for pending responses bounded.
+
+    :param session: the session
+    :param workers: the number of threads fetching responses, defaults to 1
+    :param processes: the number of processes scoring responses, defaults to 0 (i.e., the threads score responses)
+    :param queue_size: the maximum number of words in flight, defaults to None (i.e., 4 * (workers + processes))
+    """
+
+    def __init__(self,
+                 session: Session,
+                 workers: int = 1,
+                 processes: int = 0,
+                 queue_size: int = None) -> None:
+        self.session = session
+        self.workers = workers
+        self.processes = processes
+        self.queue_size = queue_size or 4 * (workers + processes)
+        self._fetchers = ThreadPoolExecutor(max_workers=workers)
+        self._scorers = None
+        if processes > 0:
+            from concurrent.futures import ProcessPoolExecutor
+
+            # the scoring processes resolve result URIs like this process:
+            self._scorers = ProcessPoolExecutor(max_workers=processes,
+                                                initializer=_SourceResolver.set_default,
+                                                initargs=(_SourceResolver.get_default(),))
+
+    def __enter__(self) -> _QueryPipeline:
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        """ Stop the threads and processes of the pipeline. """
+
+        self._fetchers.shutdown()
+        if self._scorers is not None:
+            self._scorers.shutdown()
+
+    def fetch(self, query: _Query) -> Optional[List[Dict]]:
+        """ Return the raw results of a query, or None if the query could not be fetched.
+
+        :param query: the query
+        """
+
+        self.session._check_deadline()
+        try:
+            return query.get_response().get("results") or []
+        except _TransportError as error:
+            self.session._add_failed(query.concept, error)
+            return None
+
+    def score(self, query: _Query) -> Optional[Dict[str, Tuple[float, Dict]]]:
+        """ Fetch and score a query in a thread (see :meth:`bartocsuggest._Query.score_results`).
+
+        :param query: the query
+        """
+
+        results = self.fetch(query)
+        if results is None:
+            return None
+
+        return _Query.score_results(query.concept.get_pref_label(), results, self.session._scorer)
+
+    def submit(self, query: _Query) -> Future:
+        """ Send a query through the fetching and scoring stages; return the future of its best results per source.
+
+        :param query: the query
+        """
+
+        if self._scorers is None:
+            return self._fetchers.submit(self.score, query)
+
+        future = Future()
+
+        def scored(score_future: Future) -> None:
+            try:
+                future.set_result(score_future.result())
+            except BaseException as exception:
+                future.set_exception(exception)
+
+        def fetched(fetch_future: Future) -> None:
+            try:
+                results = fetch_future.result()
+                if results is None:
+                    future.set_result(None)
+                    return
+                self._scorers.submit(_Query.score_results,
+                                     query.concept.get_pref_label(),
+                                     results,
+                                     self.session._scorer).add_done_callback(scored)
+            except BaseException as exception:
+                future.set_exception(exception)
+
+        self._fetchers.submit(self.fetch, query).add_done_callback(fetched)
+
+        return future
+
+    def run(self,
+            concepts: List[_Concept],
+            monitor: _ResourceMonitor = None,
+            verbose: bool = False) -> Set[str]:
+        """ Query BARTOC FAST for the concepts and update the session's sources; return the URIs of updated sources.
+
+        :param concepts: the concepts
+        :param monitor: adaptively disable unproductive resources, defaults to None
+        :param verbose: toggle status updates along the way, defaults to False
+        """
+
+        updated = set()
+        pending = deque()
+        concepts = iter(concepts)
+
+        while True:
+            # fill the pipeline:
+            while len(pending) < self.queue_size:
+                self.session._check_deadline()
+                concept = next(concepts, None)
+                if concept is None:
+                    break
+                query = _Query(concept=concept,
+                               disabled=None if monitor is None else monitor.get_disabled(),
+                               budget=self.session._retry_budget)
+                pending.append((query, self.submit(query)))
+            if len(pending) == 0:
+                break
+
+            # merge the oldest query:
+            query, future = pending.popleft()
+            kept = future.result()
+            if kept is None:
+                continue
+            best = query.apply_scores(self.session, kept)
+            if monitor is not None:
+                monitor.observe(best)
+            updated.update(best.keys())
+            if verbose is True:
+                print(f"Fetched '{query.concept.get_pref_label()}'.")
+
+        return updated
@@ -0,0 +1,280 @@
+""" scorers.py
+
+Similarity scorers that compare the input words with the labels of BARTOC FAST results. """
+
+from __future__ import annotations
+from typing import Dict, List
+from abc import ABC, abstractmethod
+
+from .cache import _DistanceMemo
+
+
+class Scorer(ABC):
+    """ A scorer measures the distance between words and labels (the lower the better).
+
+    Scorers work on batches: :meth:`bartocsuggest.Scorer.score_batch` compares many words with many labels in one
+    call. If the optional rapidfuzz module is installed (``pip install bartocsuggest[fast]``), batches are scored
+    in native code; otherwise they are scored pair by pair.
+
+    There are four scorer classes: :class:`bartocsuggest.LevenshteinScorer` (the default),
+    :class:`bartocsuggest.NormalizedLevenshteinScorer`, :class:`bartocsuggest.JaroWinklerScorer` and
+    :class:`bartocsuggest.TokenScorer`. The sensitivity of a suggestion is given in the units of the scorer. Custom
+    scorers subclass this abstract class and implement :meth:`bartocsuggest.Scorer.distance`.
+
+    :param cutoff: the maximum distance kept (larger distances are dropped while scoring), defaults to None
+    """
+
+    name = None
+    integral = False  # i.e., whether the distances are integers
+    _cdist = None
+
+    def __init__(self, cutoff: float = None) -> None:
+        self.cutoff = cutoff
+
+    def __str__(self) -> str:
+        return self.name
+
+    @classmethod
+    def get_cdist(cls):
+        """ Return rapidfuzz's batch scoring function (if installed). """
+
+        if Scorer._cdist is None:
+            try:
+                import numpy
+                from rapidfuzz.process import cdist
+
+                Scorer._cdist = cdist
+            except ImportError:
+                Scorer._cdist = False
+
+        return Scorer._cdist or None
+
+    def get_native(self):
+        """ Return the equivalent rapidfuzz scorer (if any). """
+
+        return None
+
+    def is_native(self) -> bool:
+        """ Return whether batches are scored in native code (i.e., rapidfuzz is installed and has the scorer). """
+
+        return self.get_cdist() is not None and self.get_native() is not None
+
+    @abstractmethod
+    def distance(self, word: str, label: str) -> float:
+        """ Return the distance between a word and a label.
+
+        :param word: the word
+        :param label: the label
+        """
+
+    def score_batch(self, words: List[str], labels: List[str], cutoff: float = None) -> List[Dict[int, float]]:
+        """ Return the distances between words and labels.
+
+        For each word, the distances are given by label position; distances above the cutoff are left out. Words
+        and labels are compared as given (i.e., callers lowercase them).
+
+        :param words: the words
+        :param labels: the labels
+        :param cutoff: the maximum distance kept, defaults to None (i.e., the scorer's cutoff)
+        """
+
+        if cutoff is None:
+            cutoff = self.cutoff
+        if len(words) == 0 or len(labels) == 0:
+            return [dict() for _ in words]
+
+        if self.is_native() is False:
+            return self.score_pairs(words, labels, cutoff)
+        cdist = self.get_cdist()
+        native = self.get_native()
+
+        import numpy
+
+        # normalized distances are at most 1:
+        if self.integral is True:
+            dtype, native_cutoff = None, cutoff
+        else:
+            dtype, native_cutoff = numpy.float64, None if cutoff is None else min(cutoff, 1)
+        matrix = cdist(words, labels, scorer=native, score_cutoff=native_cutoff, dtype=dtype)
+        batch = [dict() for _ in words]
+        if cutoff is None:
+            rows, columns = (matrix >= 0).nonzero()
+        else:
+            rows, columns = (matrix <= cutoff).nonzero()
+        for row, column, value in zip(rows.tolist(), columns.tolist(), matrix[rows, columns].tolist()):
+            batch[row].update({column: value})
+
+        return batch
+
+    def score_labels(self, word: str, labels: List[str], cutoff: float = None) -> Dict[int, float]:
+        """ Return the distances between a word and labels by label position.
+
+        Distances are looked up in the process-wide memo of word-label distances (see
+        :class:`bartocsuggest.cache._DistanceMemo`) first; only the remaining labels are scored in one batch.
+
+        :param word: the word
+        :param labels: the labels
+        :param cutoff: the maximum distance kept, defaults to None (i.e., the scorer's cutoff)
+        """
+
+        if cutoff is None:
+            cutoff = self.cutoff
+
+        def score(missing: List[str]) -> List[float]:
+            distances = self.score_batch([word], missing, cutoff)[0]
+            return [distances.get(position) for position in range(len(missing))]
+
+        values = _DistanceMemo.get_default().get_distances((self.name, cutoff, word), labels, score)
+
+        return {position: value for position, value in enumerate(values) if value is not None}
+
+    def score_pairs(self, words: List[str], labels: List[str], cutoff: float = None) -> List[Dict[int, float]]:
+        """ Return the distances between words and labels scored pair by pair.
+
+        :param words: the words
+        :param labels: the labels
+        :param cutoff: the maximum distance kept, defaults to None
+        """
+
+        batch = []
+        for word in words:
+            distances = dict()
+            for position, label in enumerate(labels):
+                value = self.distance(word, label)
+                if cutoff is None or value <= cutoff:
+                    distances.update({position: value})
+            batch.append(distances)
+
+        return batch
+
+
+class LevenshteinScorer(Scorer):
+    """ The Levenshtein distance, i.e., the number of edits between word and label.
+
+    See https://en.wikipedia.org/wiki/Levenshtein_distance.
+    """
+
+    name = "levenshtein"
+    integral = True
+
+    def get_native(self):
+        from rapidfuzz.distance import Levenshtein
+
+        return Levenshtein.distance
+
+    def distance(self, word: str, label: str) -> int:
+        import Levenshtein
+
+        return Levenshtein.distance(word, label)
+
+
+class NormalizedLevenshteinScorer(Scorer):
+    """ The Levenshtein distance divided by the length of the longer string (between 0 and 1).
+
+    Unlike the Levenshtein distance, the normalized distance does not penalize long words.
+    """
+
+    name = "normalized-levenshtein"
+
+    def get_native(self):
+        from rapidfuzz.distance import Levenshtein
+
+        return Levenshtein.normalized_distance
+
+    def distance(self, word: str, label: str) -> float:
+        import Levenshtein
+
+        longest = max(len(word), len(label))
+        if longest == 0:
+            return 0.0
+
+        return Levenshtein.distance(word, label) / longest
+
+
+class JaroWinklerScorer(Scorer):
+    """ The Jaro-Winkler distance, i.e., one minus the Jaro-Winkler similarity (between 0 and 1).
+
+    Matches with a common prefix are favored. See https://en.wikipedia.org/wiki/Jaro%E2%80%93Winkler_distance.
+    """
+
+    name = "jaro-winkler"
+
+    def get_native(self):
+        from rapidfuzz.distance import JaroWinkler
+
+        return JaroWinkler.normalized_distance
+
+    def distance(self, word: str, label: str) -> float:
+        import Levenshtein
+
+        return 1 - Levenshtein.jaro_winkler(word, label)
+
+
+class TokenScorer(Scorer):
+    """ The Jaccard distance between the sets of tokens (i.e., words) of word and label (between 0 and 1).
+
+    The order of the tokens is ignored, e.g., "stock exchange" and "exchange, stock" have distance 0.
+    Use this scorer for multi-word terms.
+    """
+
+    name = "token"
+
+    @classmethod
+    def tokenize(cls, string: str) -> frozenset:
+        """ Return the set of tokens of a string.
+
+        :param string: the string
+        """
+
+        return frozenset(token.strip(".,;:()[]\"'") for token in string.split()) - {""}
+
+    def distance(self, word: str, label: str) -> float:
+        return self.jaccard(self.tokenize(word), self.tokenize(label))
+
+    @classmethod
+    def jaccard(cls, tokens: frozenset, other_tokens: frozenset) -> float:
+        """ Return the Jaccard distance between two sets of tokens.
+
+        :param tokens: the first set of tokens
+        :param other_tokens: the second set of tokens
+        """
+
+        union = len(tokens | other_tokens)
+        if union == 0:
+            return 0.0
+
+        return 1 - len(tokens & other_tokens) / union
+
+    def score_pairs(self, words: List[str], labels: List[str], cutoff: float = None) -> List[Dict[int, float]]:
+        # labels are tokenized once per batch; below a cutoff of 1, only labels sharing a token are compared:
+        label_tokens = [self.tokenize(label) for label in labels]
+        postings = dict()
+        for position, tokens in enumerate(label_tokens):
+            for token in tokens:
+                postings.setdefault(token, []).append(position)
+
+        batch = []
+        for word in words:
+            tokens = self.tokenize(word)
+            if cutoff is None or cutoff >= 1:
+                candidates = range(len(labels))
+            else:
+                candidates = set()
+                for token in tokens:
+                    candidates.update(postings.get(token, []))
+                if len(tokens) == 0:
+                    candidates.update(position for position, other in enumerate(label_tokens) if len(other) == 0)
+            distances = dict()
+            for position in candidates:
+                value = self.jaccard(tokens, label_tokens[position])
+                if cutoff is None or value <= cutoff:
+                    distances.update({position: value})
+            batch.append(distances)
+
+        return batch
+
+
+SCORERS = {scorer.name: scorer for scorer in [LevenshteinScorer,
+                                              NormalizedLevenshteinScorer,
+                                              JaroWinklerScorer,
+                                              TokenScorer]}
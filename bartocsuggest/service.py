@@ -0,0 +1,262 @@
+""" service.py
+
+Long-running HTTP service that suggests vocabularies for word lists or texts.
+
+Run with ``bartocsuggest-service --port 8080`` or ``python -m bartocsuggest.service --port 8080``; add ``--stub`` to
+answer queries locally without contacting BARTOC FAST. """
+
+from __future__ import annotations
+from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import BoundedSemaphore
+from time import monotonic
+from json import dumps, loads
+from argparse import ArgumentParser
+
+from . import Session, AnnifSession, Suggestion, SCORE_TYPES, SCORERS, get_stats
+from .cache import _ResponseCache
+from .transport import _Transport, _StubTransport, FAST_API, SELECTIONS
+
+
+class _SuggestionService:
+    """ An HTTP service that suggests vocabularies.
+
+    All requests share the process-wide connection pool and response cache. Requests are handled by a bounded pool of
+    workers; if all workers and queue slots are taken, further requests are rejected with status 503.
+
+    :param host: the host to bind to, defaults to "127.0.0.1"
+    :param port: the port to bind to, defaults to 8080
+    :param workers: the number of requests handled at the same time, defaults to 4
+    :param queue: the number of requests waiting for a worker, defaults to 16
+    :param timeout: the timeout of a request in seconds, defaults to 300
+    :param query_workers: the number of concurrent BARTOC FAST queries per request, defaults to 4
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 8080,
+                 workers: int = 4,
+                 queue: int = 16,
+                 timeout: float = 300,
+                 query_workers: int = 4) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.query_workers = query_workers
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._slots = BoundedSemaphore(workers + queue)
+
+    @classmethod
+    def validate(cls, request: object) -> None:
+        """ Raise ValueError if a request is not a JSON object or has options of the wrong type.
+
+        :param request: the parsed request body
+        """
+
+        if type(request) is not dict:
+            raise ValueError("Request body must be a JSON object!")
+
+        words = request.get("words")
+        if words is not None and (type(words) is not list or any(type(word) is not str for word in words)):
+            raise ValueError("'words' must be a list of strings!")
+        for key in ["text", "project_id", "language", "score_type", "scorer"]:
+            if request.get(key) is not None and type(request.get(key)) is not str:
+                raise ValueError(f"'{key}' must be a string!")
+        for key in ["sensitivity", "threshold"]:
+            if request.get(key) is not None and type(request.get(key)) not in [int, float]:
+                raise ValueError(f"'{key}' must be a number!")
+        for key in ["max", "limit"]:
+            if request.get(key) is not None and type(request.get(key)) is not int:
+                raise ValueError(f"'{key}' must be an integer!")
+        concordances = request.get("concordances")
+        if concordances is not None and type(concordances) is not int and \
+                (type(concordances) is not list or any(type(uri) is not str for uri in concordances)):
+            raise ValueError("'concordances' must be an integer or a list of strings!")
+
+    def handle(self, request: Dict, deadline: float = None) -> Dict:
+        """ Return the suggestion (and concordances) for a request.
+
+        The request MUST contain either "words" (a list of strings) or "text" and "project_id" (for Annif).
+        Optional keys are "language", "sensitivity", "score_type" (Recall, Average, Coverage or Sum), "scorer"
+        (levenshtein, normalized-levenshtein, jaro-winkler or token), "max", and "concordances" (a list of vocabulary
+        URIs, or an integer for the top vocabularies). The response lists the words that could not be fetched from
+        BARTOC FAST as "unfetched".
+
+        :param request: the parsed request body
+        :param deadline: the time (see time.monotonic) after which the request stops querying BARTOC FAST, defaults
+            to None
+        """
+
+        self.validate(request)
+        scorer = SCORERS.get(request.get("scorer", "levenshtein"))
+        if scorer is None:
+            raise ValueError(f"Unknown scorer {request.get('scorer')}!")
+
+        if request.get("words") is not None:
+            session = Session(request.get("words"), language=request.get("language", "und"), scorer=scorer())
+        elif request.get("text") is not None:
+            session = AnnifSession(request.get("text"),
+                                   project_id=request.get("project_id"),
+                                   limit=request.get("limit"),
+                                   threshold=request.get("threshold"),
+                                   scorer=scorer())
+        else:
+            raise ValueError("Request must contain 'words' or 'text'!")
+
+        score_type = SCORE_TYPES.get(request.get("score_type", "Recall"))
+        if score_type is None:
+            raise ValueError(f"Unknown score type {request.get('score_type')}!")
+
+        suggestion = session.suggest(sensitivity=request.get("sensitivity", 1),
+                                     score_type=score_type,
+                                     workers=self.query_workers,
+                                     deadline=deadline)
+
+        return {"suggestion": suggestion.get(scores=True, max=request.get("max")),
+                "concordances": self.get_concordances(suggestion, request.get("concordances")),
+                "unfetched": [concept.get_pref_label() for concept in session._failed]}
+
+    def get_concordances(self, suggestion: Suggestion, selection: object) -> Dict[str, Dict]:
+        """ Return the concordances of the selected vocabularies as JSKOS dictionaries.
+
+        :param suggestion: the suggestion
+        :param selection: a list of vocabulary URIs, or the number of top vocabularies, or None
+        """
+
+        if selection is None:
+            return dict()
+        elif type(selection) is int:
+            selection = suggestion.get(max=selection)
+
+        concordances = dict()
+        for vocabulary_uri in selection:
+            concordance = suggestion._get_concordance(vocabulary_uri)
+            if concordance is not None:
+                concordances.update({vocabulary_uri: concordance.get_dict()})
+
+        return concordances
+
+    def submit(self, request: Dict) -> Tuple[int, Dict]:
+        """ Handle a request in the worker pool and return the HTTP status and the response body.
+
+        :param request: the parsed request body
+        """
+
+        if self._slots.acquire(blocking=False) is False:
+            return 503, {"error": "Service is busy, try again later."}
+
+        # the handler stops querying at the deadline, which frees its worker:
+        future = self._executor.submit(self.handle, request, monotonic() + self.timeout)
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return 200, future.result(timeout=self.timeout)
+        except (FutureTimeoutError, TimeoutError):
+            future.cancel()
+            return 504, {"error": f"Request timed out after {self.timeout} seconds."}
+        except (ValueError, TypeError) as exception:
+            return 400, {"error": str(exception)}
+        except Exception as exception:
+            return 500, {"error": f"{type(exception).__name__}: {exception}"}
+
+    def get_status(self) -> Dict:
+        """ Return the status of the service. """
+
+        return {"status": "ok", **get_stats()}
+
+    def serve(self) -> None:
+        """ Serve requests until interrupted. """
+
+        server = ThreadingHTTPServer((self.host, self.port), _ServiceHandler)
+        server.service = self
+        print(f"bartocsuggest service listening on http://{self.host}:{self.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self._executor.shutdown(wait=False)
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    """ HTTP request handler of :class:`_SuggestionService`.
+
+    POST /suggest takes a JSON request (see :meth:`_SuggestionService.handle`), GET /status returns the status.
+    """
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/status":
+            self.respond(200, self.server.service.get_status())
+        else:
+            self.respond(404, {"error": f"Unknown path {self.path}!"})
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/suggest":
+            self.respond(404, {"error": f"Unknown path {self.path}!"})
+            return None
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = loads(self.rfile.read(length))
+        except ValueError:
+            self.respond(400, {"error": "Request body must be JSON!"})
+            return None
+
+        self.respond(*self.server.service.submit(request))
+
+    def respond(self, status: int, body: Dict) -> None:
+        """ Send a JSON response.
+
+        :param status: the HTTP status
+        :param body: the response body
+        """
+
+        data = dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main(arguments: List[str] = None) -> None:
+    """ Run the suggestion service from the command line.
+
+    :param arguments: the command line arguments, defaults to None (i.e., sys.argv)
+    """
+
+    parser = ArgumentParser(prog="bartocsuggest-service", description="Serve vocabulary suggestions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4, help="number of requests handled at the same time")
+    parser.add_argument("--queue", type=int, default=16, help="number of requests waiting for a worker")
+    parser.add_argument("--timeout", type=float, default=300, help="request timeout in seconds")
+    parser.add_argument("--query-workers", type=int, default=4, help="concurrent BARTOC FAST queries per request")
+    parser.add_argument("--cache-size", type=int, default=64, help="response cache size in MB")
+    parser.add_argument("--endpoint", action="append", metavar="URL[=WEIGHT]",
+                        help="a BARTOC FAST endpoint or mirror (repeat for several endpoints)")
+    parser.add_argument("--selection", default="weighted", choices=SELECTIONS, help="endpoint selection")
+    parser.add_argument("--health-interval", type=float, default=None, help="seconds between health checks")
+    parser.add_argument("--stub", action="store_true", help="answer queries locally without BARTOC FAST")
+    options = parser.parse_args(arguments)
+
+    _ResponseCache.get_default().max_bytes = options.cache_size * 1024 * 1024
+    if options.stub is True:
+        _Transport.set_default(_StubTransport())
+    elif options.endpoint is not None or options.health_interval is not None:
+        _Transport.set_default(_Transport.from_specs(options.endpoint or [FAST_API],
+                                                     selection=options.selection,
+                                                     health_interval=options.health_interval))
+
+    service = _SuggestionService(host=options.host,
+                                 port=options.port,
+                                 workers=options.workers,
+                                 queue=options.queue,
+                                 timeout=options.timeout,
+                                 query_workers=options.query_workers)
+    service.serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+""" shard.py
+
+Sharded execution of a large word list on several machines.
+
+Run each shard with ``bartocsuggest-shard run words.txt --shard 0 --shards 4 --output part-0.state`` (e.g., on four
+machines with their own BARTOC FAST quota), then merge the partial states into the exact suggestion and concordances
+over all words with ``bartocsuggest-shard merge part-*.state --output results/``. """
+
+from __future__ import annotations
+from typing import Dict, List
+from argparse import ArgumentParser
+from glob import glob
+from os import path, makedirs
+from time import time
+
+from . import Session, SCORE_TYPES, SCORERS
+from .transport import _Transport, _StubTransport, SELECTIONS
+from .utility import _Utility
+
+
+def run_shard(filename: str,
+              shard: int,
+              shards: int,
+              output: str,
+              language: str = "und",
+              sensitivity: int = 1,
+              score_type: str = "Recall",
+              scorer: str = "levenshtein",
+              workers: int = 4,
+              top_k: int = None) -> Dict:
+    """ Fetch the words of a shard and save its partial state; return a summary.
+
+    :param filename: the word list file
+    :param shard: the shard (from 0 to shards - 1)
+    :param shards: the number of shards
+    :param output: the name of the state file including its complete path
+    :param language: the language of the words given as RFC 3066 language tag, defaults to "und"
+    :param sensitivity: the maximum allowed distance between word and result, defaults to 1
+    :param score_type: the name of the score type, defaults to "Recall"
+    :param scorer: the name of the scorer, defaults to "levenshtein"
+    :param workers: the number of concurrent BARTOC FAST queries, defaults to 4
+    :param top_k: prune sources that cannot enter the top-k of the shard, defaults to None
+    """
+
+    start = time()
+    words = _Utility.iter_file(filename, language)
+    if words is None:
+        return {"file": filename, "shard": shard, "status": "error"}
+
+    session = Session(words, language=language, scorer=SCORERS[scorer]())
+    if top_k is not None:
+        # the pruner needs the number of remaining words, i.e., count the shard's words in a first pass:
+        session._set_shard(shard, shards)
+        session._stream_size = sum(1 for word in _Utility.iter_file(filename, language)
+                                   if session._in_shard(word) is True)
+    session.suggest(sensitivity=sensitivity,
+                    score_type=SCORE_TYPES[score_type],
+                    workers=workers,
+                    top_k=top_k,
+                    shard=shard,
+                    shards=shards)
+    session.save_state(output)
+
+    summary = {"file": filename,
+               "status": "ok",
+               "shard": shard,
+               "shards": shards,
+               "words": session._get_word_count(),
+               "sources": len(session._sources),
+               "unfetched": len(session._failed),
+               "output": output,
+               "seconds": round(time() - start, 2)}
+    print(f"Shard {shard} of {shards}: {summary.get('words')} words, {summary.get('sources')} sources saved to"
+          f" {output} ({summary.get('seconds')} seconds).")
+
+    return summary
+
+
+def merge_shards(filenames: List[str], output_folder: str, top: int = 20, mappings: bool = False) -> Dict:
+    """ Merge the partial states of all shards, save the suggestion, concordances and merged state; return a summary.
+
+    :param filenames: the names of the state files including their complete paths
+    :param output_folder: the path to the output folder
+    :param top: the number of top vocabularies for which concordances are saved, defaults to 20
+    :param mappings: toggle also saving the mappings in the NDJSON format, defaults to False
+    """
+
+    start = time()
+    makedirs(output_folder, exist_ok=True)
+    folder = path.join(output_folder, "")
+
+    session = Session.merge_states(filenames)
+    suggestion = session.rerank()
+    vocabularies = suggestion.get(scores=True)
+    _Utility.save_json({"states": filenames,
+                        "words": session._get_word_count(),
+                        "sensitivity": session._sensitivity,
+                        "score_type": session._score_type.__str__(),
+                        "scorer": str(session._scorer),
+                        "suggestion": vocabularies},
+                       folder, "suggestion")
+    suggestion.export_concordances(folder, top=top, mappings=mappings)
+    session.save_state(path.join(folder, "merged.state"))
+
+    summary = {"states": len(filenames),
+               "words": session._get_word_count(),
+               "vocabularies": len(vocabularies),
+               "seconds": round(time() - start, 2)}
+    print(f"{summary.get('states')} states merged: {summary.get('words')} words, {summary.get('vocabularies')}"
+          f" vocabularies ({summary.get('seconds')} seconds).")
+
+    return summary
+
+
+def main(arguments: List[str] = None) -> None:
+    """ Run a shard or merge shards from the command line.
+
+    :param arguments: the command line arguments, defaults to None (i.e., sys.argv)
+    """
+
+    parser = ArgumentParser(prog="bartocsuggest-shard", description="Suggest vocabularies for a sharded word list.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="fetch the words of one shard and save its partial state")
+    run.add_argument("input", help="the word list file")
+    run.add_argument("--shard", type=int, required=True, help="the shard (from 0 to shards - 1)")
+    run.add_argument("--shards", type=int, required=True, help="the number of shards")
+    run.add_argument("--output", required=True, help="the partial state file")
+    run.add_argument("--language", default="und", help="RFC 3066 language tag of the words")
+    run.add_argument("--sensitivity", type=float, default=1.0, help="maximum distance in the units of the scorer")
+    run.add_argument("--score-type", default="Recall", choices=sorted(SCORE_TYPES))
+    run.add_argument("--scorer", default="levenshtein", choices=sorted(SCORERS))
+    run.add_argument("--workers", type=int, default=4, help="concurrent BARTOC FAST queries")
+    run.add_argument("--top-k", type=int, default=None, help="prune sources that cannot enter the top-k")
+    run.add_argument("--endpoint", action="append", metavar="URL[=WEIGHT]",
+                     help="a BARTOC FAST endpoint or mirror (repeat for several endpoints)")
+    run.add_argument("--selection", default="weighted", choices=SELECTIONS, help="endpoint selection")
+    run.add_argument("--stub", action="store_true", help="answer queries locally without BARTOC FAST")
+
+    merge = commands.add_parser("merge", help="merge the partial states of all shards")
+    merge.add_argument("states", nargs="+", help="partial state files or glob patterns")
+    merge.add_argument("--output", required=True, help="output folder")
+    merge.add_argument("--top", type=int, default=20, help="save concordances of the top vocabularies")
+    merge.add_argument("--mappings", action="store_true", help="also save the mappings as NDJSON")
+
+    options = parser.parse_args(arguments)
+
+    if options.command == "run":
+        if options.stub is True:
+            _Transport.set_default(_StubTransport())
+        elif options.endpoint is not None:
+            _Transport.set_default(_Transport.from_specs(options.endpoint, selection=options.selection))
+        sensitivity = options.sensitivity
+        if sensitivity.is_integer() is True:
+            sensitivity = int(sensitivity)
+        run_shard(filename=options.input,
+                  shard=options.shard,
+                  shards=options.shards,
+                  output=options.output,
+                  language=options.language,
+                  sensitivity=sensitivity,
+                  score_type=options.score_type,
+                  scorer=options.scorer,
+                  workers=options.workers,
+                  top_k=options.top_k)
+    else:
+        filenames = sorted(set(filename for pattern in options.states for filename in glob(pattern)))
+        merge_shards(filenames, options.output, top=options.top, mappings=options.mappings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+""" state.py
+
+Binary snapshots of the scored state of a session for warm restarts.
+
+Save a session with ``session.save_state("my/session.state")`` and restore it with
+``Session.load_state("my/session.state")``. """
+
+from __future__ import annotations
+from typing import Optional, TYPE_CHECKING
+from array import array
+from struct import Struct
+from sys import byteorder
+
+if TYPE_CHECKING:
+    from . import Session
+
+# header: magic, version, string count, string bytes, concept count, source count, score count, word count,
+# scheme URI, language, score type, scorer, sensitivity (strings are given by their position in the string table):
+HEADER = Struct("<4sIQQIIQQIIIId")
+MAGIC = b"BSST"
+NONE = 0xFFFFFFFF  # i.e., position of a missing string
+CONCEPT_FIELDS = 3  # i.e., word, notation, in scheme
+SOURCE_FIELDS = 2  # i.e., name, coverage of a pruned source
+SCORE_FIELDS = 7  # i.e., source, concept, result URI, prefLabel, altLabel, hiddenLabel, definition
+
+
+class _SessionState:
+    """ The scored state of a session in a compact binary format.
+
+    The file consists of a fixed header followed by aligned little-endian tables: the string offsets (uint64), the
+    UTF-8 string data, the score values and the score sums and sensitivities of pruned sources (float64), and the
+    concept, source and score tables (uint32). Every string is stored once and referenced by its position. Loading
+    reads the tables as typed views of the file (i.e., no responses are parsed or scored), decodes every string once
+    and rebuilds the concepts, sources and scores as Python objects; the file is closed afterwards.
+
+    The state contains the input words, the sources and their best scores per word (or the counters of pruned
+    sources), the scorer, and the sensitivity and score type of the last suggestion. Streamed words that were
+    consumed are counted but only kept if they have a score.
+    """
+
+    version = 3
+
+    def __init__(self) -> None:
+        self.strings = []
+        self._positions = dict()
+
+    def add_string(self, string: Optional[str]) -> int:
+        """ Return the position of a string in the string table (add it if new).
+
+        :param string: the string
+        """
+
+        if string is None:
+            return NONE
+
+        position = self._positions.get(string)
+        if position is None:
+            position = len(self.strings)
+            self.strings.append(string)
+            self._positions.update({string: position})
+
+        return position
+
+    @classmethod
+    def save(cls, session: Session, filename: str) -> None:
+        """ Save the scored state of a session.
+
+        :param session: the session
+        :param filename: the name of the file including its complete path
+        """
+
+        from . import SCORERS
+
+        if SCORERS.get(session._scorer.name) is not type(session._scorer):
+            raise ValueError(f"The scorer {type(session._scorer).__name__} cannot be saved, "
+                             f"only the scorers {', '.join(SCORERS)} can!")
+
+        state = _SessionState()
+
+        with session._lock:
+            # collect the concepts (input words first, then streamed words with scores):
+            concepts = dict()
+            for concept in session._scheme.concepts:
+                concepts.setdefault(concept.get_pref_label(), (concept, 1))
+            for source in session._sources:
+                for score in source.levenshtein_vector.get_vector() or []:
+                    concepts.setdefault(score.comparandum.get_pref_label(), (score.comparandum, 0))
+
+            concept_table = array("I")
+            concept_positions = dict()
+            for position, (word, (concept, in_scheme)) in enumerate(concepts.items()):
+                notation = concept.notation[0] if concept.notation else None
+                concept_table.extend([state.add_string(word), state.add_string(notation), in_scheme])
+                concept_positions.update({word: position})
+
+            source_table = array("I")
+            score_table = array("I")
+            values = array("d")
+            counters = array("d")
+            for position, source in enumerate(session._sources):
+                if source._counters is None:
+                    source_table.extend([state.add_string(source.uri), NONE])
+                    counters.extend([0, 0])
+                else:
+                    source_table.extend([state.add_string(source.uri), source._counters[0]])
+                    counters.extend([source._counters[1], source._pruned_sensitivity])
+                for score in source.levenshtein_vector.get_vector() or []:
+                    result = score.comparans
+                    values.append(score.value)
+                    score_table.extend([position,
+                                        concept_positions.get(score.comparandum.get_pref_label()),
+                                        state.add_string(result.uri),
+                                        state.add_string(result.pref_label),
+                                        state.add_string(result.alt_label),
+                                        state.add_string(result.hidden_label),
+                                        state.add_string(result.definition)])
+
+            fields = (len(concepts),
+                      len(session._sources),
+                      len(score_table) // SCORE_FIELDS,
+                      session._get_word_count(),
+                      state.add_string(session._scheme.uri),
+                      state.add_string(session._language),
+                      state.add_string(session._score_type.__str__()),
+                      state.add_string(session._scorer.__str__()),
+                      session._sensitivity)
+
+        # make the string table:
+        data = bytearray()
+        offsets = array("Q", [0])
+        for string in state.strings:
+            data.extend(string.encode("utf-8"))
+            offsets.append(len(data))
+        data.extend(bytes(-len(data) % 8))
+
+        header = HEADER.pack(MAGIC, cls.version, len(state.strings), len(data), *fields)
+
+        with open(filename, "wb") as file:
+            file.write(header)
+            for table in [offsets, data, values, counters, concept_table, source_table, score_table]:
+                if byteorder == "big" and type(table) is array:
+                    table.byteswap()
+                file.write(table)
+
+    @classmethod
+    def read_table(cls, view: memoryview, typecode: str) -> memoryview:
+        """ Return a table of the mapped file as typed memory view.
+
+        :param view: the bytes of the table
+        :param typecode: the type of the table's elements, "I" (uint32) or "Q" (uint64)
+        """
+
+        if byteorder == "big":
+            table = array(typecode)
+            table.frombytes(view)
+            table.byteswap()
+            return memoryview(table)
+
+        return view.cast(typecode)
+
+    @classmethod
+    def load(cls, filename: str, session_class: type = None, preload_folder: str = None) -> Session:
+        """ Load a session from a saved state.
+
+        :param filename: the name of the file including its complete path
+        :param session_class: the class of the loaded session, defaults to None (i.e., :class:`bartocsuggest.Session`)
+        :param preload_folder: the path to the preload folder of the loaded session, defaults to None
+        """
+
+        from mmap import mmap, ACCESS_READ
+        from . import Session, SCORE_TYPES, SCORERS, _Result, _Score, _Source, _LevenshteinVector
+        from .utility import _Utility
+
+        with open(filename, "rb") as file:
+            mapped = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+        tables = []
+        try:
+            view = memoryview(mapped)
+            tables.append(view)
+            (magic, version, string_count, string_bytes, concept_count, source_count, score_count, word_count,
+             scheme_uri, language, score_type, scorer, sensitivity) = HEADER.unpack_from(view)
+            if magic != MAGIC or version != cls.version:
+                raise ValueError(f"{filename} is not a session state of version {cls.version}!")
+
+            # locate the tables:
+            start = HEADER.size
+            end = start + 8 * (string_count + 1)
+            offsets = cls.read_table(view[start:end], "Q")
+            data = view[end:end + string_bytes]
+            start = end + string_bytes
+            end = start + 8 * score_count
+            values = cls.read_table(view[start:end], "d")
+            start, end = end, end + 8 * 2 * source_count
+            counters = cls.read_table(view[start:end], "d")
+            start, end = end, end + 4 * CONCEPT_FIELDS * concept_count
+            concept_table = cls.read_table(view[start:end], "I")
+            start, end = end, end + 4 * SOURCE_FIELDS * source_count
+            source_table = cls.read_table(view[start:end], "I")
+            start, end = end, end + 4 * SCORE_FIELDS * score_count
+            score_table = cls.read_table(view[start:end], "I")
+            tables.extend([offsets, data, values, counters, concept_table, source_table, score_table])
+
+            strings = [str(data[offsets[position]:offsets[position + 1]], "utf-8")
+                       for position in range(string_count)]
+            strings.append(None)
+
+            def get_string(position: int) -> Optional[str]:
+                return strings[min(position, string_count)]
+
+            scorer_class = SCORERS.get(get_string(scorer))
+            if scorer_class is None:
+                raise ValueError(f"{filename} was saved with the unsupported scorer {get_string(scorer)}!")
+
+            # restore the session:
+            session = (session_class or Session).__new__(session_class or Session)
+            session._init_defaults(get_string(language))
+            session._scheme = _Utility.words2scheme(words=[], uri=get_string(scheme_uri), language=session._language)
+            session._setup(preload_folder, scorer_class())
+            if session._scorer.integral is True:
+                score_values = [int(value) for value in values]
+                sensitivity = int(sensitivity)
+            else:
+                score_values = values.tolist()
+            session._sensitivity = sensitivity
+            for score_type_class in SCORE_TYPES.values():
+                if score_type_class.__str__() == get_string(score_type):
+                    session._score_type = score_type_class
+
+            concepts = []
+            for position in range(0, CONCEPT_FIELDS * concept_count, CONCEPT_FIELDS):
+                concept = _Utility.word2concept(word=get_string(concept_table[position]),
+                                                scheme_uri=session._scheme.uri,
+                                                language=session._language,
+                                                notation=get_string(concept_table[position + 1]))
+                concepts.append(concept)
+                if concept_table[position + 2] == 1:
+                    session._scheme.concepts.append(concept)
+            session._streamed = word_count - len(session._scheme.concepts)
+
+            vectors = [[] for _ in range(source_count)]
+            for row, position in enumerate(range(0, SCORE_FIELDS * score_count, SCORE_FIELDS)):
+                result = _Result(uri=get_string(score_table[position + 2]),
+                                 pref_label=get_string(score_table[position + 3]),
+                                 alt_label=get_string(score_table[position + 4]),
+                                 hidden_label=get_string(score_table[position + 5]),
+                                 definition=get_string(score_table[position + 6]))
+                score = _Score(value=score_values[row],
+                               comparandum=concepts[score_table[position + 1]],
+                               comparans=result)
+                vectors[score_table[position]].append(score)
+
+            for position in range(source_count):
+                source = _Source(get_string(source_table[SOURCE_FIELDS * position]))
+                source.levenshtein_vector = _LevenshteinVector(vectors[position])
+                coverage = source_table[SOURCE_FIELDS * position + 1]
+                if coverage != NONE:
+                    score_sum, source._pruned_sensitivity = counters[2 * position], counters[2 * position + 1]
+                    if session._scorer.integral is True:
+                        score_sum, source._pruned_sensitivity = int(score_sum), int(source._pruned_sensitivity)
+                    source._counters = [coverage, score_sum]
+                    # words are only counted once by pruned sources:
+                    session._processed = set(concept.get_pref_label() for concept in concepts)
+                session._add_source(source)
+        finally:
+            # the views must be released before the file can be unmapped:
+            for table in reversed(tables):
+                table.release()
+            mapped.close()
+
+        return session
@@ -0,0 +1,500 @@
+""" transport.py
+
+HTTP transport to the BARTOC FAST API. """
+
+from __future__ import annotations
+from typing import Dict, List, Optional, Union, TYPE_CHECKING
+from threading import Lock, Thread
+from time import sleep, monotonic
+from random import uniform, choices, shuffle
+from zlib import crc32
+from urllib.parse import urlencode
+
+if TYPE_CHECKING:
+    import requests
+
+FAST_API = "https://bartoc-fast.ub.unibas.ch/bartocfast/api"
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}  # i.e., HTTP status codes of transient errors
+SELECTIONS = ["weighted", "latency"]
+PROBE = {"searchword": "test", "maxsearchtime": 1, "duplicates": "off"}  # i.e., the payload of health checks
+
+
+class _TransportError(ConnectionError):
+    """ A query that could not be answered by BARTOC FAST (after all retries, or while the circuit is open). """
+
+
+class _RetryBudget:
+    """ The number of retries left to all queries of a session.
+
+    Without a budget, every query of a long word list could retry the maximum number of times during an outage.
+
+    :param retries: the maximum number of retries, defaults to 100
+    """
+
+    def __init__(self, retries: int = 100) -> None:
+        self.retries = retries
+        self.used = 0
+        self._lock = Lock()
+
+    def spend(self) -> bool:
+        """ Take a retry from the budget; return False if the budget is exhausted. """
+
+        with self._lock:
+            if self.used >= self.retries:
+                return False
+            self.used += 1
+
+        return True
+
+
+class _CircuitBreaker:
+    """ Fails fast while BARTOC FAST is down.
+
+    After threshold consecutive failed requests, the circuit opens: requests are refused without contacting BARTOC
+    FAST. After the cooldown, a single probe request is let through (half-open); its success closes the circuit, its
+    failure opens it again for another cooldown.
+
+    :param threshold: the number of consecutive failures that open the circuit, defaults to 5
+    :param cooldown: the time in seconds until the circuit is probed again, defaults to 30
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened = 0  # i.e., how often the circuit opened
+        self._opened_at = None
+        self._probing = False
+        self._lock = Lock()
+
+    def get_state(self) -> str:
+        """ Return the state of the circuit: "closed", "open" or "half-open". """
+
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            elif self._probing is True or monotonic() - self._opened_at >= self.cooldown:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        """ Return True if a request may be sent. """
+
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            elif self._probing is False and monotonic() - self._opened_at >= self.cooldown:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """ Record a successful request and close the circuit. """
+
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """ Record a failed request and open the circuit if needed. """
+
+        with self._lock:
+            self.failures += 1
+            if self._probing is True or (self._opened_at is None and self.failures >= self.threshold):
+                self._opened_at = monotonic()
+                self.opened += 1
+            self._probing = False
+
+    def get_stats(self) -> Dict:
+        """ Return the state of the circuit and its statistics. """
+
+        return {"state": self.get_state(), "failures": self.failures, "opened": self.opened}
+
+
+class _Endpoint:
+    """ A BARTOC FAST endpoint, i.e., the public API or a self-hosted mirror.
+
+    :param url: the URL of the endpoint
+    :param weight: the share of the queries sent to this endpoint in weighted selection, defaults to 1
+    :param breaker: the circuit breaker of the endpoint, defaults to None (i.e., a new circuit breaker)
+    """
+
+    smoothing = 0.2  # i.e., the weight of the newest latency in the moving average
+
+    def __init__(self, url: str, weight: float = 1, breaker: _CircuitBreaker = None) -> None:
+        self.url = url
+        self.weight = weight
+        self.breaker = breaker or _CircuitBreaker()
+        self.latency = None  # i.e., the moving average of the response time in seconds
+        self.active = 0  # i.e., the number of requests in flight
+        self.requests = 0
+        self._lock = Lock()
+
+    def begin(self) -> None:
+        """ Count a request in flight. """
+
+        with self._lock:
+            self.active += 1
+            self.requests += 1
+
+    def end(self, seconds: Optional[float] = None) -> None:
+        """ Count a finished request and update the latency.
+
+        :param seconds: the response time of a successful request, defaults to None (i.e., the request failed)
+        """
+
+        with self._lock:
+            self.active -= 1
+            if seconds is not None:
+                if self.latency is None:
+                    self.latency = seconds
+                else:
+                    self.latency += self.smoothing * (seconds - self.latency)
+
+    def get_cost(self) -> float:
+        """ Return the expected time until a new request is answered (unknown endpoints are tried first). """
+
+        return (self.latency or 0) * (self.active + 1)
+
+    def get_stats(self) -> Dict:
+        """ Return the state and statistics of the endpoint. """
+
+        stats = {"url": self.url,
+                 "weight": self.weight,
+                 "latency": None if self.latency is None else round(self.latency, 3),
+                 "active": self.active,
+                 "requests": self.requests}
+        stats.update(self.breaker.get_stats())
+
+        return stats
+
+
+class _Transport:
+    """ A pooled HTTP connection to one or several BARTOC FAST endpoints.
+
+    All queries of a process share the default transport and hence its connection pool. With several endpoints (e.g.,
+    the public API and self-hosted mirrors), each request is sent to an available endpoint, chosen at random by
+    weight ("weighted") or by the least expected latency given the requests in flight ("latency"). Each endpoint has
+    its own circuit breaker: a failed request fails over to another available endpoint at once, and only backs off
+    once all endpoints have failed. Endpoints can be health-checked on demand or periodically.
+
+    :param url: the URL or the list of URLs of the BARTOC FAST endpoints, defaults to FAST_API
+    :param timeout: the timeout of a single HTTP request in seconds, defaults to 60
+    :param pool_size: the maximum number of pooled connections, defaults to 16
+    :param retries: the maximum number of retries of a single request, defaults to 5
+    :param backoff: the base of the exponential backoff between retries in seconds, defaults to 1
+    :param max_backoff: the maximum backoff between retries in seconds, defaults to 60
+    :param threshold: the number of consecutive failures that open the circuit of an endpoint, defaults to 5
+    :param cooldown: the time in seconds until an open circuit is probed again, defaults to 30
+    :param weights: the weights of the endpoints, defaults to None (i.e., equal weights)
+    :param selection: "weighted" or "latency", defaults to "weighted"
+    :param health_interval: the time in seconds between health checks of all endpoints, defaults to None (i.e.,
+        no periodic health checks)
+    :param verbose: toggle printing each retry to console, defaults to False
+    """
+
+    _default = None
+    _default_lock = Lock()
+
+    def __init__(self,
+                 url: Union[str, List[str]] = FAST_API,
+                 timeout: float = 60,
+                 pool_size: int = 16,
+                 retries: int = 5,
+                 backoff: float = 1,
+                 max_backoff: float = 60,
+                 threshold: int = 5,
+                 cooldown: float = 30,
+                 weights: List[float] = None,
+                 selection: str = "weighted",
+                 health_interval: float = None,
+                 verbose: bool = False) -> None:
+        urls = [url] if type(url) is str else list(url)
+        if len(urls) == 0:
+            raise ValueError("At least one endpoint is required!")
+        if weights is not None and len(weights) != len(urls):
+            raise ValueError(f"{len(weights)} weights given for {len(urls)} endpoints!")
+        if selection not in SELECTIONS:
+            raise ValueError(f"Selection {selection} must be 'weighted' or 'latency'!")
+        self.endpoints = [_Endpoint(url, weight, _CircuitBreaker(threshold, cooldown))
+                          for url, weight in zip(urls, weights or [1] * len(urls))]
+        self.url = urls[0]
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.selection = selection
+        self.health_interval = health_interval
+        self.verbose = verbose
+        self._health_thread = None
+        self._session = None
+        self._lock = Lock()
+
+    @classmethod
+    def from_specs(cls, specs: List[str], **kwargs) -> _Transport:
+        """ Return a transport for endpoints given as "URL" or "URL=WEIGHT" (e.g., from the command line).
+
+        :param specs: the endpoint specifications
+        :param **kwargs: further parameters of the transport
+        """
+
+        urls = []
+        weights = []
+        for spec in specs:
+            url, _, weight = spec.partition("=")
+            urls.append(url)
+            weights.append(float(weight or 1))
+
+        return _Transport(url=urls, weights=weights, **kwargs)
+
+    @classmethod
+    def get_default(cls) -> _Transport:
+        """ Return the process-wide transport. """
+
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = _Transport()
+
+        return cls._default
+
+    @classmethod
+    def set_default(cls, transport: Optional[_Transport]) -> None:
+        """ Set the process-wide transport.
+
+        :param transport: the transport, None resets to a new transport on next use
+        """
+
+        with cls._default_lock:
+            cls._default = transport
+
+    def get_session(self) -> requests.Session:
+        """ Return the pooled HTTP session (created on first use). """
+
+        import requests
+
+        with self._lock:
+            if self._session is None:
+                adapter = requests.adapters.HTTPAdapter(pool_connections=max(self.pool_size, len(self.endpoints)),
+                                                        pool_maxsize=self.pool_size)
+                self._session = requests.Session()
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+                if self.health_interval is not None:
+                    self._health_thread = Thread(target=self.run_health_checks, daemon=True)
+                    self._health_thread.start()
+
+        return self._session
+
+    def select(self, tried: List[_Endpoint]) -> Optional[_Endpoint]:
+        """ Return an available endpoint for the next request, preferably one that was not tried yet.
+
+        Return None if the circuits of all endpoints are open.
+
+        :param tried: the endpoints that already failed for this request
+        """
+
+        candidates = [endpoint for endpoint in self.endpoints if endpoint.breaker.get_state() != "open"]
+        untried = [endpoint for endpoint in candidates if endpoint not in tried]
+        candidates = untried or candidates
+        while len(candidates) > 0:
+            if self.selection == "weighted":
+                endpoint = choices(candidates, weights=[candidate.weight for candidate in candidates])[0]
+            else:
+                shuffle(candidates)  # i.e., ties are broken at random
+                endpoint = min(candidates, key=_Endpoint.get_cost)
+            # a half-open circuit admits only one probe:
+            if endpoint.breaker.allow() is True:
+                return endpoint
+            candidates.remove(endpoint)
+
+        return None
+
+    def check_health(self) -> Dict[str, bool]:
+        """ Send a short probe query to every endpoint and return whether each endpoint is healthy.
+
+        The result of a probe updates the endpoint's latency and circuit breaker, i.e., a healthy endpoint is
+        admitted again before its cooldown ends, and an unhealthy endpoint is avoided before real queries fail.
+        """
+
+        import requests
+
+        health = dict()
+        for endpoint in self.endpoints:
+            start = monotonic()
+            endpoint.begin()
+            try:
+                response = self.get_session().get(url=endpoint.url, params=PROBE, timeout=self.timeout)
+                healthy = response.ok is True
+            except requests.exceptions.RequestException:
+                healthy = False
+            if healthy is True:
+                endpoint.end(monotonic() - start)
+                endpoint.breaker.record_success()
+            else:
+                endpoint.end()
+                endpoint.breaker.record_failure()
+            health.update({endpoint.url: healthy})
+
+        return health
+
+    def run_health_checks(self) -> None:
+        """ Check the health of all endpoints every health_interval seconds (run in a daemon thread). """
+
+        while True:
+            sleep(self.health_interval)
+            self.check_health()
+
+    def get_stats(self) -> List[Dict]:
+        """ Return the state and statistics of all endpoints. """
+
+        return [endpoint.get_stats() for endpoint in self.endpoints]
+
+    def get_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """ Return the jittered exponential backoff before a retry in seconds.
+
+        The delay is drawn uniformly between 0 and the exponential backoff (i.e., "full jitter"), so that concurrent
+        queries do not retry at the same moment. A delay requested by the server is honoured (up to max_backoff).
+
+        :param attempt: the number of the failed attempt, starting with 0
+        :param retry_after: the delay requested by the server in seconds, defaults to None
+        """
+
+        delay = uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(self.max_backoff, retry_after))
+
+        return delay
+
+    @classmethod
+    def get_retry_after(cls, response: requests.Response) -> Optional[float]:
+        """ Return the delay requested by the Retry-After header of a response in seconds.
+
+        :param response: the HTTP response
+        """
+
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            from email.utils import parsedate_to_datetime
+            from datetime import datetime, timezone
+
+            try:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                return None
+
+    def fetch(self, payload: Dict, budget: _RetryBudget = None) -> Dict:
+        """ Fetch the parsed response for a payload.
+
+        Connection errors, timeouts, transient HTTP errors (see RETRY_STATUS) and invalid JSON fail over to another
+        available endpoint at once. Once all available endpoints have failed, the request is retried with jittered
+        exponential backoff, as long as the request's retries and the budget last and not all circuits are open.
+        Raise :class:`_TransportError` if the request fails.
+
+        :param payload: the query payload
+        :param budget: the retry budget of the session, defaults to None (i.e., only the request's retries)
+        """
+
+        import requests
+
+        attempt = 0
+        tried = []
+        while True:
+            endpoint = self.select(tried)
+            if endpoint is None:
+                raise _TransportError(f"BARTOC FAST is unavailable (circuit open after"
+                                      f" {max(endpoint.breaker.failures for endpoint in self.endpoints)}"
+                                      f" failed requests)!")
+
+            retry_after = None
+            start = monotonic()
+            endpoint.begin()
+            try:
+                response = self.get_session().get(url=endpoint.url, params=payload, timeout=self.timeout)
+            except requests.exceptions.RequestException as exception:
+                error = type(exception).__name__
+            else:
+                if response.status_code in RETRY_STATUS:
+                    error = f"HTTP {response.status_code}"
+                    retry_after = self.get_retry_after(response)
+                elif response.ok is False:
+                    # i.e., BARTOC FAST is up, but the request is not acceptable:
+                    endpoint.end()
+                    endpoint.breaker.record_success()
+                    raise _TransportError(f"BARTOC FAST answered HTTP {response.status_code} to"
+                                          f" '{payload.get('searchword')}'!")
+                else:
+                    try:
+                        parsed = response.json()
+                    except ValueError:
+                        error = "invalid JSON"
+                    else:
+                        endpoint.end(monotonic() - start)
+                        endpoint.breaker.record_success()
+                        return parsed
+
+            endpoint.end()
+            endpoint.breaker.record_failure()
+            tried.append(endpoint)
+            if len(self.endpoints) > 1:
+                error = f"{error} from {endpoint.url}"
+            if any(candidate not in tried and candidate.breaker.get_state() != "open"
+                   for candidate in self.endpoints):
+                continue  # i.e., fail over at once
+            if attempt >= self.retries or (budget is not None and budget.spend() is False):
+                raise _TransportError(f"BARTOC FAST request for '{payload.get('searchword')}' failed after"
+                                      f" {attempt + 1} attempts ({error})!")
+            delay = self.get_delay(attempt, retry_after)
+            if self.verbose is True:
+                print(f"{error} for '{payload.get('searchword')}'! Trying again in {delay:.1f} seconds...")
+            sleep(delay)
+            attempt += 1
+            tried = []
+
+
+class _StubTransport(_Transport):
+    """ A transport that answers queries locally without contacting BARTOC FAST.
+
+    Each word matches itself and slightly altered variants in a fixed set of made-up vocabularies, which
+    makes responses deterministic. Use this transport to run bartocsuggest (e.g., the service mode) offline.
+
+    :param hosts: the hosts of the made-up vocabularies, defaults to None
+    :param delay: the simulated latency per request in seconds, defaults to 0
+    """
+
+    def __init__(self, hosts: list = None, delay: float = 0) -> None:
+        if hosts is None:
+            hosts = ["stub-a.example.org", "stub-b.example.org", "stub-c.example.org", "stub-d.example.org"]
+        self.hosts = hosts
+        self.delay = delay
+        super().__init__(url="http://localhost/bartocfast/api")
+
+    def fetch(self, payload: Dict, budget: _RetryBudget = None) -> Dict:
+        """ Make a deterministic response for a payload.
+
+        :param payload: the query payload
+        :param budget: the retry budget of the session (unused), defaults to None
+        """
+
+        if self.delay > 0:
+            sleep(self.delay)
+
+        searchword = payload.get("searchword")
+        disabled = payload.get("disabled") or []
+        url = f"{self.url}?{urlencode(payload, doseq=True)}"
+        results = []
+
+        for position, host in enumerate(self.hosts):
+            seed = crc32(f"{host} {searchword}".encode("utf-8"))
+            if seed % 5 < position or host in disabled:
+                continue  # i.e., later hosts match fewer words
+            label = [searchword, searchword + "s", searchword + "es", searchword[::-1]][seed % 4]
+            results.append({"uri": f"http://{host}/concept/{seed}",
+                            "prefLabel": f"{label};{label.upper()}"})
+
+        return {"@context": {"results": {"@id": url}}, "results": results}
@@ -3,12 +3,12 @@
 Utility functions. """
 
 from __future__ import annotations
-from typing import Optional, Dict, List, Union
+from typing import Optional, Dict, List, Union, Iterable, Iterator
 from os import path
 from datetime import datetime
-from openpyxl import load_workbook
-from json import dump, dumps, load
-from annif_client import AnnifClient
+from json import dump, dumps, load, loads
+from csv import reader
+from threading import Lock
 
 from .jskos import _Concept, _ConceptScheme, _LanguageMap
 
@@ -16,10 +16,34 @@ from .jskos import _Concept, _ConceptScheme, _LanguageMap
 class _Utility:
     """ A collection of utility functions. """
 
+    file_types = [".xlsx", ".csv", ".tsv", ".txt", ".json", ".ndjson", ".jsonl"]  # i.e., supported by load_file
+    _annif_client = None
+    _annif_projects = dict()
+    _annif_lock = Lock()
+
     @classmethod
     def load_file(cls, filename: str, language: str = "und") -> Optional[_ConceptScheme]:
         """ Load a file.
 
+        Supported file types are XLSX, CSV and TSV (first column), plain text (one word per line), JSON (a list
+        of words or JSKOS concepts, or a JSKOS concept scheme) and NDJSON (one word or JSKOS concept per line).
+
+        :param filename: the name of the file including its complete path
+        :param language: the language of the words given as RFC 3066 language tag, defaults to "und"
+        """
+
+        words = cls.iter_file(filename, language)
+        if words is None:
+            return None
+
+        return cls.words2scheme(words=words, language=language)
+
+    @classmethod
+    def iter_file(cls, filename: str, language: str = "und") -> Optional[Iterator[str]]:
+        """ Return an iterator over the words of a file.
+
+        The file is read lazily (i.e., streamed) except for JSON files, which are parsed as a whole.
+
         :param filename: the name of the file including its complete path
         :param language: the language of the words given as RFC 3066 language tag, defaults to "und"
         """
@@ -30,44 +54,172 @@ class _Utility:
             return None
 
         # choose method depending on file type:
-        if filename.endswith(".xlsx"):
-            workbook = load_workbook(filename)
-            return cls.xlsx2scheme(workbook, language)
-        elif filename.endswith(".json"):
-            # TODO: add JSON support
-            pass
+        extension = path.splitext(filename)[1].lower()
+        if extension == ".xlsx":
+            return cls.iter_xlsx(filename)
+        elif extension == ".csv":
+            return cls.iter_csv(filename, delimiter=",")
+        elif extension == ".tsv":
+            return cls.iter_csv(filename, delimiter="\t")
+        elif extension == ".txt":
+            return cls.iter_text(filename)
+        elif extension == ".json":
+            return cls.iter_json(filename, language)
+        elif extension in [".ndjson", ".jsonl"]:
+            return cls.iter_ndjson(filename, language)
         else:
-            pass
+            print(f"ERROR: File type {extension} is not supported!")
+            return None
 
     @classmethod
-    def xlsx2scheme(cls, workbook, language: str = "und") -> _ConceptScheme:
-        """ Transform a XLSX workbook into a JSKOS concept scheme.
+    def iter_xlsx(cls, filename: str) -> Iterator[str]:
+        """ Yield the words of a XLSX file.
 
+        The workbook is opened in read-only mode, i.e., rows are streamed instead of loaded into memory.
         The XLSX workbook's data structure MUST be as follows: one column with one row per word.
 
+        :param filename: the name of the file including its complete path
+        """
+
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(filename, read_only=True)
+        try:
+            yield from cls.iter_workbook(workbook)
+        finally:
+            workbook.close()
+
+    @classmethod
+    def iter_workbook(cls, workbook) -> Iterator[str]:
+        """ Yield the words of a XLSX workbook.
+
         :param workbook: the XLSX workbook
-        :param language: the language of the words given as RFC 3066 language tag, defaults to "und"
         """
 
-        words = []
         for worksheet in workbook:
             for row in worksheet.iter_rows(min_row=1, min_col=1, max_col=1, values_only=True):
-                if row[0] is None:
+                if len(row) == 0 or row[0] is None:
                     continue
                 else:
-                    words.append(row[0])
+                    yield str(row[0])
 
-        return cls.words2scheme(words=words, language=language)
+    @classmethod
+    def iter_csv(cls, filename: str, delimiter: str = ",") -> Iterator[str]:
+        """ Yield the words in the first column of a CSV or TSV file.
+
+        :param filename: the name of the file including its complete path
+        :param delimiter: the column delimiter, defaults to ","
+        """
+
+        with open(filename, newline="", encoding="utf-8") as file:
+            for row in reader(file, delimiter=delimiter):
+                if len(row) == 0 or row[0].strip() == "":
+                    continue
+                yield row[0].strip()
+
+    @classmethod
+    def iter_text(cls, filename: str) -> Iterator[str]:
+        """ Yield the words of a plain text file with one word per line.
+
+        :param filename: the name of the file including its complete path
+        """
+
+        with open(filename, encoding="utf-8") as file:
+            for line in file:
+                word = line.strip()
+                if word != "":
+                    yield word
+
+    @classmethod
+    def iter_json(cls, filename: str, language: str = "und") -> Iterator[str]:
+        """ Yield the words of a JSON file.
+
+        The JSON file contains a list of words or JSKOS concepts, or a JSKOS concept scheme with concepts.
+
+        :param filename: the name of the file including its complete path
+        :param language: the preferred language of the JSKOS prefLabel, defaults to "und"
+        """
+
+        with open(filename, encoding="utf-8") as file:
+            json_object = load(file)
+
+        if type(json_object) is dict:
+            json_object = json_object.get("concepts", [])
+
+        for element in json_object:
+            word = cls.json2word(element, language)
+            if word is not None:
+                yield word
+
+    @classmethod
+    def iter_ndjson(cls, filename: str, language: str = "und") -> Iterator[str]:
+        """ Yield the words of a NDJSON file with one word or JSKOS concept per line.
+
+        :param filename: the name of the file including its complete path
+        :param language: the preferred language of the JSKOS prefLabel, defaults to "und"
+        """
+
+        with open(filename, encoding="utf-8") as file:
+            for number, line in enumerate(file, start=1):
+                if line.strip() == "":
+                    continue
+                try:
+                    element = loads(line)
+                except ValueError:
+                    print(f"ERROR: Line {number} of {filename} is not valid JSON and skipped!")
+                    continue
+                word = cls.json2word(element, language)
+                if word is not None:
+                    yield word
+
+    @classmethod
+    def json2word(cls, element: Union[str, Dict], language: str = "und") -> Optional[str]:
+        """ Return the word of a JSON element (a string or a JSKOS concept).
+
+        For a JSKOS concept, the word is the prefLabel in the given language or, if missing, in any language. A
+        prefLabel given as plain string is used as is. Elements without a usable word are skipped (i.e., None).
+
+        :param element: the JSON element
+        :param language: the preferred language of the JSKOS prefLabel, defaults to "und"
+        """
+
+        if type(element) is str:
+            word = element
+        elif type(element) is dict:
+            pref_label = element.get("prefLabel") or dict()
+            if type(pref_label) is dict:
+                word = pref_label.get(language) or next(iter(pref_label.values()), None)
+            else:
+                word = pref_label
+        else:
+            word = None
+
+        if type(word) is not str or word.strip() == "":
+            return None
+
+        return word.strip()
+
+    @classmethod
+    def xlsx2scheme(cls, workbook, language: str = "und") -> _ConceptScheme:
+        """ Transform a XLSX workbook into a JSKOS concept scheme.
+
+        The XLSX workbook's data structure MUST be as follows: one column with one row per word.
+
+        :param workbook: the XLSX workbook
+        :param language: the language of the words given as RFC 3066 language tag, defaults to "und"
+        """
+
+        return cls.words2scheme(words=cls.iter_workbook(workbook), language=language)
 
     @classmethod
     def words2scheme(cls,
-                     words: List[str],
+                     words: Iterable[str],
                      uri: str = None,
                      name: str = None,
                      language: str = "und") -> _ConceptScheme:
-        """ Transform a list of words into a JSKOS concept scheme.
+        """ Transform words into a JSKOS concept scheme.
 
-        :param words: the input words
+        :param words: the input words (any iterable, consumed lazily)
         :param uri: the URI of the concept scheme, defaults to None
         :param name: the name of the concept scheme, defaults to None
         :param language: the language of the concept scheme given as RFC 3066 language tag, defaults to "und"
@@ -85,7 +237,7 @@ class _Utility:
         for word in words:
             concept = cls.word2concept(word=word, scheme_uri=scheme.uri, language=language, notation=str(counter))
             scheme.concepts.append(concept)
-            counter =+ 1
+            counter += 1
 
         return scheme
 
@@ -122,6 +274,36 @@ class _Utility:
 
         return f"bartocsuggest:concept/{word}?language={language}"
 
+    @classmethod
+    def get_annif_client(cls):
+        """ Return the shared Annif client (created on first use). """
+
+        from annif_client import AnnifClient
+
+        with cls._annif_lock:
+            if cls._annif_client is None:
+                cls._annif_client = AnnifClient()
+
+        return cls._annif_client
+
+    @classmethod
+    def get_annif_project(cls, annif_project_id: str) -> Dict:
+        """ Return the details of an Annif project.
+
+        Project details are fetched once per process and then cached.
+
+        :param annif_project_id: Annif API project identifier
+        """
+
+        with cls._annif_lock:
+            project = cls._annif_projects.get(annif_project_id)
+        if project is None:
+            project = cls.get_annif_client().get_project(annif_project_id)
+            with cls._annif_lock:
+                cls._annif_projects.update({annif_project_id: project})
+
+        return project
+
     @classmethod
     def annif2jskos(cls, annif_suggestion: List[dict], annif_project_id: str) -> _ConceptScheme:
         """ Transform an Annif suggestion into a JSKOS concept scheme.
@@ -131,8 +313,7 @@ class _Utility:
         """
 
         # get project details:
-        annif = AnnifClient()
-        project = annif.get_project(annif_project_id)
+        project = cls.get_annif_project(annif_project_id)
         language = project.get("language")
         name = project.get("name")
 
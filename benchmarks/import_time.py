@@ -0,0 +1,74 @@
+""" import_time.py
+
+Benchmark the startup cost of ``import bartocsuggest``.
+
+Each run imports bartocsuggest in a fresh interpreter. The benchmark fails (exit status 1) if a heavy dependency is
+imported eagerly or if the median import time exceeds the budget. Run from the repository root:
+
+    python benchmarks/import_time.py --runs 10 --budget 150
+"""
+
+from __future__ import annotations
+from typing import List, Tuple
+from argparse import ArgumentParser
+from statistics import median
+from subprocess import run
+from os import path
+import sys
+
+HEAVY = ["requests", "Levenshtein", "annif_client", "openpyxl"]
+
+SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import bartocsuggest
+elapsed = time.perf_counter() - start
+print(elapsed * 1000)
+print(",".join(name for name in {heavy} if name in sys.modules))
+"""
+
+
+def measure(runs: int) -> Tuple[List[float], List[str]]:
+    """ Return the import times in milliseconds and the eagerly imported heavy dependencies.
+
+    :param runs: the number of fresh interpreters
+    """
+
+    root = path.dirname(path.dirname(path.abspath(__file__)))
+    timings = []
+    eager = set()
+
+    for _ in range(runs):
+        process = run([sys.executable, "-c", SNIPPET.format(heavy=HEAVY)],
+                      cwd=root, capture_output=True, text=True, check=True)
+        lines = process.stdout.strip().split("\n")
+        timings.append(float(lines[0]))
+        if len(lines) > 1 and lines[1] != "":
+            eager.update(lines[1].split(","))
+
+    return timings, sorted(eager)
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the startup cost of 'import bartocsuggest'.")
+    parser.add_argument("--runs", type=int, default=10, help="number of fresh interpreters")
+    parser.add_argument("--budget", type=float, default=150, help="maximum median import time in milliseconds")
+    options = parser.parse_args()
+
+    timings, eager = measure(options.runs)
+    print(f"import bartocsuggest: median {median(timings):.1f} ms, min {min(timings):.1f} ms"
+          f" over {options.runs} runs")
+
+    failed = False
+    if len(eager) > 0:
+        print(f"FAIL: heavy dependencies imported eagerly: {', '.join(eager)}")
+        failed = True
+    if median(timings) > options.budget:
+        print(f"FAIL: median import time exceeds budget of {options.budget} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
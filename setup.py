@@ -13,6 +13,14 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/MHindermann/bartocsuggest",
     packages=setuptools.find_packages(),
+    entry_points={
+        "console_scripts": [
+            "bartocsuggest-service=bartocsuggest.service:main",
+            "bartocsuggest-batch=bartocsuggest.batch:main",
+            "bartocsuggest-index=bartocsuggest.index:main",
+            "bartocsuggest-shard=bartocsuggest.shard:main",
+        ],
+    },
     install_requires=[
         "urllib3",
         "requests",
@@ -20,6 +28,10 @@ setuptools.setup(
         "openpyxl",
         "annif-client",
     ],
+    extras_require={
+        "fast": ["rapidfuzz"],
+        "arrow": ["pyarrow"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
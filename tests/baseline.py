@@ -0,0 +1,119 @@
+""" A one-word-at-a-time baseline of the suggestions, computed without the session's machinery. """
+
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+import Levenshtein
+
+from bartocsuggest import Recall, Average, Coverage, Sum, _SourceResolver
+from bartocsuggest.transport import _Transport
+
+SCORE_TYPES = [Recall, Average, Coverage, Sum]
+
+
+def fetch(word: str) -> List[Dict]:
+    """ Return the raw results of BARTOC FAST for a word.
+
+    :param word: the word
+    """
+
+    return _Transport.get_default().fetch({"searchword": word}).get("results")
+
+
+def get_labels(result: Dict) -> List[str]:
+    """ Return the lowercased labels of a raw result in all languages.
+
+    :param result: the raw result
+    """
+
+    labels = []
+    for key in ["prefLabel", "altLabel", "hiddenLabel", "definition"]:
+        if result.get(key) is not None:
+            labels.extend(label.lower() for label in result.get(key).split(";"))
+
+    return labels
+
+
+def get_best_results(words: List[str],
+                     search: Callable[[str], List[Dict]] = fetch,
+                     distance: Callable[[str, str], float] = Levenshtein.distance) -> Dict[str, Dict[str, Tuple]]:
+    """ Return the best distance and result URI per source and word, searching the words one by one.
+
+    :param words: the words
+    :param search: returns the raw results for a word, defaults to querying BARTOC FAST
+    :param distance: the distance between a word and a label, defaults to the Levenshtein distance
+    """
+
+    best = dict()
+    for word in words:
+        for result in search(word):
+            value = min(distance(word.lower(), label) for label in get_labels(result))
+            source = best.setdefault(_SourceResolver.get_default().resolve(result.get("uri")), dict())
+            if word not in source or value < source[word][0]:
+                source.update({word: (value, result.get("uri"))})
+
+    return best
+
+
+def get_baseline(words: List[str], sensitivity: float, score_type, **kwargs) -> Dict[str, float]:
+    """ Return the score of every ranked source, computed one word at a time.
+
+    :param words: the words
+    :param sensitivity: the maximum distance
+    :param score_type: the score type
+    :param kwargs: the search and distance of :func:`get_best_results`
+    """
+
+    scores = dict()
+    for name, source in get_best_results(words, **kwargs).items():
+        values = [value for value, _ in source.values() if value <= sensitivity]
+        if len(values) == 0:
+            continue
+        scores.update({name: {Recall: len(values) / len(words),
+                              Average: round(sum(values) / len(values), 2),
+                              Coverage: len(values),
+                              Sum: sum(values)}[score_type]})
+
+    return scores
+
+
+def get_mappings(words: List[str], source: str, sensitivity: int) -> Dict[str, str]:
+    """ Return the result URI matched to each word by a source within the sensitivity.
+
+    :param words: the words
+    :param source: the source name
+    :param sensitivity: the maximum distance
+    """
+
+    return {word: uri for word, (value, uri) in get_best_results(words).get(source, dict()).items()
+            if value <= sensitivity}
+
+
+def assert_suggestion(suggestion, expected: Dict[str, float]) -> None:
+    """ Check that a suggestion has the expected scores and is sorted from best to worst.
+
+    :param suggestion: the suggestion
+    :param expected: the expected score per source
+    """
+
+    ranked = suggestion.get(scores=True)
+    assert {name: score for name, score in ranked} == pytest.approx(expected)
+    values = [score for _, score in ranked]
+    reverse = suggestion.get_score_type() is Recall
+    assert values == sorted(values, reverse=reverse)
+
+
+def get_concordance(suggestion, source: str) -> Dict[str, str]:
+    """ Return the result URI matched to each word in the concordance of a source.
+
+    :param suggestion: the suggestion
+    :param source: the source name
+    """
+
+    concordance = suggestion._get_concordance(source)
+    mappings = dict()
+    for mapping in concordance.mappings:
+        word = next(iter(mapping.from_.member_set)).get_pref_label()
+        mappings.update({word: next(iter(mapping.to.member_set)).uri})
+
+    return mappings
@@ -0,0 +1,43 @@
+""" Shared fixtures: an offline BARTOC FAST and preload folders. """
+
+from typing import List
+
+import pytest
+
+from bartocsuggest import Session
+from bartocsuggest.cache import _ResponseCache, _DistanceMemo
+from bartocsuggest.transport import _Transport, _StubTransport
+
+WORDS = ["stock", "bond", "auction", "market", "exchange", "broker", "dividend", "equity", "futures", "hedge",
+         "index", "option", "portfolio", "share", "yield", "asset", "capital", "credit", "debt", "fund",
+         "inflation", "interest", "liquidity", "loan", "margin", "price", "risk", "security", "trade", "value"]
+
+
+@pytest.fixture(autouse=True)
+def offline():
+    """ Answer all queries with the deterministic stub transport and start with empty process-wide caches. """
+
+    _Transport.set_default(_StubTransport())
+    _ResponseCache.get_default().clear()
+    _DistanceMemo.get_default().clear()
+    yield
+    _Transport.set_default(None)
+    _ResponseCache.get_default().clear()
+    _DistanceMemo.get_default().clear()
+
+
+@pytest.fixture
+def words() -> List[str]:
+    return list(WORDS)
+
+
+@pytest.fixture
+def preload_folder(tmp_path, words) -> str:
+    """ Return a preload folder with the responses for all words. """
+
+    folder = tmp_path / "preload"
+    folder.mkdir()
+    Session(words, str(folder) + "/").preload()
+
+    return str(folder) + "/"
+
@@ -0,0 +1,86 @@
+""" The offline label index finds exactly the results a brute-force search over all labels finds. """
+
+import pytest
+
+from bartocsuggest import Session, Recall, LevenshteinScorer, NormalizedLevenshteinScorer, JaroWinklerScorer, \
+    TokenScorer
+from bartocsuggest.index import _LabelIndex
+from baseline import SCORE_TYPES, get_baseline, get_labels, assert_suggestion
+
+SCORERS = [(LevenshteinScorer(), 2), (NormalizedLevenshteinScorer(), 0.3), (JaroWinklerScorer(), 0.2),
+           (TokenScorer(), 0.5)]
+
+
+def search_all(index, word, scorer, max_distance):
+    """ Return the results with a label within the maximum distance, scoring every label. """
+
+    return [result for result in index.results
+            if any(scorer.distance(word.lower(), label) <= max_distance for label in get_labels(result))]
+
+
+def get_uris(results):
+    return set(result.get("uri") for result in results)
+
+
+@pytest.fixture
+def index(preload_folder):
+    index = _LabelIndex()
+    index.add_preload_folder(preload_folder)
+
+    return index
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 2, 4])
+def test_search_matches_brute_force(index, words, max_distance):
+    for word in words + ["stocks", "bnod", "xyz"]:
+        assert get_uris(index.search(word, max_distance)) == \
+            get_uris(search_all(index, word, LevenshteinScorer(), max_distance))
+
+
+@pytest.mark.parametrize("scorer, max_distance", SCORERS)
+@pytest.mark.parametrize("max_cells", [2 ** 22, 7])
+def test_search_batch_matches_brute_force(index, words, scorer, max_distance, max_cells):
+    index.max_cells = max_cells
+    queries = words + ["stock exchange", "bond market", "stocks"]
+
+    for word, results in zip(queries, index.search_batch(queries, scorer, max_distance)):
+        assert get_uris(results) == get_uris(search_all(index, word, scorer, max_distance))
+
+
+def test_save_and_load(tmp_path, index, words):
+    index.save(str(tmp_path / "index.json"))
+    loaded = _LabelIndex.load(str(tmp_path / "index.json"))
+
+    for word in words:
+        assert loaded.search(word, 2) == index.search(word, 2)
+    assert loaded.get_sources() == index.get_sources()
+
+
+@pytest.mark.parametrize("sensitivity", [0, 1, 2, 3])
+@pytest.mark.parametrize("score_type", SCORE_TYPES)
+def test_offline_suggestion_matches_baseline(index, words, sensitivity, score_type):
+    suggestion = Session(words).suggest(offline_index=index, sensitivity=sensitivity, score_type=score_type)
+
+    # the index matches each word against the labels of all responses, not only against those of its own:
+    expected = get_baseline(words, sensitivity, score_type,
+                            search=lambda word: search_all(index, word, LevenshteinScorer(), sensitivity))
+    assert_suggestion(suggestion, expected)
+
+
+@pytest.mark.parametrize("scorer, max_distance", SCORERS[1:])
+def test_offline_suggestion_with_other_scorers(index, words, scorer, max_distance):
+    suggestion = Session(words, scorer=scorer).suggest(offline_index=index, sensitivity=max_distance)
+
+    expected = get_baseline(words, max_distance, Recall, distance=scorer.distance,
+                            search=lambda word: search_all(index, word, scorer, max_distance))
+    assert_suggestion(suggestion, expected)
+
+
+def test_offline_stream_with_known_size_prunes(index, words):
+    session = Session(iter(words), chunk_size=5)
+    session._stream_size = len(words)
+    suggestion = session.suggest(offline_index=index, sensitivity=1, top_k=1)
+
+    expected = get_baseline(words, 1, Recall)
+    assert suggestion.get(scores=True)[0][1] == pytest.approx(max(expected.values()))
+    assert any(source._counters is not None for source in session._sources)
@@ -0,0 +1,91 @@
+""" The query pipeline merges responses in input order, whatever order they arrive in. """
+
+from threading import Lock
+from time import sleep, monotonic
+from zlib import crc32
+
+import pytest
+
+from bartocsuggest import Session, Recall
+from bartocsuggest.pipeline import _QueryPipeline
+from bartocsuggest.transport import _Transport, _StubTransport, _TransportError
+from baseline import get_baseline, assert_suggestion
+
+
+class _ShuffledTransport(_StubTransport):
+    """ A stub transport whose responses arrive in a scrambled order; it counts the requests in flight. """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.active = 0
+        self.peak = 0
+        self._active_lock = Lock()
+
+    def fetch(self, payload, budget=None):
+        with self._active_lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            sleep(crc32(payload.get("searchword").encode("utf-8")) % 7 / 1000)
+            return super().fetch(payload, budget)
+        finally:
+            with self._active_lock:
+                self.active -= 1
+
+
+def get_vectors(session):
+    """ Return the word and value of every score of every source in order. """
+
+    return {source.uri: [(score.comparandum.get_pref_label(), score.value)
+                         for score in source.levenshtein_vector.get_vector() or []]
+            for source in session._sources}
+
+
+@pytest.mark.parametrize("workers, processes", [(8, 0), (3, 2)])
+def test_pipeline_keeps_input_order(words, workers, processes):
+    _Transport.set_default(_ShuffledTransport())
+    sequential = Session(words)
+    sequential.suggest(sensitivity=2)
+
+    pipelined = Session(words)
+    pipelined.suggest(sensitivity=2, workers=workers, processes=processes)
+
+    assert get_vectors(pipelined) == get_vectors(sequential)
+    assert [source.uri for source in pipelined._sources] == [source.uri for source in sequential._sources]
+
+
+def test_pipeline_bounds_the_words_in_flight(words):
+    transport = _ShuffledTransport()
+    _Transport.set_default(transport)
+    session = Session(words)
+
+    with _QueryPipeline(session, workers=8, queue_size=3) as pipeline:
+        pipeline.run(session._scheme.concepts)
+
+    assert transport.peak <= 3
+
+
+def test_pipeline_reports_failed_words(words):
+    class _FailingTransport(_StubTransport):
+        def fetch(self, payload, budget=None):
+            if payload.get("searchword") in words[:3]:
+                raise _TransportError("unavailable")
+            return super().fetch(payload, budget)
+
+    _Transport.set_default(_FailingTransport())
+    session = Session(words)
+    session.suggest(workers=4)
+
+    assert sorted(concept.get_pref_label() for concept in session._failed) == sorted(words[:3])
+    _Transport.set_default(_StubTransport())
+    assert_suggestion(session.retry_failed(), get_baseline(words, 1, Recall))
+    assert session._failed == []
+
+
+def test_deadline_stops_fetching(words):
+    session = Session(words)
+
+    with pytest.raises(TimeoutError):
+        session.suggest(workers=4, deadline=monotonic())
+    assert session._deadline is None
+
@@ -0,0 +1,50 @@
+""" Pruning sources that cannot enter the top-k keeps the top-k of the baseline. """
+
+import pytest
+
+from bartocsuggest import Session, Recall
+from baseline import SCORE_TYPES, get_baseline, get_mappings, get_concordance
+
+
+def assert_top_k(suggestion, expected, top_k):
+    ranked = suggestion.get(scores=True)
+    reverse = suggestion.get_score_type() is Recall
+    assert [score for _, score in ranked[:top_k]] == pytest.approx(sorted(expected.values(), reverse=reverse)[:top_k])
+    for name, score in ranked[:top_k]:
+        assert score == pytest.approx(expected[name])
+
+
+@pytest.mark.parametrize("score_type", SCORE_TYPES)
+@pytest.mark.parametrize("top_k", [1, 2])
+def test_top_k_matches_baseline(words, score_type, top_k):
+    session = Session(words, chunk_size=5)
+    suggestion = session.suggest(sensitivity=1, score_type=score_type, top_k=top_k)
+
+    assert_top_k(suggestion, get_baseline(words, 1, score_type), top_k)
+    for name in suggestion.get(max=top_k):
+        assert get_concordance(suggestion, name) == get_mappings(words, name, 1)
+
+
+def test_top_k_prunes_sources(words):
+    session = Session(words, chunk_size=5)
+    session.suggest(sensitivity=1, top_k=1)
+
+    assert any(source._counters is not None for source in session._sources)
+
+
+@pytest.mark.parametrize("score_type", SCORE_TYPES)
+def test_memory_budget_matches_baseline(words, score_type):
+    session = Session(words, chunk_size=5)
+    suggestion = session.suggest(sensitivity=2, score_type=score_type, top_k=2, memory_budget=1)
+
+    assert_top_k(suggestion, get_baseline(words, 2, score_type), 2)
+
+
+def test_pruned_sources_keep_their_ranking(words):
+    session = Session(words, chunk_size=5)
+    session.suggest(sensitivity=1, top_k=1)
+
+    # pruned sources are ranked by their counters for the same sensitivity, and excluded for any other:
+    expected = get_baseline(words, 1, Recall)
+    assert dict(session.rerank().get(scores=True)) == pytest.approx(expected)
+    assert len(session.rerank(sensitivity=2).get()) < len(expected)
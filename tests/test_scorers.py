@@ -0,0 +1,33 @@
+""" Batched and memoized scoring gives the distances of scoring every pair on its own. """
+
+import pytest
+
+from bartocsuggest import Scorer, LevenshteinScorer, NormalizedLevenshteinScorer, JaroWinklerScorer, TokenScorer
+from bartocsuggest.cache import _DistanceMemo
+
+SCORERS = [(LevenshteinScorer(), 2), (NormalizedLevenshteinScorer(), 0.3), (JaroWinklerScorer(), 0.2),
+           (TokenScorer(), 0.5)]
+LABELS = ["stock", "stocks", "stock exchange", "bond", "bonds", "auction", "", "exchange of stocks"]
+
+
+@pytest.mark.parametrize("scorer, cutoff", SCORERS)
+def test_score_batch_matches_score_pairs(words, scorer, cutoff):
+    assert scorer.score_batch(words, LABELS, cutoff) == pytest.approx(scorer.score_pairs(words, LABELS, cutoff))
+
+
+@pytest.mark.parametrize("scorer, cutoff", SCORERS)
+def test_score_labels_is_memoized(scorer, cutoff):
+    memo = _DistanceMemo.get_default()
+    misses = memo.misses
+    first = scorer.score_labels("stock", LABELS, cutoff)
+    hits = memo.hits
+    second = scorer.score_labels("stock", LABELS, cutoff)
+
+    assert first == second == pytest.approx(scorer.score_pairs(["stock"], LABELS, cutoff)[0])
+    assert memo.misses - misses == len(set(LABELS))
+    assert memo.hits - hits == len(LABELS)
+
+
+def test_scorer_is_abstract():
+    with pytest.raises(TypeError):
+        Scorer()
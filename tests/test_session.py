@@ -0,0 +1,96 @@
+""" Suggestions of a session match the one-word-at-a-time baseline for every way of fetching the words. """
+
+import json
+
+import pytest
+
+from bartocsuggest import Session, Recall, Average, Coverage, iter_words
+from baseline import SCORE_TYPES, get_baseline, get_mappings, assert_suggestion, get_concordance
+
+
+@pytest.mark.parametrize("sensitivity", [0, 1, 2, 3])
+@pytest.mark.parametrize("score_type", SCORE_TYPES)
+def test_preload_matches_baseline(preload_folder, words, sensitivity, score_type):
+    suggestion = Session(words, preload_folder).suggest(remote=False, sensitivity=sensitivity, score_type=score_type)
+
+    assert_suggestion(suggestion, get_baseline(words, sensitivity, score_type))
+
+
+@pytest.mark.parametrize("workers, processes", [(1, 0), (4, 0), (2, 1)])
+def test_remote_matches_baseline(words, workers, processes):
+    suggestion = Session(words).suggest(sensitivity=2, workers=workers, processes=processes)
+
+    assert_suggestion(suggestion, get_baseline(words, 2, Recall))
+
+
+def test_concordance_matches_baseline(preload_folder, words):
+    suggestion = Session(words, preload_folder).suggest(remote=False, sensitivity=1)
+
+    for source in suggestion.get():
+        assert get_concordance(suggestion, source) == get_mappings(words, source, 1)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_stream_matches_list(words, chunk_size):
+    streamed = Session(iter(words), chunk_size=chunk_size).suggest(sensitivity=1, workers=2)
+
+    assert_suggestion(streamed, get_baseline(words, 1, Recall))
+
+
+def test_iter_words_streams_files(tmp_path, words):
+    filename = tmp_path / "words.ndjson"
+    lines = [json.dumps(words[0]), json.dumps({"prefLabel": words[1]}), "{broken",
+             json.dumps({"prefLabel": {"en": words[2]}})] + [json.dumps(word) for word in words[3:]]
+    filename.write_text("\n".join(lines) + "\n")
+
+    suggestion = Session(iter_words(str(filename))).suggest(sensitivity=1)
+
+    assert_suggestion(suggestion, get_baseline(words, 1, Recall))
+
+
+@pytest.mark.parametrize("score_type", SCORE_TYPES)
+def test_rerank_matches_baseline(words, score_type):
+    session = Session(words)
+    session.suggest(sensitivity=3)
+
+    assert_suggestion(session.rerank(sensitivity=1, score_type=score_type), get_baseline(words, 1, score_type))
+
+
+def test_add_and_remove_words(words):
+    session = Session(words[:20])
+    session.suggest(sensitivity=1)
+
+    assert_suggestion(session.add_words(words[20:]), get_baseline(words, 1, Recall))
+    suggestion = session.remove_words(words[:5])
+    assert_suggestion(suggestion, get_baseline(words[5:], 1, Recall))
+    for source in suggestion.get():
+        assert get_concordance(suggestion, source) == get_mappings(words[5:], source, 1)
+
+
+def test_remove_words_skips_streamed_words(words):
+    session = Session(iter(words))
+    session.suggest(sensitivity=1)
+
+    assert_suggestion(session.remove_words(words[:5]), get_baseline(words, 1, Recall))
+
+
+def test_malformed_preload_is_skipped(preload_folder, words):
+    with open(preload_folder + "query_3.json", "w") as file:
+        file.write("{broken")
+    with open(preload_folder + "query_4.json", "w") as file:
+        json.dump({"@context": {}}, file)
+
+    suggestion = Session(words, preload_folder).suggest(remote=False, sensitivity=1, score_type=Coverage)
+
+    assert_suggestion(suggestion, get_baseline(words[:3] + words[5:], 1, Coverage))
+
+
+def test_sample_keeps_all_scores(words):
+    suggestion = Session(words).suggest(sensitivity=1, mode="sample", sample_top_k=2)
+
+    assert all(source._counters is None for source in suggestion._candidates)
+
+
+def test_sample_requires_recall(words):
+    with pytest.raises(ValueError):
+        Session(words).suggest(mode="sample", score_type=Average)
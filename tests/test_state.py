@@ -0,0 +1,107 @@
+""" Saved, loaded and merged session states give the suggestions of a single session over all words. """
+
+import pytest
+
+from bartocsuggest import Session, Recall, TokenScorer, NormalizedLevenshteinScorer
+from bartocsuggest.shard import run_shard
+from baseline import SCORE_TYPES, get_baseline, get_mappings, assert_suggestion, get_concordance
+
+
+def get_vectors(session):
+    """ Return the word and value of every score of every source in order. """
+
+    return {source.uri: [(score.comparandum.get_pref_label(), score.value)
+                         for score in source.levenshtein_vector.get_vector() or []]
+            for source in session._sources}
+
+
+@pytest.mark.parametrize("score_type", SCORE_TYPES)
+def test_load_matches_baseline(tmp_path, words, score_type):
+    session = Session(words)
+    session.suggest(sensitivity=1, score_type=score_type)
+    session.save_state(str(tmp_path / "session.state"))
+
+    loaded = Session.load_state(str(tmp_path / "session.state"))
+
+    assert_suggestion(loaded.rerank(), get_baseline(words, 1, score_type))
+    assert_suggestion(loaded.rerank(sensitivity=2), get_baseline(words, 2, score_type))
+    assert get_vectors(loaded) == get_vectors(session)
+
+
+def test_load_keeps_the_scorer(tmp_path, words):
+    session = Session(words, scorer=NormalizedLevenshteinScorer())
+    suggestion = session.suggest(sensitivity=0.3)
+    session.save_state(str(tmp_path / "session.state"))
+
+    loaded = Session.load_state(str(tmp_path / "session.state"))
+
+    assert type(loaded._scorer) is NormalizedLevenshteinScorer
+    assert loaded.rerank().get(scores=True) == suggestion.get(scores=True)
+
+
+def test_load_keeps_pruned_sources(tmp_path, words):
+    session = Session(words, chunk_size=5)
+    suggestion = session.suggest(sensitivity=1, top_k=1)
+    session.save_state(str(tmp_path / "session.state"))
+
+    loaded = Session.load_state(str(tmp_path / "session.state"))
+
+    assert loaded.rerank().get(scores=True) == suggestion.get(scores=True)
+
+
+def test_save_rejects_custom_scorers(tmp_path, words):
+    class CustomScorer(TokenScorer):
+        pass
+
+    session = Session(words, scorer=CustomScorer())
+    session.suggest()
+
+    with pytest.raises(ValueError):
+        session.save_state(str(tmp_path / "session.state"))
+
+
+def test_load_rejects_other_files(tmp_path):
+    (tmp_path / "other.state").write_bytes(b"\0" * 256)
+
+    with pytest.raises(ValueError):
+        Session.load_state(str(tmp_path / "other.state"))
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_merge_matches_unsharded(tmp_path, words, stream):
+    unsharded = Session(iter(words) if stream else words)
+    unsharded.suggest(sensitivity=2)
+    filenames = []
+    for shard in range(3):
+        session = Session(iter(words) if stream else words)
+        session.suggest(sensitivity=2, shard=shard, shards=3)
+        filenames.append(str(tmp_path / f"part-{shard}.state"))
+        session.save_state(filenames[-1])
+
+    merged = Session.merge_states(filenames)
+
+    assert get_vectors(merged) == get_vectors(unsharded)
+    assert merged._get_word_count() == len(words)
+    for score_type in SCORE_TYPES:
+        assert_suggestion(merged.rerank(score_type=score_type), get_baseline(words, 2, score_type))
+    suggestion = merged.rerank(sensitivity=1, score_type=Recall)
+    for source in suggestion.get():
+        assert get_concordance(suggestion, source) == get_mappings(words, source, 1)
+
+
+@pytest.mark.parametrize("top_k", [None, 2])
+def test_merge_shard_runs(tmp_path, words, top_k):
+    filename = tmp_path / "words.txt"
+    filename.write_text("\n".join(words) + "\n")
+    filenames = [str(tmp_path / f"part-{shard}.state") for shard in range(2)]
+    for shard, output in enumerate(filenames):
+        run_shard(str(filename), shard, 2, output, sensitivity=1, workers=2, top_k=top_k)
+
+    merged = Session.merge_states(filenames)
+
+    expected = get_baseline(words, 1, Recall)
+    ranked = merged.rerank(sensitivity=1).get(scores=True)
+    if top_k is None:
+        assert dict(ranked) == pytest.approx(expected)
+    else:
+        assert [score for _, score in ranked[:top_k]] == pytest.approx(sorted(expected.values(), reverse=True)[:top_k])
@@ -0,0 +1,170 @@
+""" Retries, circuit breakers and failover of the transport, tested against a scripted HTTP session. """
+
+from time import sleep
+from random import seed
+
+import pytest
+import requests
+
+from bartocsuggest import Session, Recall
+from bartocsuggest.transport import _Transport, _StubTransport, _TransportError, _RetryBudget, _CircuitBreaker
+from baseline import get_baseline, assert_suggestion
+
+MIRROR = "http://mirror.example.org/bartocfast/api"
+
+
+class _Response:
+    """ A scripted HTTP response. """
+
+    def __init__(self, status_code=200, data=None, headers=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.headers = headers or dict()
+        self._data = data
+
+    def json(self):
+        if self._data is None:
+            raise ValueError("invalid JSON")
+        return self._data
+
+
+class _Session:
+    """ A scripted HTTP session: answers each request with the next outcome of the URL's script.
+
+    An outcome is a status code, an exception or a response; once a script is used up, requests are answered with
+    the responses of the stub transport.
+    """
+
+    def __init__(self, scripts):
+        self.scripts = {url: list(script) for url, script in scripts.items()}
+        self.calls = []
+        self._stub = _StubTransport()
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append(url)
+        script = self.scripts.get(url) or []
+        outcome = script.pop(0) if len(script) > 0 else 200
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, _Response):
+            return outcome
+        return _Response(outcome, self._stub.fetch(params or dict()) if outcome == 200 else None)
+
+
+def make_transport(scripts, url=_StubTransport().url, **kwargs):
+    kwargs.setdefault("backoff", 0)
+    transport = _Transport(url=url, **kwargs)
+    transport._session = _Session(scripts)
+
+    return transport
+
+
+def test_transient_errors_are_retried():
+    # i.e., an unavailable server, a timeout and a response without valid JSON:
+    transport = make_transport({_StubTransport().url: [503, requests.exceptions.Timeout(), _Response(200)]})
+
+    assert transport.fetch({"searchword": "stock"}).get("results")
+    assert len(transport._session.calls) == 4
+    assert transport.endpoints[0].breaker.get_state() == "closed"
+
+
+def test_client_errors_are_not_retried():
+    transport = make_transport({_StubTransport().url: [404]})
+
+    with pytest.raises(_TransportError):
+        transport.fetch({"searchword": "stock"})
+    assert len(transport._session.calls) == 1
+    assert transport.endpoints[0].breaker.failures == 0
+
+
+def test_retries_end_with_an_error():
+    transport = make_transport({_StubTransport().url: [503] * 10}, retries=2, threshold=100)
+
+    with pytest.raises(_TransportError):
+        transport.fetch({"searchword": "stock"})
+    assert len(transport._session.calls) == 3
+
+
+def test_retry_budget_is_shared():
+    transport = make_transport({_StubTransport().url: [503] * 10}, threshold=100)
+    budget = _RetryBudget(retries=1)
+
+    with pytest.raises(_TransportError):
+        transport.fetch({"searchword": "stock"}, budget)
+    with pytest.raises(_TransportError):
+        transport.fetch({"searchword": "bond"}, budget)
+    assert len(transport._session.calls) == 3
+
+
+def test_retry_after_is_honoured():
+    assert _Transport.get_retry_after(_Response(429, headers={"Retry-After": "2"})) == 2
+    assert _Transport.get_retry_after(_Response(429, headers={"Retry-After": "soon"})) is None
+    assert _Transport(backoff=0, max_backoff=5).get_delay(0, retry_after=2) == 2
+    assert _Transport(backoff=0, max_backoff=5).get_delay(0, retry_after=60) == 5
+
+
+def test_circuit_opens_and_recovers():
+    breaker = _CircuitBreaker(threshold=2, cooldown=0.05)
+    breaker.record_failure()
+    assert breaker.get_state() == "closed"
+    breaker.record_failure()
+    assert breaker.get_state() == "open" and breaker.allow() is False
+
+    sleep(0.06)
+    assert breaker.allow() is True  # i.e., the probe
+    assert breaker.allow() is False
+    breaker.record_failure()
+    assert breaker.get_state() == "open"
+
+    sleep(0.06)
+    assert breaker.allow() is True
+    breaker.record_success()
+    assert breaker.get_state() == "closed" and breaker.opened == 2
+
+
+def test_open_circuit_fails_fast():
+    transport = make_transport({_StubTransport().url: [503] * 10}, threshold=2, cooldown=60)
+
+    with pytest.raises(_TransportError):
+        transport.fetch({"searchword": "stock"})
+    calls = len(transport._session.calls)
+    with pytest.raises(_TransportError):
+        transport.fetch({"searchword": "bond"})
+    assert len(transport._session.calls) == calls
+
+
+@pytest.mark.parametrize("selection", ["weighted", "latency"])
+def test_failover_to_another_endpoint(selection):
+    url = _StubTransport().url
+    # the failing endpoint is preferred by weight, and by latency as long as its latency is unknown:
+    seed(0)
+    transport = make_transport({url: [requests.exceptions.ConnectionError()] * 10, MIRROR: []},
+                               url=[url, MIRROR], weights=[1000, 1], selection=selection, threshold=3, retries=0)
+
+    for word in ["stock", "bond", "auction", "market", "exchange"]:
+        assert transport.fetch({"searchword": word}).get("results")
+
+    # the failed endpoint is skipped once its circuit is open:
+    assert transport._session.calls.count(url) == 3
+    assert transport.endpoints[0].breaker.get_state() == "open"
+
+
+def test_check_health():
+    url = _StubTransport().url
+    transport = make_transport({url: [503], MIRROR: [200]}, url=[url, MIRROR])
+
+    assert transport.check_health() == {url: False, MIRROR: True}
+    assert transport.endpoints[1].latency is not None
+
+
+def test_session_retries_failed_words(words):
+    url = _StubTransport().url
+    _Transport.set_default(make_transport({url: [requests.exceptions.ConnectionError()] * 3}, threshold=3,
+                                          cooldown=0.05, retries=0))
+    session = Session(words)
+    session.suggest(sensitivity=1)
+
+    # the circuit opened after three failures, i.e., all words failed fast:
+    assert len(session._failed) == len(words)
+    sleep(0.06)
+    assert_suggestion(session.retry_failed(), get_baseline(words, 1, Recall))